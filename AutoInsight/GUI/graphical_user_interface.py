@@ -1,11 +1,92 @@
 import streamlit as st
 import requests
 from dotenv import load_dotenv
+from urllib3.exceptions import ReadTimeoutError
+import json
 import os
 
 load_dotenv()
 # Config
 API_URL = os.getenv("VIN_API_URL")
+# Server-sent events variant of the summary endpoint (renders results progressively)
+STREAM_API_URL = os.getenv("VIN_STREAM_API_URL") or (f"{API_URL.rstrip('/')}/stream" if API_URL else None)
+# VIN prefix search (typeahead suggestions while a partial VIN is typed)
+SEARCH_API_URL = os.getenv("VIN_SEARCH_API_URL") or (f"{API_URL.rstrip('/').rsplit('/', 1)[0]}/vin-search" if API_URL else None)
+# Summary request timeouts in seconds: connecting, and the longest silence while waiting for / reading the stream
+# (the read timeout should exceed the server's LLM queue budget + LLM_DEADLINE_SECONDS)
+CONNECT_TIMEOUT = float(os.getenv("VIN_API_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("VIN_API_READ_TIMEOUT", "30"))
+VIN_LENGTH = 17
+SUGGESTIONS = 10
+
+
+def vin_suggestions(prefix):
+    """VINs of the inventory starting with `prefix` (empty on any error, suggestions are best effort)."""
+    try:
+        response = requests.get(SEARCH_API_URL, params={"prefix": prefix, "k": SUGGESTIONS}, timeout=2)
+        if response.status_code == 200:
+            return response.json()
+    except Exception:
+        pass
+    return {"total": 0, "matches": []}
+
+
+def error_message(response):
+    """Readable error of an API response (FastAPI detail string or validation errors)."""
+    try:
+        body = response.json()
+    except Exception:
+        return response.text
+    detail = body.get("detail", body.get("message", response.text))
+    if isinstance(detail, list):
+        return "; ".join(str(error.get("msg", error)).removeprefix("Value error, ") for error in detail)
+    return detail
+
+
+def iter_sse(response):
+    """
+    Yield (event, data) pairs from a server-sent events response.
+
+    A stream that stalls for longer than the read timeout raises
+    `requests.Timeout` (requests reports it as a connection error mid-stream).
+    """
+    event, data = "message", []
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if not line:
+                if data:
+                    yield event, json.loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+    except requests.ConnectionError as e:
+        if e.args and isinstance(e.args[0], ReadTimeoutError):
+            raise requests.Timeout(e) from e
+        raise
+
+
+def summary_card(text):
+    """HTML for the vehicle summary panel."""
+    return f"""
+    <div style='padding:25px; border-radius:12px; box-shadow: 0 4px 12px rgba(0,0,0,0.08);'>
+        <h3 style='margin-bottom:15px; color:white;'>Vehicle Summary</h3>
+        <p style='color:white; line-height:1.6;'>{text}</p>
+    </div>
+    """
+
+
+def risk_card(score):
+    """HTML for the risk score panel."""
+    return f"""
+    <div style='padding:25px; border-radius:12px; box-shadow: 0 4px 12px rgba(0,0,0,0.08); text-align:center;'>
+        <h3 style='margin-bottom:15px; color:white;'>Risk Score</h3>
+        <p style='font-size:2em; font-weight:700; color:white;'>{score}</p>
+    </div>
+    """
 
 # --- Page Setup ---
 st.set_page_config(page_title="AutoInsight", page_icon="🚘", layout="wide")
@@ -89,6 +170,20 @@ st.markdown("<h2 class='section-header' style='text-align:center;'>Enter Your VI
 col1, col2, col3 = st.columns([1, 2, 1])
 with col2:
     vin = st.text_input("", placeholder="e.g. 5J6RS5H54RL006999")
+
+    # Partial VIN: suggest the matching VINs of the inventory
+    prefix = vin.strip().upper()
+    if prefix and len(prefix) < VIN_LENGTH and prefix.isalnum() and SEARCH_API_URL:
+        found = vin_suggestions(prefix)
+        if found["matches"]:
+            labels = {
+                m["vin"]: f"{m['vin']} — {m.get('year') or ''} {m.get('make') or ''} {m.get('model') or ''}".strip()
+                for m in found["matches"]
+            }
+            more = f" (first {len(labels)} of {found['total']})" if found["total"] > len(labels) else ""
+            vin = st.selectbox(f"Matching VINs{more}", list(labels), format_func=labels.get)
+        else:
+            st.caption("No VIN in the inventory starts with this.")
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Center the button using additional inner columns
@@ -103,55 +198,57 @@ if generate:
     elif not vin.isalnum():
         st.warning("⚠️ Invalid VIN. A valid VIN should only contain letters and numbers.")
     else:
-        with st.spinner("Fetching summary..."):
-            try:
-                response = requests.post(API_URL, json={"vin": vin})
-
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success("✅ Summary generated!")
-
-                    res_col1, res_col2 = st.columns([3, 1])
-
-                    # --- Vehicle Summary ---
-                    with res_col1:
-                        st.markdown(f"""
-                        <div style='padding:25px; border-radius:12px; box-shadow: 0 4px 12px rgba(0,0,0,0.08);'>
-                            <h3 style='margin-bottom:15px; color:white;'>Vehicle Summary</h3>
-                            <p style='color:white; line-height:1.6;'>{data.get("summary", "No summary available.")}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    # --- Risk Score ---
-                    with res_col2:
-                        st.markdown(f"""
-                        <div style='padding:25px; border-radius:12px; box-shadow: 0 4px 12px rgba(0,0,0,0.08); text-align:center;'>
-                            <h3 style='margin-bottom:15px; color:white;'>Risk Score</h3>
-                            <p style='font-size:2em; font-weight:700; color:white;'>{data.get("risk_score", "N/A")}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    st.subheader("Reasoning")
-                    reasoning = data.get("reasoning", [])
-                    with st.expander("View detailed reasoning"):
-                        if isinstance(reasoning, list) and len(reasoning) > 0:
-                            for r in reasoning:
-                                st.markdown(f"- {r}")
-                        else:
-                            st.write("No reasoning available for this VIN.")
-
-                elif response.status_code == 404:
-                    st.error(f"❌ VIN not found in dataset: {vin}.Please input a valid VIN")
-                else:
-                    # Other errors
-                    try:
-                        err_msg = response.json().get("message", response.text)
-                    except Exception:
-                        err_msg = response.text
-                    st.error(f"⚠️ Error {response.status_code}: {err_msg}")
-
-            except Exception as e:
-                st.error(f"⚠️ Could not connect to API: {e}")
+        try:
+            # Stream the summary so each panel renders as soon as its field is ready
+            response = requests.post(STREAM_API_URL, json={"vin": vin}, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+
+            if response.status_code == 200:
+                status = st.empty()
+                status.info("⏳ Generating summary...")
+
+                res_col1, res_col2 = st.columns([3, 1])
+                with res_col1:
+                    summary_slot = st.empty()
+                with res_col2:
+                    risk_slot = st.empty()
+                summary_slot.markdown(summary_card("Generating summary..."), unsafe_allow_html=True)
+                risk_slot.markdown(risk_card("…"), unsafe_allow_html=True)
+
+                data = {}
+                for event, payload in iter_sse(response):
+                    if event == "field" and payload["key"] == "summary":
+                        summary_slot.markdown(summary_card(payload["value"]), unsafe_allow_html=True)
+                    elif event == "field" and payload["key"] == "risk_score":
+                        risk_slot.markdown(risk_card(payload["value"]), unsafe_allow_html=True)
+                    elif event == "result":
+                        data = payload
+
+                # The final result is validated server-side and may differ (e.g. fallback)
+                summary_slot.markdown(summary_card(data.get("summary", "No summary available.")), unsafe_allow_html=True)
+                risk_slot.markdown(risk_card(data.get("risk_score", "N/A")), unsafe_allow_html=True)
+                status.success("✅ Summary generated!")
+
+                st.subheader("Reasoning")
+                reasoning = data.get("reasoning", [])
+                with st.expander("View detailed reasoning"):
+                    if isinstance(reasoning, list) and len(reasoning) > 0:
+                        for r in reasoning:
+                            st.markdown(f"- {r}")
+                    else:
+                        st.write("No reasoning available for this VIN.")
+
+            elif response.status_code == 404:
+                st.error(f"❌ VIN not found in dataset: {vin}.Please input a valid VIN")
+            elif response.status_code == 422:
+                st.warning(f"⚠️ Invalid VIN: {error_message(response)}")
+            else:
+                # Other errors
+                st.error(f"⚠️ Error {response.status_code}: {error_message(response)}")
+
+        except requests.Timeout:
+            st.error("⚠️ The API did not respond in time. Please try again.")
+        except Exception as e:
+            st.error(f"⚠️ Could not connect to API: {e}")
 
 # --- Why AutoInsight Section ---
 st.markdown("<br><br>", unsafe_allow_html=True)
@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# Load environment variables (e.g., OpenAI API key) from .env file, once and
+# before any app module reads its settings
+load_dotenv()
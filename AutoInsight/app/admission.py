@@ -0,0 +1,209 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.metrics import LLM_QUEUE_WAIT_SECONDS, LLM_SHED_TOTAL
+
+# --- ENVIRONMENT ---
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "32"))  # LLM requests admitted at once (all callers)
+LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "0"))  # Token bucket refill rate (0 = unlimited)
+LLM_RATE_BURST = float(os.getenv("LLM_RATE_BURST", "10"))  # Token bucket size
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "256"))  # Requests waiting for admission
+LLM_QUEUE_BUDGET_SECONDS = float(os.getenv("LLM_QUEUE_BUDGET_SECONDS", "2"))  # Max estimated wait (interactive)
+LLM_BATCH_QUEUE_BUDGET_SECONDS = float(os.getenv("LLM_BATCH_QUEUE_BUDGET_SECONDS", "60"))  # Same, batch/warm
+
+# Priorities, most urgent first: interactive lookups are admitted ahead of batch and warm jobs
+PRIORITIES = ("interactive", "batch")
+
+# Assumed duration of an LLM request until the first one has been measured
+INITIAL_SERVICE_SECONDS = 2.0
+
+# Weight of the latest measurement in the moving average of LLM request durations
+SERVICE_SMOOTHING = 0.2
+
+
+class AdmissionController:
+    """
+    Admission control in front of the LLM upstream.
+
+    A request is admitted when fewer than `max_inflight` admitted requests are
+    running and the token bucket (`rate` per second, up to `burst`) has a
+    token. Otherwise it waits in a bounded priority queue (FIFO within a
+    priority) and is admitted as capacity frees up, or it is shed straight away:
+
+      - "queue_full": `queue_size` requests are already waiting (a more urgent
+        request instead takes the place of the least urgent, newest waiter,
+        which is shed with reason "preempted");
+      - "over_budget": its estimated wait exceeds the budget of its priority.
+
+    The wait estimate combines the requests ahead of it, the concurrency limit
+    with a moving average of LLM request durations, and the token bucket rate.
+
+    Requests are counted per vehicle: with micro-batching (LLM_BATCH_SIZE > 1)
+    every vehicle of a batch holds its own slot and token, so the limits bound
+    the vehicles in flight rather than the upstream calls.
+
+    Must be used from a single event loop at a time.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = LLM_MAX_INFLIGHT,
+        rate: float = LLM_RATE_PER_SECOND,
+        burst: float = LLM_RATE_BURST,
+        queue_size: int = LLM_QUEUE_SIZE,
+        budgets: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_inflight = max(1, max_inflight)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.queue_size = max(0, queue_size)
+        self.budgets = budgets or {"interactive": LLM_QUEUE_BUDGET_SECONDS, "batch": LLM_BATCH_QUEUE_BUDGET_SECONDS}
+        self.clock = clock
+        self.service_seconds = INITIAL_SERVICE_SECONDS
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._queue: List[List[Any]] = []  # heap of [priority level, sequence, future, priority, queued at]
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {"admitted": 0, "queued": 0, "shed": 0}
+
+    def _refill(self) -> None:
+        now = self.clock()
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _has_token(self) -> bool:
+        return self.rate <= 0 or self._tokens >= 1.0
+
+    def _take(self) -> None:
+        """Admit one request (token taken, slot counted)."""
+        if self.rate > 0:
+            self._tokens -= 1.0
+        self._in_flight += 1
+        self._stats["admitted"] += 1
+
+    def estimated_wait(self, priority: str) -> float:
+        """Seconds a new request of `priority` would wait before being admitted."""
+        level = PRIORITIES.index(priority)
+        ahead = sum(1 for entry in self._queue if entry[0] <= level) + 1
+        free_slots = self.max_inflight - self._in_flight
+        wait = 0.0 if ahead <= free_slots else (ahead - free_slots) / self.max_inflight * self.service_seconds
+        if self.rate > 0:
+            wait = max(wait, (ahead - self._tokens) / self.rate)
+        return max(0.0, wait)
+
+    def _shed(self, priority: str, reason: str) -> bool:
+        self._stats["shed"] += 1
+        LLM_SHED_TOTAL.inc(priority=priority, reason=reason)
+        return False
+
+    async def acquire(self, priority: str = "interactive") -> bool:
+        """
+        Wait for admission.
+
+        Args:
+            priority: One of PRIORITIES.
+
+        Returns:
+            bool: True once admitted (the caller must `release` afterwards),
+            False if the request was shed.
+        """
+        self._refill()
+        if not self._queue and self._in_flight < self.max_inflight and self._has_token():
+            self._take()
+            LLM_QUEUE_WAIT_SECONDS.observe(0.0, priority=priority)
+            return True
+
+        if self.estimated_wait(priority) > self.budgets.get(priority, LLM_QUEUE_BUDGET_SECONDS):
+            return self._shed(priority, "over_budget")
+
+        level = PRIORITIES.index(priority)
+        if len(self._queue) >= self.queue_size:
+            # Full: only a more urgent request gets in, in place of the least urgent, newest waiter
+            victim = max(self._queue, key=lambda entry: (entry[0], entry[1]), default=None)
+            if victim is None or victim[0] <= level:
+                return self._shed(priority, "queue_full")
+            self._remove(victim)
+            self._shed(victim[3], "preempted")
+            victim[2].set_result(False)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [level, next(self._sequence), future, priority, self.clock()]
+        heapq.heappush(self._queue, entry)
+        self._stats["queued"] += 1
+        self._schedule()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.result():
+                self.release()  # admitted just as the caller went away
+            elif entry in self._queue:
+                self._remove(entry)
+            raise
+
+    def release(self, service_seconds: Optional[float] = None) -> None:
+        """
+        Free the slot of an admitted request and admit the next waiters.
+
+        Args:
+            service_seconds: How long the request took (updates the wait estimate).
+        """
+        self._in_flight = max(0, self._in_flight - 1)
+        if service_seconds is not None:
+            self.service_seconds += SERVICE_SMOOTHING * (service_seconds - self.service_seconds)
+        self._schedule()
+
+    def _remove(self, entry: List[Any]) -> None:
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def _schedule(self) -> None:
+        """Admit what can be admitted now and, if tokens are missing, retry when the next one is due."""
+        self._dispatch()
+        if self._queue and self._in_flight < self.max_inflight and self.rate > 0 and self._timer is None:
+            delay = max(0.0, (1.0 - self._tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._schedule()
+
+    def _dispatch(self) -> None:
+        self._refill()
+        while self._queue and self._in_flight < self.max_inflight and self._has_token():
+            _, _, future, priority, queued_at = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._take()
+            LLM_QUEUE_WAIT_SECONDS.observe(self.clock() - queued_at, priority=priority)
+            future.set_result(True)
+
+    def depth(self) -> Dict[str, int]:
+        """Requests waiting for admission, by priority."""
+        depth = dict.fromkeys(PRIORITIES, 0)
+        for entry in self._queue:
+            depth[entry[3]] += 1
+        return depth
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, queue depth by priority, requests in flight and the current wait estimates."""
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "max_inflight": self.max_inflight,
+            "queue_depth": self.depth(),
+            "queue_size": self.queue_size,
+            "service_seconds": round(self.service_seconds, 3),
+            "estimated_wait": {priority: round(self.estimated_wait(priority), 3) for priority in PRIORITIES},
+        }
+
+
+# Process-wide admission controller used by app.llm
+llm_admission = AdmissionController()
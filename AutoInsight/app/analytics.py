@@ -0,0 +1,406 @@
+"""
+Portfolio analytics: inventory-level views over the precomputed deterministic scores.
+
+Everything is computed with NumPy over the snapshot's score and row columns
+(no per-row Python), and results are memoized per snapshot, so repeated
+dashboard loads for the same inventory version and filters are dictionary hits.
+A reload swaps in a new snapshot and therefore starts with an empty cache.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute
+
+from app.dataset import Dataset
+
+# --- ENVIRONMENT ---
+PORTFOLIO_CACHE_SIZE = int(os.getenv("PORTFOLIO_CACHE_SIZE", "256"))  # Memoized results per inventory snapshot
+
+# Dimensions a portfolio can be filtered and grouped by, and their inventory columns
+GROUP_COLUMNS = {"make": "Make", "model": "Model", "year": "Year"}
+
+# Metrics summarized per portfolio / group (score columns)
+METRICS = ("risk_score", "days_on_lot", "price_to_market")
+
+# Percentiles reported next to the mean of each metric
+PERCENTILES = (50, 90)
+
+# Range of the deterministic risk score (histogram bounds)
+RISK_RANGE = (1.0, 10.0)
+
+
+class PortfolioFilters(NamedTuple):
+    """
+    Row filters shared by every portfolio view (None / empty = no filter).
+
+    Attributes:
+        make (Tuple[str, ...]): Makes to keep (case-insensitive).
+        model (Tuple[str, ...]): Models to keep (case-insensitive).
+        year_min (Optional[int]): Oldest model year to keep.
+        year_max (Optional[int]): Newest model year to keep.
+    """
+    make: Tuple[str, ...] = ()
+    model: Tuple[str, ...] = ()
+    year_min: Optional[int] = None
+    year_max: Optional[int] = None
+
+    @classmethod
+    def of(
+        cls,
+        make: Optional[Sequence[str]] = None,
+        model: Optional[Sequence[str]] = None,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+    ) -> "PortfolioFilters":
+        """Filters with makes / models normalized (trimmed, uppercased, sorted), so equal queries share a cache entry."""
+        def normalize(values: Optional[Sequence[str]]) -> Tuple[str, ...]:
+            return tuple(sorted({str(value).strip().upper() for value in values or () if str(value).strip()}))
+
+        return cls(normalize(make), normalize(model), year_min, year_max)
+
+
+def _label(value: Any) -> Any:
+    """JSON-friendly group label (years as ints, missing values as None)."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class GroupLayout(NamedTuple):
+    """
+    Rows arranged for per-group statistics on one grouping.
+
+    Attributes:
+        codes (np.ndarray): Dense group code of every row.
+        labels (List[Tuple[Any, ...]]): Dimension labels of each group code.
+        metrics (Dict[str, Tuple[np.ndarray, np.ndarray]]): Per metric, row
+            positions sorted by (group, value) and the values in that order.
+    """
+    codes: np.ndarray
+    labels: List[Tuple[Any, ...]]
+    metrics: Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+class Portfolio:
+    """
+    Vectorized analytics for one inventory snapshot.
+
+    Column arrays, dimension codes and per-grouping sort orders are built once
+    (`prepare`, or lazily on first use) and kept for the lifetime of the
+    snapshot; query results are kept in a small LRU keyed on the view and its
+    parameters.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, dataset: Dataset, cache_size: int = PORTFOLIO_CACHE_SIZE):
+        self.dataset = dataset
+        self.version = dataset.version
+        self.cache_size = max(1, cache_size)
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._layouts: Dict[Tuple[str, ...], GroupLayout] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def prepare(self) -> "Portfolio":
+        """Build the column arrays and the single-dimension layouts now instead of on the first requests."""
+        for by in ((), *((dim,) for dim in GROUP_COLUMNS)):
+            self._layout(by)
+        self._years
+        return self
+
+    # --- columns ---
+    @cached_property
+    def _metrics(self) -> Dict[str, np.ndarray]:
+        """Metric columns as float64 arrays."""
+        return {name: self.dataset.score_table.column(name).to_numpy() for name in METRICS}
+
+    @cached_property
+    def _orders(self) -> Dict[str, np.ndarray]:
+        """Row positions sorted by each metric."""
+        return {name: np.argsort(values, kind="stable") for name, values in self._metrics.items()}
+
+    @cached_property
+    def _dimensions(self) -> Dict[str, Tuple[np.ndarray, List[Any]]]:
+        """Per dimension: row codes (0 = missing, n = labels[n - 1]) and the labels."""
+        dimensions = {}
+        for dim, column in GROUP_COLUMNS.items():
+            if column not in self.dataset.table.column_names:
+                dimensions[dim] = (np.zeros(len(self.dataset), dtype=np.int64), [])
+                continue
+            encoded = self.dataset.table.column(column).combine_chunks().dictionary_encode()
+            codes = encoded.indices.fill_null(-1).to_numpy().astype(np.int64) + 1
+            dimensions[dim] = (codes, [_label(label) for label in encoded.dictionary.to_pylist()])
+        return dimensions
+
+    @cached_property
+    def _years(self) -> np.ndarray:
+        """Model year of every row as float64 (NaN if missing)."""
+        if GROUP_COLUMNS["year"] not in self.dataset.table.column_names:
+            return np.full(len(self.dataset), np.nan)
+        column = self.dataset.table.column(GROUP_COLUMNS["year"])
+        return pa.compute.cast(column, pa.float64()).to_numpy()
+
+    def _codes_for(self, dim: str, wanted: Sequence[str]) -> np.ndarray:
+        """Codes of the labels of `dim` matching `wanted` (trimmed, case-insensitive)."""
+        wanted = {str(value).strip().upper() for value in wanted}
+        _, labels = self._dimensions[dim]
+        return np.array(
+            [i + 1 for i, label in enumerate(labels) if str(label).strip().upper() in wanted], dtype=np.int64
+        )
+
+    def _mask(self, filters: PortfolioFilters) -> Optional[np.ndarray]:
+        """Boolean row mask for `filters`, or None if nothing is filtered."""
+        mask = None
+
+        def narrow(condition: np.ndarray) -> None:
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        for dim in ("make", "model"):
+            wanted = getattr(filters, dim)
+            if wanted:
+                narrow(np.isin(self._dimensions[dim][0], self._codes_for(dim, wanted)))
+        if filters.year_min is not None:
+            narrow(self._years >= filters.year_min)
+        if filters.year_max is not None:
+            narrow(self._years <= filters.year_max)
+        return mask
+
+    def _layout(self, by: Tuple[str, ...]) -> GroupLayout:
+        """
+        Group codes, labels and per-metric (group, value) sort orders for `by` (memoized).
+
+        The (group, value) order is the metric's global sort order re-sorted by
+        group with a stable sort, so every group's values end up contiguous and
+        sorted; group codes are narrowed to uint16 when possible, where NumPy
+        uses a radix sort.
+        """
+        with self._lock:
+            layout = self._layouts.get(by)
+        if layout is not None:
+            return layout
+
+        combined = np.zeros(len(self.dataset), dtype=np.int64)
+        for dim in by:
+            codes, labels = self._dimensions[dim]
+            combined = combined * (len(labels) + 1) + codes
+        keys, codes = np.unique(combined, return_inverse=True)
+        codes = codes.reshape(-1)
+        sort_codes = codes.astype(np.uint16) if len(keys) <= np.iinfo(np.uint16).max else codes
+
+        labels = []
+        for key in keys.tolist():
+            parts = []
+            for dim in reversed(by):
+                dim_labels = self._dimensions[dim][1]
+                key, code = divmod(key, len(dim_labels) + 1)
+                parts.append(dim_labels[code - 1] if code else None)
+            labels.append(tuple(reversed(parts)))
+
+        metrics = {}
+        for name, order in self._orders.items():
+            positions = order[np.argsort(sort_codes[order], kind="stable")] if len(keys) > 1 else order
+            metrics[name] = (positions, self._metrics[name][positions])
+
+        layout = GroupLayout(codes, labels, metrics)
+        with self._lock:
+            self._layouts[by] = layout
+        return layout
+
+    # --- statistics ---
+    def _stats(self, mask: Optional[np.ndarray], layout: GroupLayout) -> Tuple[np.ndarray, Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Row count and mean / percentiles of every metric, per group.
+
+        Filtering the (group, value) ordered values keeps them ordered, so each
+        group is a contiguous sorted slice: sums come from one cumulative sum and
+        every percentile is an index lookup (linear interpolation, like `np.percentile`).
+        """
+        n_groups = len(layout.labels)
+        counts = np.bincount(layout.codes if mask is None else layout.codes[mask], minlength=n_groups)
+        present = counts > 0
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        last = np.maximum(counts - 1, 0)
+
+        stats: Dict[str, Dict[str, np.ndarray]] = {}
+        for name, (positions, values) in layout.metrics.items():
+            if mask is not None:
+                values = values[mask[positions]]
+
+            cumulative = np.concatenate(([0.0], np.cumsum(values)))
+            sums = cumulative[ends] - cumulative[starts]
+            metric = {"mean": np.divide(sums, counts, out=np.full(n_groups, np.nan), where=present)}
+            for q in PERCENTILES:
+                rank = (q / 100.0) * last
+                lower = np.floor(rank).astype(np.int64)
+                upper = np.minimum(lower + 1, last)
+                if len(values):
+                    lo = values[np.where(present, starts + lower, 0)]
+                    hi = values[np.where(present, starts + upper, 0)]
+                    metric[f"p{q}"] = np.where(present, lo + (hi - lo) * (rank - lower), np.nan)
+                else:
+                    metric[f"p{q}"] = np.full(n_groups, np.nan)
+            stats[name] = metric
+        return counts, stats
+
+    @staticmethod
+    def _metric_stats(stats: Dict[str, Dict[str, np.ndarray]], group: int) -> Dict[str, Dict[str, Optional[float]]]:
+        """Stats of one group as plain floats (None for empty groups)."""
+        return {
+            name: {key: (None if np.isnan(values[group]) else round(float(values[group]), 4)) for key, values in metric.items()}
+            for name, metric in stats.items()
+        }
+
+    def _cached(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        """Return the memoized result for `key`, computing and storing it on a miss."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+
+        result = compute()
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    # --- views ---
+    def positions(self, filters: PortfolioFilters = PortfolioFilters()) -> np.ndarray:
+        """Row positions matching `filters`, in row order."""
+        mask = self._mask(filters)
+        return np.arange(len(self.dataset), dtype=np.int64) if mask is None else np.flatnonzero(mask)
+
+    def distribution(self, filters: PortfolioFilters = PortfolioFilters(), bins: int = 9) -> Dict[str, Any]:
+        """
+        Risk-score histogram and overall metric statistics.
+
+        Args:
+            filters: Rows to include.
+            bins: Number of equal-width histogram buckets over the 1.0–10.0 risk range.
+
+        Returns:
+            Dict: version, count, buckets (lower, upper, count) and stats
+            (mean / percentiles of risk_score, days_on_lot and price_to_market).
+        """
+        def compute() -> Dict[str, Any]:
+            mask = self._mask(filters)
+            layout = self._layout(())
+            total, stats = self._stats(mask, layout)
+
+            # Bucket counts by binary search over the sorted risk scores (same bins as np.histogram)
+            positions, risk = layout.metrics["risk_score"]
+            if mask is not None:
+                risk = risk[mask[positions]]
+            edges = np.linspace(*RISK_RANGE, bins + 1)
+            bounds = np.searchsorted(risk, edges, side="left")
+            bounds[-1] = np.searchsorted(risk, edges[-1], side="right")
+            counts = np.diff(bounds)
+            return {
+                "version": self.version,
+                "count": int(total[0]),
+                "buckets": [
+                    {"lower": round(float(lo), 4), "upper": round(float(hi), 4), "count": int(n)}
+                    for lo, hi, n in zip(edges[:-1], edges[1:], counts)
+                ],
+                "stats": self._metric_stats(stats, 0),
+            }
+
+        return self._cached(("distribution", filters, bins), compute)
+
+    def top_risk(self, filters: PortfolioFilters = PortfolioFilters(), limit: int = 10) -> Dict[str, Any]:
+        """
+        The `limit` riskiest vehicles (highest deterministic risk score first).
+
+        Returns:
+            Dict: version, count (rows matching the filters) and vehicles
+            (VIN, year, make, model, risk_score, days_on_lot, price_to_market).
+        """
+        def compute() -> Dict[str, Any]:
+            mask = self._mask(filters)
+            order = self._orders["risk_score"]
+            if mask is not None:
+                order = order[mask[order]]
+            positions = order[::-1][:limit]
+
+            table = self.dataset.table
+            columns = {
+                field: table.column(column).take(positions).to_pylist() if column in table.column_names else [None] * len(positions)
+                for field, column in (("vin", "VIN"), ("year", "Year"), ("make", "Make"), ("model", "Model"))
+            }
+            vehicles = []
+            for i, pos in enumerate(positions.tolist()):
+                vehicle = {field: _label(values[i]) for field, values in columns.items()}
+                vehicle.update({name: round(float(self._metrics[name][pos]), 4) for name in METRICS})
+                vehicles.append(vehicle)
+            return {"version": self.version, "count": len(order), "vehicles": vehicles}
+
+        return self._cached(("top_risk", filters, limit), compute)
+
+    def groups(
+        self, by: Sequence[str], filters: PortfolioFilters = PortfolioFilters(), limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Row count and metric statistics grouped by make, model and/or year.
+
+        Args:
+            by: Dimensions to group by, in order (e.g. ("make", "model")).
+            filters: Rows to include.
+            limit: Keep only the largest groups (by row count).
+
+        Returns:
+            Dict: version, by and groups (dimension labels, count, stats),
+            largest groups first.
+
+        Raises:
+            ValueError: If `by` is empty or names an unknown dimension.
+        """
+        by = tuple(by)
+        unknown = [dim for dim in by if dim not in GROUP_COLUMNS]
+        if not by or unknown:
+            raise ValueError(f"Group by one or more of {', '.join(GROUP_COLUMNS)} (got {', '.join(by) or 'nothing'})")
+
+        def compute() -> Dict[str, Any]:
+            layout = self._layout(by)
+            counts, stats = self._stats(self._mask(filters), layout)
+            ranked = [int(g) for g in np.argsort(-counts, kind="stable") if counts[g]]
+            if limit is not None:
+                ranked = ranked[:limit]
+            return {
+                "version": self.version,
+                "by": list(by),
+                "groups": [
+                    {**dict(zip(by, layout.labels[g])), "count": int(counts[g]), "stats": self._metric_stats(stats, g)}
+                    for g in ranked
+                ],
+            }
+
+        return self._cached(("groups", by, filters, limit), compute)
+
+
+# One Portfolio per live snapshot; entries disappear with the snapshot after a reload
+_portfolios: "weakref.WeakKeyDictionary[Dataset, Portfolio]" = weakref.WeakKeyDictionary()
+_portfolios_lock = threading.Lock()
+
+
+def portfolio(dataset: Dataset) -> Portfolio:
+    """Return the (memoized) Portfolio of an inventory snapshot."""
+    with _portfolios_lock:
+        result = _portfolios.get(dataset)
+        if result is None:
+            result = _portfolios[dataset] = Portfolio(dataset)
+        return result
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from app.metrics import LLM_BATCH_SIZE, LLM_BATCH_WAIT_SECONDS
+
+T = TypeVar("T")
+
+
+class MicroBatcher(Generic[T]):
+    """
+    Groups items submitted close together into one handler call.
+
+    A batch is dispatched as soon as `max_size` items are waiting, or
+    `window_seconds` after the first item of the batch arrived, whichever
+    comes first. The handler receives the items in submission order and
+    returns one result per item; each `submit` caller gets its own result
+    (or the handler's exception).
+
+    Must be used from a single event loop at a time.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[T]], Awaitable[Sequence[Any]]],
+        max_size: int,
+        window_seconds: float,
+    ):
+        self.handler = handler
+        self.max_size = max(1, max_size)
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[T, "asyncio.Future[Any]", float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: "set[asyncio.Task[None]]" = set()
+        self.batches = 0  # handler calls made
+
+    async def submit(self, item: T) -> Any:
+        """Queue `item` for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Dispatch up to `max_size` waiting items (re-arming the timer if more are left)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window_seconds, self._flush)
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        LLM_BATCH_SIZE.observe(len(batch))
+        for _, _, queued_at in batch:
+            LLM_BATCH_WAIT_SECONDS.observe(now - queued_at)
+
+        self.batches += 1
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, "asyncio.Future[Any]", float]]) -> None:
+        try:
+            results = await self.handler([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import queue
+import atexit
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.log import logger
+from app.models import row_json
+from app.prompts import BATCH_SYSTEM_PROMPT, BATCH_USER_PROMPT_TEMPLATE, SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+
+# --- ENVIRONMENT ---
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))  # Max entries kept in memory
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))  # Entry lifetime (1 day)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")  # SQLite file for the disk tier ("" = memory only)
+
+
+# The prompt templates as they appear in every key payload, encoded once (they are long)
+_PROMPTS_JSON = json.dumps([SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, BATCH_SYSTEM_PROMPT, BATCH_USER_PROMPT_TEMPLATE])[1:-1]
+
+
+def cache_key(vehicle: Mapping[str, Any], model: str) -> str:
+    """
+    Content-addressed key for an LLM result.
+
+    The key changes whenever the vehicle data, any prompt template (system,
+    single or batch) or the model changes, so stale results are never served.
+
+    Args:
+        vehicle (Mapping[str, Any]): Vehicle data sent to the LLM (dict or `Vehicle`).
+        model (str): Model name.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    # Same bytes as json.dumps([row JSON, *prompts, model])
+    payload = f"[{json.dumps(row_json(vehicle, sort_keys=True))}, {_PROMPTS_JSON}, {json.dumps(model)}]"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM summaries.
+
+    - Memory tier: bounded LRU (`max_entries`) with a per-entry TTL.
+    - Disk tier (optional): SQLite file, so results survive restarts. Disk hits
+      are promoted into the memory tier.
+
+    Disk writes never block the caller: `set` updates the memory tier and
+    queues the row for a writer thread, which commits whatever is queued in
+    one transaction (the file is in WAL mode, so readers don't wait for it).
+    Disk reads still hit SQLite: on the event loop, call `get(key, disk=False)`
+    first and only go to the disk tier from a worker thread on a miss.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = LLM_CACHE_SIZE,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        disk_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+        self.disk_path = disk_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._closed = False
+
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._db = self._reader()
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, vin TEXT, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_vin ON llm_cache (vin)")
+            self._db.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _reader(self) -> sqlite3.Connection:
+        """Disk tier connection of the calling thread (WAL readers don't wait for the writer)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.disk_path, check_same_thread=False, timeout=30.0)
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    def _write_loop(self) -> None:
+        """Commit queued writes, everything queued so far per transaction, until `close` (writer thread)."""
+        db = sqlite3.connect(self.disk_path, timeout=30.0)
+        while True:
+            item = self._queue.get()
+            writes, waiters = [], []
+            while item is not None:
+                (waiters if isinstance(item, threading.Event) else writes).append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if writes:
+                try:
+                    with db:
+                        for statement, params in writes:
+                            db.execute(statement, params)
+                except sqlite3.Error as e:
+                    logger.warning("LLM cache: could not write %d entries to disk: %s", len(writes), e)
+            for waiter in waiters:
+                waiter.set()
+            if item is None:
+                db.close()
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every disk write queued so far is committed. Returns False on timeout."""
+        if self._db is None or self._closed:
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def close(self) -> None:
+        """Commit what is queued, stop the writer thread and close the disk tier."""
+        if self._db is None or self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+
+    def get(self, key: str, disk: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached result for `key`, or None on a miss / expired entry.
+
+        With `disk=False` only the memory tier is checked, and a memory miss is
+        not counted when the disk tier is enabled (the caller is expected to
+        retry with `disk=True` off the event loop).
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return dict(value)
+                del self._memory[key]
+                self._stats["expirations"] += 1
+
+            if self._db is not None and not disk:
+                return None
+
+        if self._db is not None:
+            row = self._reader().execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with self._lock:
+                    if now - row[1] <= self.ttl_seconds:
+                        value = json.loads(row[0])
+                        self._put_memory(key, row[1], value)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return dict(value)
+                    self._stats["expirations"] += 1
+                self._write("DELETE FROM llm_cache WHERE key = ? AND created_at = ?", (key, row[1]))
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Like `get`, but without touching counters, LRU order or the memory tier,
+        so bulk readers (exports) don't evict the entries serving live traffic.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                return dict(entry[1])
+        if self._db is not None:
+            row = self._reader().execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl_seconds:
+                return json.loads(row[0])
+        return None
+
+    def contains(self, key: str) -> bool:
+        """True if `key` has a live entry in either tier (does not touch counters or LRU order)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                return True
+        if self._db is not None:
+            row = self._reader().execute(
+                "SELECT created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            return row is not None and now - row[0] <= self.ttl_seconds
+        return False
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a result in the memory tier and, if enabled, queue it for the disk tier."""
+        now = self.clock()
+        with self._lock:
+            self._put_memory(key, now, dict(value))
+        if self._db is not None:
+            self._write(
+                "INSERT OR REPLACE INTO llm_cache (key, vin, value, created_at) VALUES (?, ?, ?, ?)",
+                (key, value.get("vin", ""), json.dumps(value), now),
+            )
+
+    def _write(self, statement: str, params: Tuple) -> None:
+        """Queue a disk tier write for the writer thread."""
+        if not self._closed:
+            self._queue.put((statement, params))
+
+    def invalidate_vins(self, vins: Iterable[str]) -> int:
+        """Drop every entry (both tiers) whose result is for one of `vins`. Returns the number of keys removed."""
+        vins = set(vins)
+        if not vins:
+            return 0
+        with self._lock:
+            removed = {key for key, (_, value) in self._memory.items() if value.get("vin") in vins}
+            for key in removed:
+                del self._memory[key]
+        if self._db is not None:
+            self.flush()  # results queued before the invalidation must not be written after it
+            db = self._reader()
+            with db:
+                for vin in vins:
+                    rows = db.execute("SELECT key FROM llm_cache WHERE vin = ?", (vin,)).fetchall()
+                    removed.update(row[0] for row in rows)
+                db.executemany("DELETE FROM llm_cache WHERE vin = ?", [(vin,) for vin in vins])
+        with self._lock:
+            self._stats["invalidations"] += len(removed)
+        return len(removed)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            self.flush()
+            db = self._reader()
+            with db:
+                db.execute("DELETE FROM llm_cache")
+
+    @property
+    def disk_enabled(self) -> bool:
+        """True if results are also kept in the SQLite tier."""
+        return self._db is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current sizes."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "size": len(self._memory),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self.disk_enabled,
+            }
+
+    def _put_memory(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        """Insert into the LRU, evicting the least recently used entries (lock held)."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+
+# Process-wide cache used by app.llm
+llm_cache = LLMCache(disk_path=LLM_CACHE_PATH or None)
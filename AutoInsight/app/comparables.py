@@ -0,0 +1,211 @@
+"""
+Nearest comparable vehicles, for market context beyond the fixed scoring constants.
+
+Comparables share the vehicle's make and model and are ranked by Euclidean
+distance over z-scored year, mileage and price. The index is built once per
+inventory snapshot (so a reload brings a fresh one):
+
+- rows are grouped by make/model and, inside each group, sorted along the
+  feature with the widest spread in that group;
+- a query starts at the vehicle's own position in that order and widens the
+  window in doubling blocks, stopping as soon as the gap along the sort axis
+  alone exceeds the k-th best distance found so far.
+
+The result is exact, and a query only touches the neighbourhood of the vehicle
+rather than its whole make/model group (let alone the inventory).
+"""
+import os
+import threading
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute
+
+from app.dataset import Dataset
+from app.models import Vehicle
+
+# --- ENVIRONMENT ---
+COMPARABLES_K = int(os.getenv("COMPARABLES_K", "10"))  # Comparables used for the market context
+# Attach the comparables' market context to LLM prompts and deterministic reasoning
+COMPARABLES_IN_SUMMARY = os.getenv("COMPARABLES_IN_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+# Inventory columns vehicles must share to be comparable
+PARTITION_COLUMNS = ("Make", "Model")
+
+# Numeric inventory columns the distance is computed on (after z-scoring)
+FEATURE_COLUMNS = ("Year", "Mileage", "Current price")
+
+# Score columns summarized (median) in the market context
+CONTEXT_SCORES = ("days_on_lot", "price_to_market", "risk_score")
+
+# Rows examined on each side of the vehicle in the first search step
+FIRST_BLOCK = 64
+
+
+def _numeric(dataset: Dataset, column: str) -> np.ndarray:
+    """A numeric inventory column as float64 (NaN if missing or absent)."""
+    if column not in dataset.table.column_names:
+        return np.full(len(dataset), np.nan)
+    return pa.compute.cast(dataset.table.column(column), pa.float64()).to_numpy()
+
+
+class ComparablesIndex:
+    """
+    k-nearest comparable vehicles for one inventory snapshot.
+
+    Attributes:
+        dataset (Dataset): Snapshot the index was built on.
+    """
+
+    def __init__(self, dataset: Dataset):
+        self.dataset = dataset
+        n = len(dataset)
+
+        # Make/model group of every row (case-insensitive)
+        group = np.zeros(n, dtype=np.int64)
+        for column in PARTITION_COLUMNS:
+            if column in dataset.table.column_names:
+                values = pa.compute.utf8_upper(pa.compute.cast(dataset.table.column(column), pa.string()))
+                encoded = values.combine_chunks().dictionary_encode()
+                codes = encoded.indices.fill_null(-1).to_numpy().astype(np.int64) + 1
+                group = group * (len(encoded.dictionary) + 1) + codes
+        _, group = np.unique(group, return_inverse=True)
+        group = group.reshape(-1)
+
+        # z-scored features; missing values sit at the mean
+        raw = np.column_stack([_numeric(dataset, column) for column in FEATURE_COLUMNS]) if n else np.zeros((0, len(FEATURE_COLUMNS)))
+        with np.errstate(invalid="ignore"):
+            mean = np.nanmean(raw, axis=0) if n else np.zeros(len(FEATURE_COLUMNS))
+            std = np.nanstd(raw, axis=0) if n else np.ones(len(FEATURE_COLUMNS))
+        mean = np.nan_to_num(mean)
+        std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+        features = np.nan_to_num((raw - mean) / std)
+
+        # Sort axis per group: the feature with the largest variance inside the group
+        n_groups = int(group.max()) + 1 if n else 0
+        counts = np.bincount(group, minlength=n_groups)
+        spread = np.column_stack([
+            np.bincount(group, weights=features[:, j] ** 2, minlength=n_groups)
+            - np.bincount(group, weights=features[:, j], minlength=n_groups) ** 2 / np.maximum(counts, 1)
+            for j in range(len(FEATURE_COLUMNS))
+        ]) if n else np.zeros((0, len(FEATURE_COLUMNS)))
+        axis = spread.argmax(axis=1) if n else np.zeros(0, dtype=np.int64)
+        projection = features[np.arange(n), axis[group]] if n else np.zeros(0)
+
+        order = np.lexsort((projection, group))
+        self.order = order                                   # sorted slot → row position
+        self.slot = np.empty(n, dtype=np.int64)              # row position → sorted slot
+        self.slot[order] = np.arange(n)
+        self.features = features[order]
+        self.projection = projection[order]
+        self.ends = np.cumsum(counts)
+        self.starts = self.ends - counts
+        self.group = group
+        self.scores = {name: dataset.score_table.column(name).to_numpy() for name in CONTEXT_SCORES}
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def nearest(self, pos: int, k: int = COMPARABLES_K) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The `k` vehicles most similar to row `pos` (same make/model, excluding itself).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions and distances, closest first.
+        """
+        group = self.group[pos]
+        start, end = self.starts[group], self.ends[group]
+        slot = self.slot[pos]
+        query, axis_value = self.features[slot], self.projection[slot]
+
+        best_slots = np.zeros(0, dtype=np.int64)
+        best_dist = np.zeros(0)
+        lo, hi, block = slot, slot + 1, max(FIRST_BLOCK, k)
+        while lo > start or hi < end:
+            new_lo, new_hi = max(start, lo - block), min(end, hi + block)
+            candidates = np.concatenate((np.arange(new_lo, lo), np.arange(hi, new_hi)))
+            dist = ((self.features[candidates] - query) ** 2).sum(axis=1)
+
+            best_slots = np.concatenate((best_slots, candidates))
+            best_dist = np.concatenate((best_dist, dist))
+            if len(best_dist) > k:
+                keep = np.argpartition(best_dist, k - 1)[:k]
+                best_slots, best_dist = best_slots[keep], best_dist[keep]
+
+            lo, hi, block = new_lo, new_hi, block * 2
+            if len(best_dist) == k:
+                # Unvisited rows are at least this far away along the sort axis alone
+                gap = min(
+                    axis_value - self.projection[lo - 1] if lo > start else np.inf,
+                    self.projection[hi] - axis_value if hi < end else np.inf,
+                )
+                if gap * gap >= best_dist.max():
+                    break
+
+        ranked = np.lexsort((best_slots, best_dist))
+        return self.order[best_slots[ranked]], np.sqrt(best_dist[ranked])
+
+    def comparables(self, pos: int, k: int = COMPARABLES_K) -> List[Dict[str, Any]]:
+        """
+        The `k` nearest comparables of row `pos` as records.
+
+        Returns:
+            List[Dict]: VIN, year, make, model, mileage, price, days_on_lot,
+            price_to_market, risk_score and distance, closest first.
+        """
+        positions, distances = self.nearest(pos, k)
+        records = []
+        for position, distance in zip(positions.tolist(), distances.tolist()):
+            vehicle = self.dataset.vehicle(position)
+            records.append({
+                "vin": vehicle.get("VIN"),
+                "year": vehicle.year,
+                "make": vehicle.get("Make"),
+                "model": vehicle.get("Model"),
+                "mileage": vehicle.mileage,
+                "price": vehicle.get("Current price"),
+                "days_on_lot": vehicle.days_on_lot,
+                "price_to_market": vehicle.price_to_market,
+                "risk_score": vehicle.risk_score,
+                "distance": round(distance, 4),
+            })
+        return records
+
+    def market_context(self, pos: int, k: int = COMPARABLES_K) -> Optional[Dict[str, Any]]:
+        """
+        How the comparables of row `pos` are doing (None if it has none).
+
+        Returns:
+            Optional[Dict]: Number of comparables and their median days on lot,
+            price to market and risk score.
+        """
+        positions, _ = self.nearest(pos, k)
+        if not len(positions):
+            return None
+        return {
+            "comparables": int(len(positions)),
+            **{f"median_{name}": round(float(np.median(values[positions])), 2) for name, values in self.scores.items()},
+        }
+
+
+# One index per live snapshot; entries disappear with the snapshot after a reload
+_indexes: "weakref.WeakKeyDictionary[Dataset, ComparablesIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def comparables_index(dataset: Dataset) -> ComparablesIndex:
+    """Return the (memoized) comparables index of an inventory snapshot."""
+    with _indexes_lock:
+        index = _indexes.get(dataset)
+        if index is None:
+            index = _indexes[dataset] = ComparablesIndex(dataset)
+        return index
+
+
+def with_market_context(dataset: Dataset, pos: int, vehicle: Vehicle) -> Vehicle:
+    """Attach the market context of row `pos` to its `vehicle` when COMPARABLES_IN_SUMMARY is on."""
+    if COMPARABLES_IN_SUMMARY:
+        vehicle.market = comparables_index(dataset).market_context(pos)
+    return vehicle
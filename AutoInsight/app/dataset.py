@@ -0,0 +1,646 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from app.cache import LLMCache
+from app.log import logger
+from app.models import Vehicle
+from app.utils import (
+    build_vin_index,
+    csv_fingerprint,
+    load_inventory,
+    load_inventory_table,
+    matches_csv,
+    normalize_vin,
+    score_inventory,
+)
+
+if TYPE_CHECKING:  # pandas is imported on first use: mapping a published generation doesn't need it
+    import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock (run a single worker)
+    fcntl = None
+
+# --- ENVIRONMENT ---
+# Inventory file served by the API (default: the bundled sample, wherever the process is started from)
+INVENTORY_CSV = os.getenv(
+    "INVENTORY_CSV", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_data.csv")
+)
+INVENTORY_WATCH = os.getenv("INVENTORY_WATCH", "true").lower() in ("1", "true", "yes")
+INVENTORY_RELOAD_DEBOUNCE_SECONDS = float(os.getenv("INVENTORY_RELOAD_DEBOUNCE_SECONDS", "1.0"))  # Quiet time before a reload
+
+# Bump when the generation file layout changes, to invalidate old generations
+GENERATION_FORMAT = "1"
+
+# Column prefixes used to store scores and row hashes next to the inventory columns
+SCORE_PREFIX = "score:"
+HASH_COLUMN = "row_hash:"
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """Per-row content hash (uint64) over every column, independent of the row index."""
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def generation_paths(csv_path: str, version: int) -> Tuple[str, str, str]:
+    """(Arrow rows file, sorted VIN keys, VIN row positions) of one published generation."""
+    base = f"{os.path.splitext(csv_path)[0]}.gen-{version:06d}"
+    return f"{base}.arrow", f"{base}.vins.npy", f"{base}.rows.npy"
+
+
+def _pointer_path(csv_path: str) -> str:
+    """File naming the generation currently published for a CSV."""
+    return os.path.splitext(csv_path)[0] + ".current"
+
+
+@contextmanager
+def _publish_lock(csv_path: str) -> Iterator[None]:
+    """Cross-process lock so one worker builds / publishes a generation at a time."""
+    try:
+        f = open(os.path.splitext(csv_path)[0] + ".lock", "a")
+    except OSError:
+        yield
+        return
+    with f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class VinIndex:
+    """
+    VIN → row position index stored as two NumPy arrays: the normalized VINs
+    (sorted, fixed-width bytes) and their row positions.
+
+    Lookups are a binary search, so the arrays can be memory-mapped read-only
+    and shared between worker processes instead of each one building a dict.
+    """
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        self.keys = keys
+        self.positions = positions
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "VinIndex":
+        """Index a DataFrame (same rules as `build_vin_index`: first duplicate wins)."""
+        index = build_vin_index(df)
+        keys = np.array([vin.encode("utf-8") for vin in index], dtype=bytes)
+        if not len(keys):
+            keys = np.array([], dtype="S1")
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], np.fromiter(index.values(), dtype=np.int64, count=len(index))[order])
+
+    def get(self, vin: str) -> Optional[int]:
+        """Row position of an already normalized VIN, or None."""
+        key = vin.encode("utf-8")
+        if len(key) > self.keys.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.positions[i])
+        return None
+
+    def search(self, prefix: str, k: int) -> Tuple[int, np.ndarray]:
+        """
+        VINs starting with an already normalized prefix (typeahead).
+
+        The matches are a contiguous slice of the sorted keys, found with two
+        binary searches: O(log n + k), whatever the inventory size.
+
+        Args:
+            prefix: Normalized VIN prefix ("" matches every VIN).
+            k: Maximum number of matches returned.
+
+        Returns:
+            Tuple[int, np.ndarray]: Total number of matches and the row
+            positions of the first `k` of them, in VIN order.
+        """
+        key = prefix.encode("utf-8")
+        if len(key) > self.keys.dtype.itemsize:
+            return 0, np.zeros(0, dtype=np.int64)
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        # Every key with this prefix sorts below prefix + 0xFF (VINs are ASCII)
+        hi = int(np.searchsorted(self.keys, key + b"\xff", side="left")) if key else len(self.keys)
+        return hi - lo, np.asarray(self.positions[lo:min(hi, lo + k)])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class Dataset:
+    """
+    Immutable inventory snapshot: typed rows, precomputed scores, the VIN index
+    and per-row content hashes.
+
+    Rows and scores are Arrow tables and the index is NumPy arrays, so a
+    published generation can be memory-mapped read-only by every worker
+    process (`Dataset.open`) instead of each holding a private copy.
+
+    Readers take one reference (`inventory.current`) and use it for the whole
+    request, so a reload swapping in a new snapshot never changes data under them.
+    """
+
+    def __init__(
+        self,
+        table: pa.Table,
+        score_table: pa.Table,
+        hashes: np.ndarray,
+        vin_index: VinIndex,
+        source: str,
+        version: int = 1,
+    ):
+        self.table = table
+        self.score_table = score_table
+        self.hashes = hashes
+        self.vin_index = vin_index
+        self.source = source
+        self.version = version
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_frame(
+        cls, df: pd.DataFrame, source: str, version: int = 1, scores: Optional[pd.DataFrame] = None
+    ) -> "Dataset":
+        """Build an in-memory snapshot from a typed DataFrame (scored here unless `scores` is given)."""
+        scores = score_inventory(df) if scores is None else scores
+        return cls(
+            pa.Table.from_pandas(df, preserve_index=False),
+            pa.Table.from_pandas(scores, preserve_index=False),
+            row_hashes(df),
+            VinIndex.build(df),
+            source,
+            version,
+        )
+
+    @classmethod
+    def from_table(cls, table: pa.Table, source: str, version: int = 1) -> "Dataset":
+        """
+        Build a snapshot over a typed Arrow table, which is kept as is (e.g. the
+        memory-mapped typed snapshot). Only scoring, row hashing and the VIN
+        index go through pandas, and that frame is dropped once they are built.
+        """
+        df = table.to_pandas()
+        return cls(
+            table,
+            pa.Table.from_pandas(score_inventory(df), preserve_index=False),
+            row_hashes(df),
+            VinIndex.build(df),
+            source,
+            version,
+        )
+
+    @classmethod
+    def load(cls, path: str, version: int = 1) -> "Dataset":
+        """Load, index and score an inventory file from scratch (rows stay in the mapped typed snapshot)."""
+        return cls.from_table(load_inventory_table(path), path, version)
+
+    def patch(self, df: pd.DataFrame, version: int) -> Tuple["Dataset", np.ndarray]:
+        """
+        Next snapshot of the same inventory, built from this one.
+
+        Rows are diffed by content hash first. Rows whose content already
+        existed are gathered from this snapshot's Arrow tables (scores
+        included); only new or edited rows are converted and scored. The VIN
+        index is reused as is when no VIN was added, removed or moved, and
+        otherwise updated for the VINs that changed (no re-sort). If the
+        columns changed, or VINs are duplicated or missing, the snapshot is
+        built from the frame instead (unchanged rows still keep their scores).
+
+        Args:
+            df: Typed inventory (new file contents).
+            version: Version of the new snapshot.
+
+        Returns:
+            Tuple[Dataset, np.ndarray]: The snapshot and, per row of `df`, the
+            row of this snapshot it reuses (-1 for rescored rows).
+        """
+        import pandas as pd
+
+        hashes = row_hashes(df)
+        old_positions = pd.Series(np.arange(len(self.hashes)), index=self.hashes)
+        old_positions = old_positions[~old_positions.index.duplicated()]
+        matched = old_positions.reindex(hashes).fillna(-1).to_numpy().astype(np.int64)
+        fresh = np.flatnonzero(matched < 0)
+        fresh_scores = score_inventory(df.iloc[fresh])
+
+        if list(df.columns) == self.table.column_names:
+            try:
+                # One gather over [this snapshot's rows, new rows]: row i comes from matched[i] or from the new rows
+                take = matched.copy()
+                take[fresh] = len(self) + np.arange(len(fresh))
+                take = pa.array(take)
+                table = pa.concat_tables([
+                    self.table,
+                    pa.Table.from_pandas(df.iloc[fresh], schema=self.table.schema, preserve_index=False),
+                ]).take(take)
+                score_table = pa.concat_tables([
+                    self.score_table,
+                    pa.Table.from_pandas(fresh_scores, schema=self.score_table.schema, preserve_index=False),
+                ]).take(take)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+                pass  # a new value doesn't fit the column types: build from the frame
+            else:
+                return Dataset(table, score_table, hashes, self._patched_index(df, matched, fresh), self.source, version), matched
+
+        kept = self.score_table.take(pa.array(matched[matched >= 0])).to_pandas()
+        kept.index = df.index[matched >= 0]
+        fresh_scores.index = df.index[fresh]
+        scores = pd.concat([kept, fresh_scores]).reindex(df.index)
+        return Dataset.from_frame(df, self.source, version, scores=scores), matched
+
+    def _patched_index(self, df: pd.DataFrame, matched: np.ndarray, fresh: np.ndarray) -> VinIndex:
+        """VIN index of the patched snapshot: this one, with reused rows moved and new rows inserted."""
+        reused = np.flatnonzero(matched >= 0)
+        index = self.vin_index
+        # Incremental only if every row has its own VIN (first-duplicate-wins needs a rebuild)
+        if len(index) != len(self) or len(np.unique(matched[reused])) != len(reused):
+            return VinIndex.build(df)
+
+        new_position = np.full(len(self), -1, dtype=np.int64)
+        new_position[matched[reused]] = reused
+        old_positions = np.asarray(index.positions)
+        moved = new_position[old_positions]
+        keys = np.asarray(index.keys)
+
+        fresh_keys, fresh_rows = np.array([], dtype="S1"), fresh
+        if len(fresh):
+            vins = df["VIN"].iloc[fresh]
+            if vins.isna().any():
+                return VinIndex.build(df)
+            fresh_keys = np.array([normalize_vin(vin).encode("utf-8") for vin in vins], dtype=bytes)
+            order = np.argsort(fresh_keys, kind="stable")
+            fresh_keys, fresh_rows = fresh_keys[order], fresh[order]
+            if (fresh_keys[1:] == fresh_keys[:-1]).any():
+                return VinIndex.build(df)
+            if fresh_keys.dtype.itemsize > keys.dtype.itemsize:
+                keys = keys.astype(fresh_keys.dtype)
+            at = np.searchsorted(keys, fresh_keys)
+            hit = np.zeros(len(at), dtype=bool)
+            if len(keys):
+                hit = keys[np.minimum(at, len(keys) - 1)] == fresh_keys
+            if (moved[at[hit]] >= 0).any():
+                return VinIndex.build(df)  # the VIN is also on a reused row
+            # Edited rows: same VIN, new content → the entry now points at the new row
+            moved[at[hit]] = fresh_rows[hit]
+            fresh_keys, fresh_rows = fresh_keys[~hit], fresh_rows[~hit]
+        if not len(fresh_keys) and np.array_equal(moved, old_positions):
+            return index  # same VINs on the same rows
+
+        keep = moved >= 0
+        keys, positions = keys[keep], moved[keep]
+        if len(fresh_keys):
+            keys = keys.astype(np.result_type(keys.dtype, fresh_keys.dtype))
+            at = np.searchsorted(keys, fresh_keys)
+            keys = np.insert(keys, at, fresh_keys)
+            positions = np.insert(positions, at, fresh_rows)
+        return VinIndex(keys, positions)
+
+    @classmethod
+    def open(cls, csv_path: str, version: int) -> Optional["Dataset"]:
+        """
+        Memory-map a published generation if it still matches the CSV.
+
+        Returns:
+            Optional[Dataset]: the mapped snapshot, or None if the generation
+            is missing, from another format, or built from a different CSV.
+        """
+        rows_path, keys_path, positions_path = generation_paths(csv_path, version)
+        try:
+            reader = pa.ipc.open_file(pa.memory_map(rows_path, "r"))
+            meta = reader.schema.metadata or {}
+            if meta.get(b"format") != GENERATION_FORMAT.encode() or not matches_csv(meta, os.stat(csv_path), csv_path):
+                return None
+            table = reader.read_all()
+            keys = np.load(keys_path, mmap_mode="r")
+            positions = np.load(positions_path, mmap_mode="r")
+        except (OSError, ValueError, pa.ArrowInvalid):
+            return None
+
+        score_columns = [c for c in table.column_names if c.startswith(SCORE_PREFIX)]
+        row_columns = [c for c in table.column_names if c not in score_columns and c != HASH_COLUMN]
+        scores = table.select(score_columns).rename_columns([c[len(SCORE_PREFIX):] for c in score_columns])
+        hashes = table.column(HASH_COLUMN).to_numpy()
+        return cls(table.select(row_columns), scores, hashes, VinIndex(keys, positions), csv_path, version)
+
+    def publish(self, csv_stat: os.stat_result) -> None:
+        """
+        Write this snapshot as generation `self.version` of its CSV (atomically,
+        via temp files), fingerprinted with the CSV it was loaded from.
+        """
+        table = self.table
+        for name in self.score_table.column_names:
+            table = table.append_column(SCORE_PREFIX + name, self.score_table.column(name))
+        table = table.append_column(HASH_COLUMN, pa.array(self.hashes, type=pa.uint64()))
+        table = table.replace_schema_metadata({
+            "format": GENERATION_FORMAT,
+            "version": str(self.version),
+            **csv_fingerprint(csv_stat, self.source),
+        })
+
+        rows_path, keys_path, positions_path = generation_paths(self.source, self.version)
+        tmp = f".{os.getpid()}.tmp"
+        with pa.OSFile(rows_path + tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(keys_path + tmp, "wb") as f:
+            np.save(f, np.asarray(self.vin_index.keys))
+        with open(positions_path + tmp, "wb") as f:
+            np.save(f, np.asarray(self.vin_index.positions))
+        for path in (keys_path, positions_path, rows_path):
+            os.replace(path + tmp, path)
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        """Rows as a DataFrame (Arrow-backed, zero-copy over the table)."""
+        import pandas as pd
+
+        return self.table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    @cached_property
+    def scores(self) -> pd.DataFrame:
+        """Precomputed scores as a DataFrame (Arrow-backed, zero-copy over the table)."""
+        import pandas as pd
+
+        return self.score_table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def lookup(self, vin: str) -> Optional[int]:
+        """Row position of a VIN (normalized before lookup), or None."""
+        return self.vin_index.get(normalize_vin(vin))
+
+    @cached_property
+    def _columns(self) -> Tuple[Tuple[str, ...], List[pa.Array], List[pa.Array]]:
+        """Column names, row columns and score columns (in `Vehicle.SCORE_FIELDS` order) as flat arrays."""
+        def flat(column: pa.ChunkedArray) -> pa.Array:
+            return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+        return (
+            tuple(self.table.column_names),
+            [flat(column) for column in self.table.columns],
+            [flat(self.score_table.column(name)) for name in Vehicle.SCORE_FIELDS],
+        )
+
+    def vehicle(self, pos: int) -> Vehicle:
+        """`Vehicle` record (row values + precomputed scores) for a row position."""
+        fields, columns, score_columns = self._columns
+        return Vehicle(
+            fields,
+            tuple(column[pos].as_py() for column in columns),
+            [column[pos].as_py() for column in score_columns],
+        )
+
+    def vehicles(self, start: int, stop: int) -> List[Vehicle]:
+        """`Vehicle` records for the row range [start, stop), read one column slice at a time (bulk readers)."""
+        fields, columns, score_columns = self._columns
+        rows = zip(*(column.slice(start, stop - start).to_pylist() for column in columns))
+        scores = zip(*(column.slice(start, stop - start).to_pylist() for column in score_columns))
+        return [Vehicle(fields, values, list(row_scores)) for values, row_scores in zip(rows, scores)]
+
+
+class Inventory:
+    """
+    Holds the current `Dataset` and swaps in reloaded snapshots atomically.
+
+    Snapshots are published as memory-mapped generation files next to the CSV
+    (`<name>.gen-NNNNNN.arrow` plus the VIN index arrays) and a `<name>.current`
+    pointer. The first worker process to start (or reload) builds and publishes
+    a generation under a file lock; every other worker maps the same files, so
+    per-worker memory stays flat as workers are added. If the data directory is
+    read-only the snapshot is kept in memory instead.
+
+    A reload builds the new snapshot next to the current one and diffs it by
+    VIN and row hash: rows whose content is unchanged reuse their scores, only
+    changed rows are rescored, and only the cached LLM results of changed or
+    removed VINs are invalidated. The swap itself is a single reference
+    assignment, so readers see either the old or the new snapshot, never a mix.
+
+    Nothing is read when the inventory is created: the first snapshot is
+    mapped (or built) by `load`, or by the first access to `current`.
+    """
+
+    def __init__(self, path: str, cache: Optional[LLMCache] = None):
+        self.path = path
+        self.cache = cache
+        self.last_reload: Optional[Dict[str, Any]] = None
+        self._current: Optional[Dataset] = None
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[Dataset], None]] = []
+
+    @property
+    def current(self) -> Dataset:
+        """The current snapshot (loaded on first access)."""
+        return self._current if self._current is not None else self.load()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the first snapshot is loaded."""
+        return self._current is not None
+
+    def load(self) -> Dataset:
+        """
+        Load the first snapshot if that hasn't happened yet: map the published
+        generation, or build and publish one from the file.
+
+        Returns:
+            Dataset: The current snapshot.
+
+        Raises:
+            OSError: If the inventory file cannot be read.
+        """
+        with self._reload_lock:
+            if self._current is None:
+                with _publish_lock(self.path):
+                    pointer = self._read_pointer()
+                    current = Dataset.open(self.path, pointer["version"]) if pointer else None
+                    if current is None:
+                        csv_stat = os.stat(self.path)
+                        version = (pointer or {}).get("version", 0) + 1
+                        current = self._publish(Dataset.load(self.path, version=version), csv_stat)
+                self._current = current
+            return self._current
+
+    def subscribe(self, callback: Callable[[Dataset], None]) -> None:
+        """
+        Call `callback(dataset)` with every reloaded snapshot before it becomes
+        current, e.g. to precompute data derived from it. Errors are logged and
+        do not block the swap.
+        """
+        self._listeners.append(callback)
+
+    def _swap(self, dataset: Dataset) -> None:
+        """Run the listeners on `dataset`, then make it the current snapshot."""
+        for callback in self._listeners:
+            try:
+                callback(dataset)
+            except Exception as e:
+                logger.warning("Inventory listener failed on version %d: %s", dataset.version, e)
+        self._current = dataset
+
+    def _read_pointer(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(_pointer_path(self.path)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _publish(self, dataset: Dataset, csv_stat: os.stat_result, report: Optional[Dict] = None) -> Dataset:
+        """Publish a snapshot as the current generation and return it memory-mapped (lock held)."""
+        try:
+            dataset.publish(csv_stat)
+            pointer = _pointer_path(self.path)
+            with open(f"{pointer}.{os.getpid()}.tmp", "w") as f:
+                json.dump({"version": dataset.version, "reload": report}, f)
+            os.replace(f"{pointer}.{os.getpid()}.tmp", pointer)
+        except OSError as e:
+            logger.warning("Could not publish inventory generation %d, keeping it in memory: %s", dataset.version, e)
+            return dataset
+
+        self._remove_old_generations(dataset.version)
+        return Dataset.open(self.path, dataset.version) or dataset
+
+    def _remove_old_generations(self, version: int) -> None:
+        """Delete generations older than the previous one (mapped files stay readable until unmapped)."""
+        base = os.path.splitext(self.path)[0]
+        for path in glob.glob(glob.escape(base) + ".gen-*"):
+            match = re.search(r"\.gen-(\d+)\.", path)
+            if match and int(match.group(1)) < version - 1:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        Reload the inventory file and swap in the new snapshot.
+
+        If another worker process already published a generation for the
+        current file, that generation is mapped instead of being rebuilt.
+
+        Returns:
+            Dict: snapshot version, row count and the VIN diff (added, changed,
+            removed), rows rescored, cache entries invalidated and duration.
+        """
+        import pandas as pd
+
+        self.load()
+        with self._reload_lock, _publish_lock(self.path):
+            start = time.perf_counter()
+            old = self._current
+
+            pointer = self._read_pointer()
+            if pointer and pointer["version"] > old.version:
+                published = Dataset.open(self.path, pointer["version"])
+                if published is not None:
+                    self._swap(published)
+                    self.last_reload = {**(pointer.get("reload") or {}), "version": published.version, "rows": len(published)}
+                    logger.info("Inventory generation %d mapped", published.version)
+                    return self.last_reload
+
+            csv_stat = os.stat(self.path)
+            df = load_inventory(self.path)
+
+            # Rows whose content already existed are reused (table rows, scores, index entries); the rest is rebuilt
+            version = max(old.version, (pointer or {}).get("version", 0)) + 1
+            dataset, matched = old.patch(df, version)
+
+            # Diff by VIN: new or different row hash → changed; VIN gone → removed
+            old_by_vin = pd.Series(old.hashes[old.vin_index.positions], index=old.vin_index.keys)
+            new_by_vin = pd.Series(dataset.hashes[dataset.vin_index.positions], index=dataset.vin_index.keys)
+            common = new_by_vin.index.intersection(old_by_vin.index)
+            added = new_by_vin.index.difference(old_by_vin.index)
+            changed = common[old_by_vin[common].to_numpy() != new_by_vin[common].to_numpy()]
+            removed = old_by_vin.index.difference(new_by_vin.index)
+
+            report = {
+                "version": version,
+                "rows": len(df),
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "rescored": int((matched < 0).sum()),
+            }
+            published = self._publish(dataset, csv_stat, report)
+            if dataset.vin_index is old.vin_index:
+                published.vin_index = old.vin_index  # same VINs on the same rows: keep serving the mapped index
+            self._swap(published)
+
+            invalidated = 0
+            stale = changed.append(removed)
+            if self.cache is not None and len(stale):
+                old_rows = pd.Series(old.vin_index.positions, index=old.vin_index.keys)[stale]
+                stale_vins = old.table.column("VIN").take(pa.array(old_rows.to_numpy())).to_pylist()
+                invalidated = self.cache.invalidate_vins(str(vin) for vin in stale_vins)
+
+            self.last_reload = {**report, "invalidated": invalidated, "seconds": round(time.perf_counter() - start, 3)}
+            logger.info("Inventory reloaded: %s", self.last_reload)
+            return self.last_reload
+
+
+class InventoryWatcher(FileSystemEventHandler):
+    """
+    Reloads an `Inventory` when its file changes on disk.
+
+    Bursts of events (editors and feeds often write a file in several steps,
+    or write a temp file and rename it) are debounced into one reload. A
+    failed reload is logged and the current snapshot stays in place.
+    """
+
+    def __init__(self, inventory: Inventory, debounce_seconds: float = INVENTORY_RELOAD_DEBOUNCE_SECONDS):
+        self.inventory = inventory
+        self.debounce_seconds = debounce_seconds
+        self._path = os.path.abspath(inventory.path)
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._observer = Observer()
+
+    def start(self) -> None:
+        self._observer.schedule(self, os.path.dirname(self._path) or ".", recursive=False)
+        self._observer.start()
+
+    def stop(self) -> None:
+        self._observer.stop()
+        self._observer.join()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        paths = {os.path.abspath(event.src_path), os.path.abspath(getattr(event, "dest_path", "") or event.src_path)}
+        if event.is_directory or self._path not in paths or event.event_type in ("opened", "closed_no_write", "deleted"):
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce_seconds, self._reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _reload(self) -> None:
+        try:
+            self.inventory.reload()
+        except Exception as e:
+            logger.error("Inventory reload failed, keeping version %d: %s", self.inventory.current.version, e)
@@ -0,0 +1,222 @@
+"""
+Bulk export of the scored inventory as NDJSON, CSV or Parquet.
+
+Every vehicle is written with its summary, risk score and reasoning: the cached
+LLM summary if there is one, otherwise the deterministic summary (an export
+never makes LLM calls). Rows are built in chunks of EXPORT_CHUNK_ROWS and each
+chunk is encoded and handed out before the next one is built, so memory stays
+bounded by the chunk size however large the inventory is. NDJSON and CSV are
+streamed a chunk at a time; Parquet is written one row group per chunk.
+
+Usage (from the AutoInsight directory):
+    python -m app.export --format parquet --out inventory.parquet
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import app.llm as llm
+from app.cache import cache_key
+from app.comparables import with_market_context
+from app.dataset import INVENTORY_CSV, Dataset, Inventory
+from app.log import logger
+from app.models import Vehicle
+from app.utils import deterministic_summary
+
+# --- ENVIRONMENT ---
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))  # Rows per streamed chunk / Parquet row group
+
+# Output formats and their media types
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Columns of every exported record (the Parquet schema doubles as the column order)
+EXPORT_SCHEMA = pa.schema([
+    ("vin", pa.string()),
+    ("year", pa.int64()),
+    ("make", pa.string()),
+    ("model", pa.string()),
+    ("risk_score", pa.float64()),
+    ("days_on_lot", pa.float64()),
+    ("price_to_market", pa.float64()),
+    ("mileage", pa.float64()),
+    ("source", pa.string()),
+    ("summary", pa.string()),
+    ("reasoning", pa.list_(pa.string())),
+])
+
+
+def export_record(vehicle: Vehicle, use_llm_cache: bool = True) -> Dict[str, Any]:
+    """
+    Flat export record for one vehicle.
+
+    Args:
+        vehicle: Inventory record with its precomputed scores.
+        use_llm_cache: Prefer a cached LLM summary (source "cache") over the
+            deterministic one (source "fallback").
+
+    Returns:
+        Dict: One value per EXPORT_SCHEMA column.
+    """
+    result = llm.llm_cache.peek(cache_key(vehicle, llm.OPENAI_MODEL)) if use_llm_cache else None
+    source = "cache"
+    if result is None:
+        result, source = deterministic_summary(vehicle), "fallback"
+
+    reasoning = result.get("reasoning") or []
+    return {
+        "vin": vehicle.get("VIN"),
+        "year": vehicle.year,
+        "make": vehicle.get("Make"),
+        "model": vehicle.get("Model"),
+        "risk_score": float(result["risk_score"]),
+        "days_on_lot": vehicle.days_on_lot,
+        "price_to_market": vehicle.price_to_market,
+        "mileage": vehicle.mileage,
+        "source": source,
+        "summary": result.get("summary"),
+        "reasoning": [reasoning] if isinstance(reasoning, str) else [str(line) for line in reasoning],
+    }
+
+
+def iter_record_chunks(
+    dataset: Dataset, chunk_rows: int = EXPORT_CHUNK_ROWS, use_llm_cache: bool = True
+) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the export records of `dataset` in row order, `chunk_rows` at a time."""
+    chunk_rows = max(1, chunk_rows)
+    # Skip the per-row cache key entirely when there is nothing cached to find
+    stats = llm.llm_cache.stats()
+    use_llm_cache = use_llm_cache and bool(stats["size"] or stats["disk_enabled"])
+
+    for start in range(0, len(dataset), chunk_rows):
+        stop = min(start + chunk_rows, len(dataset))
+        yield [
+            export_record(with_market_context(dataset, pos, vehicle), use_llm_cache)
+            for pos, vehicle in enumerate(dataset.vehicles(start, stop), start)
+        ]
+
+
+def _ndjson(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield "".join(json.dumps(record) + "\n" for record in chunk).encode()
+
+
+def _csv(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """CSV with a header row; `reasoning` is a JSON-encoded list."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_SCHEMA.names)
+    for chunk in chunks:
+        writer.writerows(
+            [record[name] if name != "reasoning" else json.dumps(record[name]) for name in EXPORT_SCHEMA.names]
+            for record in chunk
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting bytes until `drain` hands them out."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _parquet(chunks: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Parquet file written one row group per chunk; the footer comes with the last bytes."""
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pylist(chunk, schema=EXPORT_SCHEMA))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_ENCODERS = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}
+
+
+def export_inventory(
+    dataset: Dataset, fmt: str = "ndjson", chunk_rows: int = EXPORT_CHUNK_ROWS, use_llm_cache: bool = True
+) -> Iterator[bytes]:
+    """
+    Stream the whole inventory snapshot in the given format.
+
+    Args:
+        dataset: Snapshot to export (kept for the whole export, even if a reload happens).
+        fmt: "ndjson", "csv" or "parquet".
+        chunk_rows: Rows per chunk (and per Parquet row group).
+        use_llm_cache: Prefer cached LLM summaries over the deterministic ones.
+
+    Returns:
+        Iterator[bytes]: Encoded chunks, to be written out in order.
+
+    Raises:
+        ValueError: If `fmt` is not a supported format.
+    """
+    if fmt not in _ENCODERS:
+        raise ValueError(f"Unsupported export format {fmt!r} (expected one of {', '.join(EXPORT_FORMATS)})")
+    return _ENCODERS[fmt](iter_record_chunks(dataset, chunk_rows, use_llm_cache))
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export every vehicle with its summary, risk score and reasoning")
+    parser.add_argument("--csv", default=INVENTORY_CSV)
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), help="Output format (default: from --out, else ndjson)")
+    parser.add_argument("--out", default="-", help="Output file ('-' = stdout)")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always export the deterministic summaries")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.out)[1].lstrip(".").lower()
+    if fmt not in EXPORT_FORMATS:
+        fmt = "ndjson"
+
+    dataset = Inventory(args.csv).current
+    start = time.perf_counter()
+    chunks = export_inventory(dataset, fmt, args.chunk_rows, use_llm_cache=not args.no_llm_cache)
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    logger.info("Exported %d rows as %s in %.1fs", len(dataset), fmt, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,81 @@
 import os
 import json
 import re
-from typing import Dict, Optional
-from dotenv import load_dotenv
-from openai import OpenAI
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
-from app.utils import deterministic_summary
-from app.prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+from app.utils import deterministic_summary, normalize_vin
+from app.batching import MicroBatcher
+from app.cache import cache_key, llm_cache
+from app.singleflight import SingleFlight
+from app.resilience import LLM_BACKGROUND_COMPLETE, LLM_DEADLINE_SECONDS, llm_breaker
+from app.admission import llm_admission
+from app.streaming import IncrementalJSONParser
+from app.metrics import LLM_PARSE_SECONDS, PARSE_FAILURES_TOTAL, STAGE_SECONDS, record_usage, timed
+from app.log import log_raw_output, logger
+from app.prompts import BATCH_SYSTEM_PROMPT, BATCH_USER_PROMPT_TEMPLATE, SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
+from app.models import LLMSummary, as_row_dict, llm_output_format, row_json
 
 # --- ENVIRONMENT ---
-load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-mini")  # Default to nano
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # Parallel LLM calls per batch
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "200"))  # Pooled HTTP connections
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))  # Vehicles per LLM call (1 = no micro-batching)
+LLM_BATCH_WINDOW_MS = float(os.getenv("LLM_BATCH_WINDOW_MS", "25"))  # How long a micro-batch waits to fill
+# Constrain the LLM output to the VINResponse JSON schema (structured outputs) instead of free-form JSON text
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "false").lower() in ("1", "true", "yes")
 
-client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+# OpenAI client (None without an API key). It is created on startup or on the
+# first LLM call rather than at import, since importing openai is slow.
+async_client: Any = None  # shares one pooled HTTP connection pool across all requests
+_clients_lock = threading.Lock()
+
+# Coalesces concurrent LLM calls for the same cache key (same vehicle data + prompts + model)
+inflight = SingleFlight()
 
 # --- HELPERS ---
+def _async_client() -> Any:
+    """The async OpenAI client, created on first use (None without an API key)."""
+    global async_client
+    if async_client is None and OPENAI_API_KEY:
+        with _clients_lock:
+            if async_client is None:
+                import httpx
+                from openai import AsyncOpenAI
+
+                async_client = AsyncOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(
+                            max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                        ),
+                        timeout=httpx.Timeout(600.0, connect=5.0),
+                    ),
+                )
+    return async_client
+
+
+def init_clients() -> bool:
+    """
+    Create the OpenAI client now instead of on the first LLM call.
+
+    Returns:
+        bool: True if the LLM path is enabled (an API key is set).
+    """
+    return _async_client() is not None
+
+
+def clients_ready() -> bool:
+    """True once the OpenAI client exists, or if there is no API key (deterministic fallback only)."""
+    return not OPENAI_API_KEY or async_client is not None
+
+
 def extract_json(text: str) -> Optional[dict]:
     """Extract JSON object from LLM response, ignoring markdown fences."""
     try:
@@ -32,36 +92,49 @@ def extract_json(text: str) -> Optional[dict]:
         except Exception:
             return None
 
-def generate_vin_summary(vehicle: Dict) -> Dict:
+# USER_PROMPT_TEMPLATE split around {vehicle_json}, so a prompt is a concatenation instead of a template parse
+_USER_PROMPT_HEAD, _USER_PROMPT_TAIL = USER_PROMPT_TEMPLATE.format(vehicle_json="\0").split("\0")
+
+
+def build_llm_input(vehicle: Mapping[str, Any]) -> List[Dict[str, str]]:
+    """Build the Responses API input messages for one vehicle."""
+    with timed("prompt_build"):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _USER_PROMPT_HEAD + row_json(vehicle) + _USER_PROMPT_TAIL},
+        ]
+
+
+def response_options() -> Dict[str, Any]:
+    """Extra Responses API arguments for the configured output mode (the JSON schema in structured mode)."""
+    return {"text": {"format": llm_output_format()}} if LLM_STRUCTURED_OUTPUT else {}
+
+
+def fallback_summary(
+    vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None, source: str = "fallback"
+) -> Dict:
     """
-    Generate VIN summary using GPT-5 Nano (via Responses API).
-    Falls back to deterministic scoring if:
-      - API key missing
-      - LLM call fails
-      - JSON parsing fails
+    Deterministic summary tagged with the path that served it:
+    "fallback" (no key / error / bad output), "timeout" (deadline missed),
+    "circuit_open" (LLM skipped by the circuit breaker) or "shed" (turned
+    away by admission control).
     """
-    if not OPENAI_API_KEY or client is None:
-        print("⚠️ Fallback: No API key or client initialized")
-        result = deterministic_summary(vehicle)
-        result["source"] = "fallback"
-        return result
-
-    try:
-        resp = client.responses.create(
-            model=OPENAI_MODEL,
-            input=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": USER_PROMPT_TEMPLATE.format(vehicle_json=json.dumps(vehicle))},
-            ],
-        )
+    with timed("fallback"):
+        result = deterministic_summary(vehicle, scores)
+    result["source"] = source
+    return result
 
-        # Extract generated text
-        text = resp.output_text.strip() if resp.output_text else ""
-        print("LLM raw output:", text)
 
-        parsed = extract_json(text)
+def validate_summary(parsed: Any, vehicle: Mapping[str, Any]) -> Optional[Dict]:
+    """
+    Validate and normalize one parsed LLM summary for `vehicle`.
 
-        if parsed and all(k in parsed for k in ["summary", "risk_score", "reasoning"]):
+    Returns:
+        Optional[Dict]: The summary tagged with source "llm", or None if it is
+        not an object with the required keys.
+    """
+    if isinstance(parsed, dict) and all(k in parsed for k in ["summary", "risk_score", "reasoning"]):
+        with timed("validate"):
             try:
                 parsed["risk_score"] = max(1.0, min(10.0, float(parsed["risk_score"])))
 
@@ -79,15 +152,375 @@ def generate_vin_summary(vehicle: Dict) -> Dict:
             parsed["vin"] = vehicle.get("VIN", "")
             parsed["source"] = "llm"
 
-            return parsed
+        return parsed
+    return None
+
+
+def parse_structured_output(text: str, vehicle: Mapping[str, Any]) -> Optional[Dict]:
+    """
+    Validate a structured-output response against LLMSummary in one pass.
+
+    Returns:
+        Optional[Dict]: The summary tagged with source "llm", or None if the
+        text is not valid JSON matching the schema.
+    """
+    with timed("validate"):
+        try:
+            parsed = LLMSummary.model_validate_json(text).model_dump()
+        except ValidationError:
+            return None
+    parsed["vin"] = vehicle.get("VIN", "")
+    parsed["source"] = "llm"
+    return parsed
+
+
+def parse_llm_output(text: str, vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None) -> Dict:
+    """
+    Turn raw LLM output into a summary dict, or fall back to deterministic scoring
+    if the JSON is missing or lacks the required keys.
+
+    With LLM_STRUCTURED_OUTPUT the output is validated against the schema it was
+    constrained to; otherwise the JSON is extracted from free-form text first.
+    """
+    mode = "structured" if LLM_STRUCTURED_OUTPUT else "text"
+    start = time.perf_counter()
+    if LLM_STRUCTURED_OUTPUT:
+        result = parse_structured_output(text, vehicle)
+    else:
+        with timed("json_extract"):
+            parsed = extract_json(text)
+        result = validate_summary(parsed, vehicle)
+    LLM_PARSE_SECONDS.observe(time.perf_counter() - start, mode=mode)
+
+    if result is not None:
+        return result
+
+    PARSE_FAILURES_TOTAL.inc(mode=mode)
+    logger.warning("Fallback: Missing or invalid keys in LLM response")
+    return fallback_summary(vehicle, scores)
+
+
+def build_batch_llm_input(vehicles: Sequence[Mapping[str, Any]]) -> List[Dict[str, str]]:
+    """Build the Responses API input messages for several vehicles in one call."""
+    with timed("prompt_build"):
+        vehicles_json = json.dumps([as_row_dict(vehicle) for vehicle in vehicles])
+        return [
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": BATCH_USER_PROMPT_TEMPLATE.format(vehicles_json=vehicles_json)},
+        ]
+
+
+def parse_batch_llm_output(
+    text: str, vehicles: Sequence[Tuple[Mapping[str, Any], Optional[Mapping[str, Any]]]]
+) -> List[Dict]:
+    """
+    Split a multi-vehicle LLM answer (JSON array of summaries keyed by "vin")
+    into one validated summary per vehicle, in order.
+
+    A vehicle whose entry is missing or malformed gets the deterministic
+    fallback, without affecting the other vehicles of the batch.
+    """
+    start = time.perf_counter()
+    with timed("json_extract"):
+        try:
+            match = re.search(r"```(?:json)?\n(.+?)```", text, re.S)
+            parsed = json.loads(match.group(1) if match else text)
+        except Exception:
+            try:
+                parsed = json.loads(text[text.index("["): text.rindex("]") + 1])
+            except Exception:
+                parsed = None
+        entries = parsed if isinstance(parsed, list) else []
+        by_vin = {normalize_vin(entry.get("vin")): entry for entry in entries if isinstance(entry, dict)}
+
+    results = []
+    for vehicle, scores in vehicles:
+        result = validate_summary(by_vin.get(normalize_vin(vehicle.get("VIN", ""))), vehicle)
+        if result is None:
+            PARSE_FAILURES_TOTAL.inc(mode="batch")
+            logger.warning("Fallback: Missing or invalid batch entry for VIN %s", vehicle.get("VIN", ""))
+            result = fallback_summary(vehicle, scores)
+        results.append(result)
+    LLM_PARSE_SECONDS.observe(time.perf_counter() - start, mode="batch")
+    return results
+
+
+async def acached_summary(key: str) -> Optional[Dict]:
+    """
+    Return a cached LLM summary tagged with source "cache", or None.
+
+    Memory hits are served inline; the SQLite tier is read in the threadpool.
+    """
+    cached = llm_cache.get(key, disk=False)
+    if cached is None and llm_cache.disk_enabled:
+        cached = await run_in_threadpool(llm_cache.get, key)
+    if cached is not None:
+        cached["source"] = "cache"
+    return cached
+
+
+def store_summary(key: str, result: Dict) -> Dict:
+    """Cache successful LLM summaries (fallbacks are never cached) and return `result`."""
+    if result.get("source") == "llm":
+        llm_cache.set(key, result)
+    return result
+
+
+async def agenerate_vin_summary(
+    vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None, priority: str = "interactive"
+) -> Dict:
+    """
+    Generate VIN summary using GPT-5 Nano (via Responses API, `AsyncOpenAI`).
+    Falls back to deterministic scoring if:
+      - API key missing
+      - LLM call fails
+      - JSON parsing fails
+
+    `scores` is the vehicle's precomputed row from `score_inventory`; the
+    fallback uses it instead of re-parsing the vehicle fields. It is not needed
+    when `vehicle` is a `Vehicle` record, which carries its scores.
+
+    The request awaits the LLM round trip on the event loop instead of holding
+    a worker thread, and all calls share one pooled HTTP connection pool.
+
+    Results are cached on a hash of the vehicle data, prompts and model, so an
+    unchanged vehicle is only sent to the LLM once per cache TTL. Concurrent
+    calls for the same key are coalesced into a single upstream call.
+
+    Each call has a latency budget (LLM_DEADLINE_SECONDS); a miss returns the
+    deterministic result with source "timeout". After repeated failures the
+    circuit breaker skips the LLM (source "circuit_open") until a probe succeeds.
+
+    LLM calls also go through admission control (see app.admission) with the
+    given `priority` ("interactive" or "batch"): when the queue is full or the
+    wait would exceed its budget, the deterministic result is returned straight
+    away with source "shed".
+    """
+    if not OPENAI_API_KEY or _async_client() is None:
+        logger.warning("Fallback: No API key or client initialized")
+        return fallback_summary(vehicle, scores)
+
+    key = cache_key(vehicle, OPENAI_MODEL)
+    cached = await acached_summary(key)
+    if cached is not None:
+        return cached
+
+    # Concurrent requests for the same vehicle share one upstream call
+    return dict(await inflight.ado(key, lambda: _acomplete(key, vehicle, scores, priority)))
+
+
+async def _acall_llm(key: str, vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]]) -> Dict:
+    """Call the LLM (async client), parse the output and cache it. Upstream errors propagate."""
+    messages = build_llm_input(vehicle)
+    with timed("llm_call"):
+        resp = await async_client.responses.create(model=OPENAI_MODEL, input=messages, **response_options())
+    record_usage(getattr(resp, "usage", None))
+
+    # Extract generated text
+    text = resp.output_text.strip() if resp.output_text else ""
+    log_raw_output(text)
 
-        print("⚠️ Fallback: Missing or invalid keys in LLM response")
-        fallback = deterministic_summary(vehicle)
-        fallback["source"] = "fallback"
-        return fallback
+    return store_summary(key, parse_llm_output(text, vehicle, scores))
+
+
+async def _acall_llm_batch(
+    items: List[Tuple[str, Mapping[str, Any], Optional[Mapping[str, Any]]]]
+) -> List[Dict]:
+    """
+    Call the LLM once for a micro-batch of (cache key, vehicle, scores) items,
+    split the answer per vehicle and cache each successful summary.
+    Upstream errors propagate to every item of the batch. Batched calls always
+    use free-form JSON text (LLM_STRUCTURED_OUTPUT applies to single calls).
+    """
+    if len(items) == 1:
+        return [await _acall_llm(*items[0])]
+
+    messages = build_batch_llm_input([vehicle for _, vehicle, _ in items])
+    with timed("llm_batch_call"):
+        resp = await async_client.responses.create(model=OPENAI_MODEL, input=messages)
+    record_usage(getattr(resp, "usage", None))
+
+    text = resp.output_text.strip() if resp.output_text else ""
+    log_raw_output(text)
+
+    results = parse_batch_llm_output(text, [(vehicle, scores) for _, vehicle, scores in items])
+    return [store_summary(key, result) for (key, _, _), result in zip(items, results)]
+
+
+# Collects concurrent async LLM calls into multi-vehicle calls (enabled when LLM_BATCH_SIZE > 1)
+llm_batcher = MicroBatcher(_acall_llm_batch, LLM_BATCH_SIZE, LLM_BATCH_WINDOW_MS / 1000.0)
+
+
+async def _acomplete(
+    key: str, vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]], priority: str = "interactive"
+) -> Dict:
+    """
+    Call the LLM within LLM_DEADLINE_SECONDS, after admission control (the slot
+    is held until the call is done, including a call left to complete in the
+    background with LLM_BACKGROUND_COMPLETE).
+
+    Admission counts vehicles: with micro-batching, each vehicle of a batch
+    holds its own slot and rate token for the duration of the shared call.
+    """
+    if not await llm_admission.acquire(priority):
+        return fallback_summary(vehicle, scores, source="shed")
+
+    # Skip the LLM entirely while the circuit breaker is open (checked once admitted,
+    # so a half-open probe is never left hanging by a shed request)
+    if not llm_breaker.allow():
+        llm_admission.release()
+        return fallback_summary(vehicle, scores, source="circuit_open")
+    admitted_at = time.monotonic()
+
+    if llm_batcher.max_size > 1:
+        call = asyncio.ensure_future(llm_batcher.submit((key, vehicle, scores)))
+    else:
+        call = asyncio.ensure_future(_acall_llm(key, vehicle, scores))
+    call.add_done_callback(lambda _: llm_admission.release(time.monotonic() - admitted_at))
+    try:
+        result = await asyncio.wait_for(asyncio.shield(call), LLM_DEADLINE_SECONDS)
+
+    except asyncio.TimeoutError:
+        logger.warning("Fallback: LLM missed the %.1fs deadline", LLM_DEADLINE_SECONDS)
+        llm_breaker.record_failure()
+        if LLM_BACKGROUND_COMPLETE:
+            # Let it finish and fill the cache; swallow a late error instead of logging it as unhandled
+            call.add_done_callback(lambda done: done.cancelled() or done.exception())
+        else:
+            call.cancel()
+        return fallback_summary(vehicle, scores, source="timeout")
 
     except Exception as e:
-        print(f"⚠️ Exception during LLM call: {e}")
-        fallback = deterministic_summary(vehicle)
-        fallback["source"] = "fallback"
-        return fallback
+        logger.warning("Exception during LLM call: %s", e)
+        llm_breaker.record_failure()
+        return fallback_summary(vehicle, scores)
+
+    llm_breaker.record_success()
+    return result
+
+
+async def astream_vin_summary(
+    vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None, priority: str = "interactive"
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Stream a VIN summary from the LLM as it is generated.
+
+    Yields (kind, payload) events:
+      - ("delta", str): raw text as each token chunk arrives
+      - ("field", (key, value)): a top-level JSON field as soon as it is
+        complete (e.g. "summary" before "reasoning" has arrived)
+      - ("result", dict): the final validated summary, always last
+
+    Cache hits, a missing API key, an open circuit breaker and a request shed
+    by admission control emit their fields and result straight away. The
+    deadline applies to the first token; a miss or an upstream error ends the
+    stream with the deterministic result.
+    """
+    result: Optional[Dict] = None
+    if not OPENAI_API_KEY or _async_client() is None:
+        result = fallback_summary(vehicle, scores)
+    else:
+        key = cache_key(vehicle, OPENAI_MODEL)
+        result = await acached_summary(key)
+        if result is None and not await llm_admission.acquire(priority):
+            result = fallback_summary(vehicle, scores, source="shed")
+        elif result is None and not llm_breaker.allow():
+            llm_admission.release()
+            result = fallback_summary(vehicle, scores, source="circuit_open")
+
+    if result is not None:
+        for field in ("summary", "risk_score", "reasoning"):
+            yield "field", (field, result[field])
+        yield "result", result
+        return
+
+    parser = IncrementalJSONParser()
+    chunks: List[str] = []
+    stream = None
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first_token_by = started + LLM_DEADLINE_SECONDS
+    try:
+        messages = build_llm_input(vehicle)
+        stream = await asyncio.wait_for(
+            async_client.responses.create(model=OPENAI_MODEL, input=messages, stream=True, **response_options()),
+            LLM_DEADLINE_SECONDS,
+        )
+        events = stream.__aiter__()
+        while True:
+            try:
+                if chunks:
+                    event = await events.__anext__()
+                else:
+                    event = await asyncio.wait_for(events.__anext__(), max(0.0, first_token_by - loop.time()))
+            except StopAsyncIteration:
+                break
+
+            if event.type == "response.output_text.delta":
+                chunks.append(event.delta)
+                yield "delta", event.delta
+                for field in parser.feed(event.delta):
+                    yield "field", field
+            elif event.type == "response.completed":
+                record_usage(getattr(getattr(event, "response", None), "usage", None))
+            elif event.type in ("response.failed", "error"):
+                raise RuntimeError(f"LLM stream failed: {event.type}")
+
+    except asyncio.TimeoutError:
+        logger.warning("Fallback: LLM missed the %.1fs first-token deadline", LLM_DEADLINE_SECONDS)
+        llm_breaker.record_failure()
+        result = fallback_summary(vehicle, scores, source="timeout")
+
+    except Exception as e:
+        logger.warning("Exception during LLM stream: %s", e)
+        llm_breaker.record_failure()
+        result = fallback_summary(vehicle, scores)
+
+    else:
+        llm_breaker.record_success()
+        STAGE_SECONDS.observe(loop.time() - started, stage="llm_call")
+        text = "".join(chunks).strip()
+        log_raw_output(text)
+        result = store_summary(key, parse_llm_output(text, vehicle, scores))
+
+    finally:
+        llm_admission.release(loop.time() - started)
+        if stream is not None and hasattr(stream, "close"):
+            await stream.close()
+
+    yield "result", result
+
+
+async def agenerate_vin_summaries(
+    vehicles: Sequence[Tuple[Mapping[str, Any], Optional[Mapping[str, Any]]]],
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    priority: str = "interactive",
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Generate summaries for several vehicles with bounded concurrency.
+
+    Each vehicle goes through `agenerate_vin_summary` (including its fallback),
+    with at most `max_concurrency` LLM calls in flight at once.
+
+    Args:
+        vehicles: (vehicle, scores) pairs, as accepted by `agenerate_vin_summary`.
+        max_concurrency: Maximum number of in-flight LLM calls.
+        priority: Admission priority of the calls ("interactive" or "batch").
+
+    Yields:
+        Tuple[int, Dict]: (position in `vehicles`, summary) in completion order.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(i: int, vehicle: Mapping[str, Any], scores: Optional[Mapping[str, Any]]) -> Tuple[int, Dict]:
+        async with semaphore:
+            return i, await agenerate_vin_summary(vehicle, scores, priority)
+
+    tasks = [asyncio.create_task(run(i, v, s)) for i, (v, s) in enumerate(vehicles)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Cancel outstanding calls if the consumer stopped early (e.g. client disconnected)
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,44 @@
+import os
+import sys
+import queue
+import random
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# --- ENVIRONMENT ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LLM_RAW_LOG_SAMPLE_RATE = float(os.getenv("LLM_RAW_LOG_SAMPLE_RATE", "0.0"))  # Fraction of raw outputs logged
+
+
+def _build_logger() -> logging.Logger:
+    """
+    Create the "autoinsight" logger.
+
+    Records are put on an in-memory queue by the request path and written to
+    stdout by a background listener thread, so logging never blocks a request
+    on terminal or pipe I/O.
+    """
+    log = logging.getLogger("autoinsight")
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    listener = QueueListener(records, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    log.addHandler(QueueHandler(records))
+    return log
+
+
+logger = _build_logger()
+
+
+def log_raw_output(text: str) -> None:
+    """Log raw LLM output for a sampled fraction of calls (LLM_RAW_LOG_SAMPLE_RATE)."""
+    if LLM_RAW_LOG_SAMPLE_RATE > 0 and random.random() < LLM_RAW_LOG_SAMPLE_RATE:
+        logger.info("LLM raw output: %s", text)
@@ -1,19 +1,191 @@
-from fastapi import FastAPI, HTTPException
-from app.models import VINRequest, VINResponse
-from app.utils import load_csv, deterministic_summary
-from app.llm import generate_vin_summary
-from dotenv import load_dotenv
+from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from app.models import VINRequest, VINResponse, VINBatchRequest, VINBatchItem, VINBatchResponse, Vehicle
+from app.models import PortfolioDistributionResponse, PortfolioGroupsResponse, PortfolioTopRiskResponse
+from app.models import ComparablesRequest, ComparablesResponse, StoredResultsResponse, WhatIfRequest, WhatIfResponse
+from app.models import VINMatch, VINSearchResponse
+from app.utils import normalize_vin
+from app.vin import prefix_error, vin_error
+from app.llm import agenerate_vin_summary, agenerate_vin_summaries, astream_vin_summary, fallback_summary, inflight
+from app.llm import clients_ready, init_clients
+from app.streaming import sse_event
+from app.metrics import Gauge, SUMMARIES_TOTAL, registry, timed
+from app.cache import llm_cache
+from app.resilience import llm_breaker
+from app.admission import llm_admission
+from app.warm import WARM_ON_STARTUP, WarmJob
+from app.dataset import INVENTORY_CSV, INVENTORY_WATCH, Dataset, Inventory, InventoryWatcher
+from app.analytics import PortfolioFilters, portfolio
+from app.comparables import comparables_index, with_market_context
+from app.export import EXPORT_FORMATS, export_inventory
+from app.whatif import sweep, sweep_axis
+import app.store as store
+from app.store import record_result, stored_result, stored_results
+from app.log import logger
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
 import os
+import time
+
+# --- ENVIRONMENT ---
+# Accept connections straight away and load the inventory / create the LLM clients
+# in the background (/ready answers 503 until they are); by default startup waits for them
+FAST_STARTUP = os.getenv("FAST_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Startup progress, reported by /ready
+startup: Dict[str, Any] = {"mode": "fast" if FAST_STARTUP else "eager", "loading": False, "error": None, "seconds": None}
+
+# Background work started once the inventory is loaded (cancelled on shutdown)
+_background: List["asyncio.Future[Any]"] = []
+
+
+def _log_failure(task: "asyncio.Future[Any]") -> None:
+    """Log the exception of a finished background task (cancellation is not a failure)."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background startup task failed: %r", task.exception())
+
+
+def _background_task(awaitable: Any) -> None:
+    """Run `awaitable` in the background, keeping a reference so it is cancelled on shutdown."""
+    task = asyncio.ensure_future(awaitable)
+    task.add_done_callback(_log_failure)
+    _background.append(task)
+
+
+async def _start() -> None:
+    """
+    Load the first inventory snapshot and create the LLM clients (in worker
+    threads). Then, in the background, prepare the snapshot's portfolio
+    analytics arrays and comparables index and, if WARM_ON_STARTUP is set,
+    run the warm job: neither holds up readiness.
+    """
+    started = time.perf_counter()
+    startup["loading"] = True
+    try:
+        await run_in_threadpool(inventory.load)
+        await run_in_threadpool(init_clients)
+    except Exception as e:
+        startup["error"] = f"{type(e).__name__}: {e}"
+        logger.error("Startup failed: %s", startup["error"])
+        if not FAST_STARTUP:
+            raise
+        return
+    finally:
+        startup["loading"] = False
+    startup["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info("Ready in %.2fs (%s startup)", startup["seconds"], startup["mode"])
+
+    _background_task(run_in_threadpool(_prepare, inventory.current))
+    if WARM_ON_STARTUP:
+        _background_task(_warm_job().run())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Load the inventory and create the LLM clients (see `_start`): before the
+    server accepts connections, or with FAST_STARTUP in the background while
+    it already answers `/` and `/ready`. Also start the inventory file watcher
+    (INVENTORY_WATCH).
+    """
+    startup["loading"] = True
+    task = asyncio.create_task(_start())
+    if not FAST_STARTUP:
+        await task
+    watcher = InventoryWatcher(inventory) if INVENTORY_WATCH else None
+    if watcher is not None:
+        watcher.start()
+    yield
+    task.cancel()
+    for background in _background:
+        background.cancel()
+    _background.clear()
+    if watcher is not None:
+        watcher.stop()
 
-# Load environment variables (e.g., OpenAI API key) from .env file
-load_dotenv()
 
 # Initialize FastAPI application
-app = FastAPI(title="VIN Summary Service", version="1.0.0")
+app = FastAPI(title="VIN Summary Service", version="1.0.0", lifespan=lifespan)
+
+# Load CSV data once on startup (or on first use), so it's available globally.
+# Numeric columns are typed on load and cached as an Arrow snapshot next to the CSV;
+# the VIN index and the (vectorized) scores are built once per snapshot.
+# Reloads swap in a new snapshot atomically (see app.dataset).
+CSV_PATH = INVENTORY_CSV
+inventory = Inventory(CSV_PATH, cache=llm_cache)
+
+
+def _prepare(dataset: Dataset) -> None:
+    """Build the portfolio analytics arrays and the comparables index of a snapshot."""
+    portfolio(dataset).prepare()
+    comparables_index(dataset)
 
-# Load CSV data once when app starts, so it's available globally
-CSV_PATH = os.path.join("data", "sample_data.csv")
-df = load_csv(CSV_PATH)
+
+# Reloaded snapshots get their derived structures built before they go live
+inventory.subscribe(_prepare)
+
+# Precomputes LLM summaries for every row (run on startup or via `python -m app.warm`)
+warm_job: Optional[WarmJob] = None
+
+
+def _warm_job() -> WarmJob:
+    """The warm job, created over the current snapshot on first use."""
+    global warm_job
+    if warm_job is None:
+        warm_job = WarmJob(_dataset())
+    return warm_job
+
+
+def _dataset() -> Dataset:
+    """
+    The current inventory snapshot.
+
+    Raises:
+        HTTPException: 503 while FAST_STARTUP is still loading the first snapshot.
+    """
+    if startup["loading"] and not inventory.loaded:
+        raise HTTPException(status_code=503, detail="Inventory is still loading", headers={"Retry-After": "1"})
+    return inventory.current
+
+
+def __getattr__(name: str) -> Any:
+    """`df`, `scores` and `vin_index` resolve to the current inventory snapshot."""
+    if name in ("df", "scores", "vin_index"):
+        return getattr(inventory.current, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Scrape-time gauges for the cache, circuit breaker and in-flight LLM calls
+registry.register(Gauge(
+    "autoinsight_llm_cache", "LLM cache counters and size, by stat.",
+    lambda: {(("stat", k),): float(v) for k, v in llm_cache.stats().items() if isinstance(v, (int, float)) and not isinstance(v, bool)},
+))
+registry.register(Gauge(
+    "autoinsight_llm_circuit_open", "1 if the LLM circuit breaker is open or half-open, else 0.",
+    lambda: {(): float(llm_breaker.state != "closed")},
+))
+registry.register(Gauge(
+    "autoinsight_llm_inflight", "LLM calls currently in flight (after coalescing).",
+    lambda: {(): float(inflight.in_flight())},
+))
+registry.register(Gauge(
+    "autoinsight_llm_queue_depth", "LLM requests waiting for admission, by priority.",
+    lambda: {(("priority", priority),): float(depth) for priority, depth in llm_admission.depth().items()},
+))
+registry.register(Gauge(
+    "autoinsight_inventory", "Current inventory snapshot, by stat (version, rows).",
+    lambda: {(("stat", "version"),): float(inventory.current.version), (("stat", "rows"),): float(len(inventory.current))}
+    if inventory.loaded else {},
+))
+
+
+def _served(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Count a served summary by its source and return it unchanged."""
+    SUMMARIES_TOTAL.inc(source=result.get("source") or "unknown")
+    return result
 
 
 @app.get("/")
@@ -27,40 +199,552 @@ def root():
     return {"message": "VIN Summary Service is running!"}
 
 
+@app.get("/ready")
+def ready():
+    """
+    Readiness endpoint.
+
+    Unlike `/` (the process is up), this answers 200 only once the inventory
+    is loaded and the LLM clients exist, so a load balancer or orchestrator
+    can hold traffic back during a FAST_STARTUP load.
+
+    Returns:
+        JSONResponse: 200 or 503, with the startup mode, whether the
+        inventory is loading, its version and row count once loaded, the
+        startup error if any and how long startup took.
+    """
+    is_ready = inventory.loaded and clients_ready()
+    body = {
+        "ready": is_ready,
+        **startup,
+        "version": inventory.current.version if inventory.loaded else None,
+        "rows": len(inventory.current) if inventory.loaded else None,
+    }
+    return JSONResponse(body, status_code=200 if is_ready else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    LLM cache statistics endpoint.
+
+    Returns hit/miss/eviction counters and the current size of the LLM
+    result cache (memory tier, plus whether the SQLite disk tier is enabled).
+    """
+    return llm_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus metrics endpoint.
+
+    Exposes per-stage latency histograms (lookup, row_to_dict, prompt_build,
+    llm_call, json_extract, validate, fallback), summaries by source, LLM
+    parse failures, token usage, and cache / circuit breaker gauges in the
+    Prometheus text format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/llm/status")
+def llm_status():
+    """
+    LLM circuit breaker and admission control status endpoint.
+
+    Returns the breaker state ("closed", "open" or "half_open") and its
+    success/failure/rejection counters, plus the admission control counters,
+    queue depth by priority and current wait estimates under "admission".
+    """
+    return {**llm_breaker.stats(), "admission": llm_admission.stats()}
+
+
+@app.get("/warm/status")
+def warm_status():
+    """
+    Progress of the inventory warm job.
+
+    Returns:
+        Dict: rows processed so far, and how many were computed, skipped
+        (already cached) or failed.
+    """
+    return _warm_job().stats
+
+
+@app.get("/export")
+def export(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|parquet)$", description="ndjson, csv or parquet"),
+    use_llm_cache: bool = Query(True, alias="llm_cache", description="Prefer cached LLM summaries over deterministic ones"),
+):
+    """
+    Bulk export endpoint.
+
+    Streams every vehicle of the current inventory snapshot with its summary,
+    risk score and reasoning: the cached LLM summary when there is one,
+    otherwise the deterministic summary (no LLM calls are made). The body is
+    generated chunk by chunk (EXPORT_CHUNK_ROWS rows; one Parquet row group
+    per chunk), so memory stays bounded whatever the inventory size.
+
+    Returns:
+        StreamingResponse: NDJSON, CSV or Parquet attachment.
+    """
+    dataset = _dataset()
+    return StreamingResponse(
+        export_inventory(dataset, fmt, use_llm_cache=use_llm_cache),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="inventory-v{dataset.version}.{fmt}"'},
+    )
+
+
+@app.post("/inventory/reload")
+async def reload_inventory():
+    """
+    Reload the inventory file now (the file watcher does this automatically
+    when INVENTORY_WATCH is enabled).
+
+    Unchanged rows keep their scores and cached LLM results; only changed VINs
+    are rescored and have their cached results invalidated. Requests in flight
+    keep using the snapshot they started with.
+
+    Returns:
+        Dict: new snapshot version, row count and the VIN diff.
+
+    Raises:
+        HTTPException: 500 if the file cannot be loaded (the current snapshot stays in place).
+    """
+    try:
+        return await run_in_threadpool(inventory.reload)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Inventory reload failed: {e}")
+
+
+def _lookup(vin: str) -> Tuple[Dataset, int, Vehicle]:
+    """
+    Normalize a VIN and resolve it through the VIN index of the current
+    inventory snapshot.
+
+    Returns:
+        Tuple[Dataset, int, Vehicle]: The snapshot, the row position and the
+        typed record with the row data and its precomputed scores (and its
+        market context when COMPARABLES_IN_SUMMARY is on).
+
+    Raises:
+        HTTPException: 404 if the VIN is not in the dataset, 503 while the
+        inventory is still loading (FAST_STARTUP).
+    """
+    dataset = _dataset()
+
+    # Normalize VIN input and check if it exists in the dataset (O(1) index lookup)
+    with timed("lookup"):
+        pos = dataset.lookup(vin)
+    if pos is None:
+        raise HTTPException(status_code=404, detail="VIN not found in dataset")
+
+    # Extract vehicle data as dictionary
+    with timed("row_to_dict"):
+        return dataset, pos, with_market_context(dataset, pos, dataset.vehicle(pos))
+
+
+async def _summarize(dataset: Dataset, pos: int, vehicle: Vehicle) -> Dict[str, Any]:
+    """
+    Summary of one located vehicle: its stored LLM summary if the result store
+    has one for the same inputs, otherwise computed (LLM if an OpenAI API key
+    is available, else deterministic) and recorded in the store.
+    """
+    llm_enabled = bool(os.getenv("OPENAI_API_KEY"))
+    if llm_enabled:
+        stored = await run_in_threadpool(stored_result, dataset, pos, vehicle)
+        if stored is not None:
+            return stored
+
+    start = time.perf_counter()
+    result = await agenerate_vin_summary(vehicle) if llm_enabled else fallback_summary(vehicle)
+    record_result(dataset, pos, vehicle, result, time.perf_counter() - start)
+    return result
+
+
 @app.post("/vin-summary", response_model=VINResponse)
-def get_vin_summary(request: VINRequest):
+async def get_vin_summary(request: VINRequest):
     """
     VIN summary endpoint.
 
     This endpoint accepts a VIN (Vehicle Identification Number) via POST request.
     Steps:
     1. Normalize the VIN input (trim + convert to uppercase).
-    2. Look up the VIN in the loaded CSV dataset.
+    2. Look up the VIN in the prebuilt VIN index.
     3. If the VIN is not found, return a 404 error.
     4. If found:
+       - Serve the stored LLM summary if the result store has one for the same inputs.
        - Use LLM to generate a detailed summary if an OpenAI API key is available.
        - Otherwise, fall back to a deterministic, rule-based summary.
+       Computed summaries are recorded in the result store (off the request path).
+
+    The endpoint is async: the LLM round trip is awaited on the event loop
+    (AsyncOpenAI with a pooled HTTP client), so it doesn't hold a worker thread.
 
     Returns:
         VINResponse: Object containing the vehicle summary.
     """
+    return _served(await _summarize(*_lookup(request.vin)))
 
-    # Normalize VIN input
-    vin = request.vin.strip().upper()
 
-    # Check if VIN exists in the dataset
-    row = df[df["VIN"].str.upper() == vin]
-    if row.empty:
-        raise HTTPException(status_code=404, detail="VIN not found in dataset")
+@app.post("/vin-summary/stream")
+async def stream_vin_summary(request: VINRequest):
+    """
+    Streaming VIN summary endpoint (server-sent events).
 
-    # Extract vehicle data as dictionary
-    vehicle_data = row.iloc[0].to_dict()
+    Looks up the VIN like `/vin-summary` (404 if missing), then streams:
+    - `delta`: raw LLM text chunks as they arrive, `{"text": ...}`
+    - `field`: each top-level JSON field as soon as it is complete,
+      `{"key": "summary", "value": ...}` — so the summary can be shown
+      before the reasoning has been generated
+    - `result`: the final validated VINResponse (always the last event)
 
-    # Choose summary method based on presence of OpenAI API key
-    api_key = os.getenv("OPENAI_API_KEY")
-    if api_key:
-        # LLM-based summary
-        return generate_vin_summary(vehicle_data)
+    Without an OpenAI API key the deterministic summary is sent as
+    `field` events followed by `result`.
+
+    Returns:
+        StreamingResponse: `text/event-stream` body.
+    """
+    dataset, pos, vehicle = _lookup(request.vin)
+
+    async def events() -> AsyncIterator[str]:
+        stored = await run_in_threadpool(stored_result, dataset, pos, vehicle) if os.getenv("OPENAI_API_KEY") else None
+        if stored is not None:
+            stream = _result_events(stored)
+        elif os.getenv("OPENAI_API_KEY"):
+            stream = astream_vin_summary(vehicle)
+        else:
+            stream = _result_events(fallback_summary(vehicle))
+
+        start = time.perf_counter()
+        async for kind, payload in stream:
+            if kind == "delta":
+                yield sse_event("delta", {"text": payload})
+            elif kind == "field":
+                yield sse_event("field", {"key": payload[0], "value": payload[1]})
+            else:
+                record_result(dataset, pos, vehicle, payload, time.perf_counter() - start)
+                yield sse_event("result", VINResponse(**_served(payload)).model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def _result_events(result: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+    """A finished (stored or deterministic) summary in the same event shape as `astream_vin_summary`."""
+    for field in ("summary", "risk_score", "reasoning"):
+        yield "field", (field, result[field])
+    yield "result", result
+
+
+async def _summarize_positions(dataset: Dataset, positions: List[int]) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Summarize the given dataset rows, yielding (index into `positions`, summary)
+    as each one finishes. Rows with a stored LLM summary are served from the
+    result store first; the other LLM calls run with bounded concurrency.
+    Computed summaries are recorded in the store.
+    """
+    vehicles = [with_market_context(dataset, pos, dataset.vehicle(pos)) for pos in positions]
+    start = time.perf_counter()
+
+    if os.getenv("OPENAI_API_KEY"):
+        pending = []
+        for i, stored in enumerate(await run_in_threadpool(stored_results, dataset, positions, vehicles)):
+            if stored is not None:
+                yield i, stored
+            else:
+                pending.append(i)
+        async for j, summary in agenerate_vin_summaries([(vehicles[i], None) for i in pending], priority="batch"):
+            i = pending[j]
+            record_result(dataset, positions[i], vehicles[i], summary, time.perf_counter() - start)
+            yield i, summary
+    else:
+        for i, (pos, vehicle) in enumerate(zip(positions, vehicles)):
+            summary = fallback_summary(vehicle)
+            record_result(dataset, pos, vehicle, summary, time.perf_counter() - start)
+            yield i, summary
+
+
+async def _batch_items(vins: List[str]) -> AsyncIterator[Tuple[int, VINBatchItem]]:
+    """
+    Validate every requested VIN and resolve the valid ones through the index
+    in one pass, then yield (request index, item): invalid and not-found VINs
+    first, found VINs as they complete. Duplicate VINs in a request are only
+    summarized once.
+    """
+    # One snapshot for the whole batch, even if a reload happens meanwhile
+    dataset = _dataset()
+    normalized = [normalize_vin(vin) for vin in vins]
+    errors: Dict[str, Optional[str]] = {vin: vin_error(vin) for vin in normalized}
+    positions: Dict[str, Optional[int]] = {
+        vin: None if error else dataset.vin_index.get(vin) for vin, error in errors.items()
+    }
+
+    for i, vin in enumerate(normalized):
+        if errors[vin]:
+            yield i, VINBatchItem(vin=vins[i], status="invalid", error=errors[vin])
+        elif positions[vin] is None:
+            yield i, VINBatchItem(vin=vins[i], status="not_found")
+
+    found = [vin for vin, pos in positions.items() if pos is not None]
+    requested_at: Dict[str, List[int]] = {}
+    for i, vin in enumerate(normalized):
+        requested_at.setdefault(vin, []).append(i)
+
+    async for j, summary in _summarize_positions(dataset, [positions[vin] for vin in found]):
+        result = VINResponse(**_served(summary))
+        for i in requested_at[found[j]]:
+            yield i, VINBatchItem(vin=vins[i], status="ok", source=result.source, result=result)
+
+
+@app.post("/vin-summary/batch", response_model=VINBatchResponse)
+async def get_vin_summary_batch(request: VINBatchRequest):
+    """
+    Batch VIN summary endpoint.
+
+    Accepts a list of VINs and summarizes all of them in one request.
+    Steps:
+    1. Normalize and validate every VIN (see VIN_VALIDATION) and resolve the
+       valid ones through the VIN index in one pass.
+    2. Mark invalid VINs as "invalid" and VINs missing from the dataset as
+       "not_found" (no 422 / 404 for the batch).
+    3. Summarize the found VINs, running LLM calls with bounded concurrency
+       (LLM_MAX_CONCURRENCY) or using the deterministic fallback.
+
+    If `stream` is true, the response is NDJSON (one VINBatchItem per line)
+    written as soon as each VIN finishes; otherwise the results are returned
+    together, in request order.
+
+    Returns:
+        VINBatchResponse | StreamingResponse: Per-VIN status, source and summary.
+    """
+    if request.stream:
+        lines = (item.model_dump_json() + "\n" async for _, item in _batch_items(request.vins))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    results: List[Optional[VINBatchItem]] = [None] * len(request.vins)
+    async for i, item in _batch_items(request.vins):
+        results[i] = item
+    return VINBatchResponse(results=results)
+
+
+def _result_store() -> store.ResultStore:
+    """The result store, or 503 if it is disabled."""
+    if store.result_store is None:
+        raise HTTPException(status_code=503, detail="Result store disabled (set RESULT_STORE_PATH)")
+    return store.result_store
+
+
+@app.get("/results", response_model=StoredResultsResponse)
+def query_results(
+    min_risk: Optional[float] = Query(None, description="Lowest risk score (inclusive)"),
+    max_risk: Optional[float] = Query(None, description="Highest risk score (inclusive)"),
+    since: Optional[datetime] = Query(None, description="Computed at or after (ISO date or datetime)"),
+    until: Optional[datetime] = Query(None, description="Computed before (ISO date or datetime)"),
+    source: Optional[str] = Query(None, description="Only summaries produced by this path (llm, fallback, ...)"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of results"),
+):
+    """
+    Stored summaries by risk score and computation time, e.g. every vehicle with
+    risk above 7 computed today: `/results?min_risk=7&since=<today's date>`.
+    Served by the result store indexes, nothing is recomputed.
+
+    Returns:
+        StoredResultsResponse: Matching summaries, most recently computed first.
+
+    Raises:
+        HTTPException: 503 if the result store is disabled.
+    """
+    results = _result_store().query(
+        min_risk=min_risk,
+        max_risk=max_risk,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        source=source,
+        limit=limit,
+    )
+    return StoredResultsResponse(count=len(results), results=results)
+
+
+@app.get("/results/{vin}", response_model=StoredResultsResponse)
+def result_history(vin: str, limit: int = Query(100, ge=1, le=10000, description="Maximum number of results")):
+    """
+    Result history of one VIN: its stored summary for every data version seen.
+
+    Returns:
+        StoredResultsResponse: Summaries of the VIN, most recently computed first.
+
+    Raises:
+        HTTPException: 422 if the VIN is invalid, 503 if the result store is disabled.
+    """
+    error = vin_error(vin)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+    results = _result_store().history(vin, limit)
+    return StoredResultsResponse(count=len(results), results=results)
+
+
+@app.get("/vin-search", response_model=VINSearchResponse)
+def vin_search(
+    prefix: str = Query(..., max_length=50, description="Start of the VIN (case-insensitive)"),
+    k: int = Query(10, ge=1, le=100, description="Maximum number of matches"),
+):
+    """
+    VIN prefix search (typeahead): the VINs of the current inventory starting
+    with `prefix`, in VIN order. Two binary searches over the sorted VIN index,
+    so the cost does not grow with the inventory beyond O(log n + k).
+
+    Returns:
+        VINSearchResponse: Total number of matches and the first `k` of them.
+
+    Raises:
+        HTTPException: 422 if the prefix is longer than a VIN or contains
+        characters a VIN cannot contain (unless VIN_VALIDATION is off).
+    """
+    prefix = normalize_vin(prefix)
+    error = prefix_error(prefix)
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+    dataset = _dataset()
+    with timed("lookup"):
+        total, positions = dataset.vin_index.search(prefix, k)
+    matches = []
+    for pos in positions.tolist():
+        vehicle = dataset.vehicle(pos)
+        matches.append(VINMatch(
+            vin=normalize_vin(vehicle.get("VIN")),
+            year=vehicle.year,
+            make=vehicle.get("Make"),
+            model=vehicle.get("Model"),
+        ))
+    return VINSearchResponse(prefix=prefix, total=total, matches=matches)
+
+
+@app.post("/what-if", response_model=WhatIfResponse)
+def what_if(request: WhatIfRequest):
+    """
+    What-if / price-sensitivity sweep of the deterministic risk score.
+
+    Takes one VIN, or filters over the inventory (every vehicle if none), and
+    ranges of price changes and extra days on lot. The whole grid is computed
+    in one vectorized pass of the scoring formula (see app.whatif).
+
+    Returns:
+        WhatIfResponse: Mean risk score per (price change, extra days) and, per
+        extra days value, the price cut that keeps the risk at its current level.
+
+    Raises:
+        HTTPException: 404 if the VIN is not in the dataset,
+            422 if the filters select more than WHATIF_MAX_VEHICLES vehicles.
+    """
+    dataset = _dataset()
+    if request.vin is not None:
+        pos = dataset.lookup(request.vin)
+        if pos is None:
+            raise HTTPException(status_code=404, detail="VIN not found in dataset")
+        positions = [pos]
     else:
-        # Deterministic (rule-based) summary
-        return deterministic_summary(vehicle_data)
+        filters = PortfolioFilters.of(request.make, request.model, request.year_min, request.year_max)
+        positions = portfolio(dataset).positions(filters)
+
+    axes = {name: sweep_axis(**getattr(request, name).model_dump()) for name in ("price_change_pct", "extra_days")}
+    try:
+        return {"version": dataset.version, **sweep(dataset, positions, **axes)}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@app.post("/comparables", response_model=ComparablesResponse)
+def get_comparables(request: ComparablesRequest):
+    """
+    Nearest comparable vehicles endpoint.
+
+    Comparables share the vehicle's make and model and are ranked by distance
+    over z-scored year, mileage and price (see app.comparables). The market
+    context gives their median days on lot, price to market and risk score.
+
+    Returns:
+        ComparablesResponse: The `k` closest comparables and their market context.
+
+    Raises:
+        HTTPException: 404 if the VIN is not in the dataset.
+    """
+    dataset = _dataset()
+    pos = dataset.lookup(request.vin)
+    if pos is None:
+        raise HTTPException(status_code=404, detail="VIN not found in dataset")
+
+    index = comparables_index(dataset)
+    return ComparablesResponse(
+        vin=request.vin,
+        version=dataset.version,
+        market_context=index.market_context(pos, request.k),
+        comparables=index.comparables(pos, request.k),
+    )
+
+
+def _portfolio_filters(
+    make: Optional[List[str]] = Query(None, description="Makes to include (repeatable, case-insensitive)"),
+    model: Optional[List[str]] = Query(None, description="Models to include (repeatable, case-insensitive)"),
+    year_min: Optional[int] = Query(None, description="Oldest model year to include"),
+    year_max: Optional[int] = Query(None, description="Newest model year to include"),
+) -> PortfolioFilters:
+    """Query parameters shared by the portfolio endpoints."""
+    return PortfolioFilters.of(make, model, year_min, year_max)
+
+
+@app.get("/portfolio/risk-distribution", response_model=PortfolioDistributionResponse)
+def portfolio_risk_distribution(
+    bins: int = Query(9, ge=1, le=100, description="Histogram buckets over the 1.0-10.0 risk range"),
+    filters: PortfolioFilters = Depends(_portfolio_filters),
+):
+    """
+    Portfolio risk distribution endpoint.
+
+    Computed from the precomputed deterministic scores of the current
+    inventory snapshot (no LLM calls), and cached per snapshot version and
+    query, so repeated dashboard loads are lookups.
+
+    Returns:
+        PortfolioDistributionResponse: Risk-score histogram plus mean / p50 / p90
+        of risk_score, days_on_lot and price_to_market for the filtered vehicles.
+    """
+    return portfolio(_dataset()).distribution(filters, bins)
+
+
+@app.get("/portfolio/top-risk", response_model=PortfolioTopRiskResponse)
+def portfolio_top_risk(
+    limit: int = Query(10, ge=1, le=1000, description="Number of vehicles to return"),
+    filters: PortfolioFilters = Depends(_portfolio_filters),
+):
+    """
+    Riskiest vehicles of the (filtered) inventory, highest deterministic risk score first.
+
+    Returns:
+        PortfolioTopRiskResponse: Matching vehicle count and the top `limit` vehicles.
+    """
+    return portfolio(_dataset()).top_risk(filters, limit)
+
+
+@app.get("/portfolio/groups", response_model=PortfolioGroupsResponse, response_model_exclude_unset=True)
+def portfolio_groups(
+    by: str = Query("make", description="Comma-separated dimensions to group by: make, model, year"),
+    limit: int = Query(100, ge=1, le=10000, description="Largest groups to return"),
+    filters: PortfolioFilters = Depends(_portfolio_filters),
+):
+    """
+    Portfolio aggregates grouped by make, model and/or year.
+
+    Returns:
+        PortfolioGroupsResponse: Per group, the vehicle count and mean / p50 / p90
+        of risk_score, days_on_lot and price_to_market, largest groups first.
+
+    Raises:
+        HTTPException: 422 if `by` names an unknown dimension.
+    """
+    dimensions = [dim.strip().lower() for dim in by.split(",") if dim.strip()]
+    try:
+        return portfolio(_dataset()).groups(dimensions, filters, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
@@ -0,0 +1,174 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds (Prometheus defaults, extended for slow LLM calls)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    """Render a label set as `{a="1",b="2"}` (empty string if there are no labels)."""
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name, self.help_text = name, help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Value that is read from a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], Dict[LabelKey, float]]):
+        self.name, self.help_text, self.read = name, help_text, read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.read().items()):
+            lines.append(f"{self.name}{_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help_text = name, help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(tuple(sorted(labels.items())))
+            return int(series[-2]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels(key, [('le', f'{bound:g}')])} {count:g}")
+                lines.append(f"{self.name}_bucket{_labels(key, [('le', '+Inf')])} {series[-2]:g}")
+                lines.append(f"{self.name}_sum{_labels(key)} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{_labels(key)} {series[-2]:g}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- METRICS ---
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "autoinsight_stage_seconds",
+    "Time spent per request stage (lookup, row_to_dict, prompt_build, llm_call, llm_batch_call, json_extract, validate, fallback).",
+))
+SUMMARIES_TOTAL = registry.register(Counter(
+    "autoinsight_summaries_total", "Summaries served, by source (llm, cache, store, fallback, timeout, circuit_open, shed).",
+))
+PARSE_FAILURES_TOTAL = registry.register(Counter(
+    "autoinsight_llm_parse_failures_total",
+    "LLM responses that could not be parsed into a valid summary, by output mode (text, structured, batch).",
+))
+LLM_PARSE_SECONDS = registry.register(Histogram(
+    "autoinsight_llm_parse_seconds",
+    "Time spent turning LLM output into a validated summary, by output mode (text, structured, batch).",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+))
+LLM_TOKENS_TOTAL = registry.register(Counter(
+    "autoinsight_llm_tokens_total", "LLM tokens used, by type (input, output).",
+))
+LLM_BATCH_SIZE = registry.register(Histogram(
+    "autoinsight_llm_batch_size", "Vehicles per micro-batched LLM call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+))
+LLM_BATCH_WAIT_SECONDS = registry.register(Histogram(
+    "autoinsight_llm_batch_wait_seconds", "Time a vehicle waited for its micro-batch to be dispatched.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+LLM_QUEUE_WAIT_SECONDS = registry.register(Histogram(
+    "autoinsight_llm_queue_wait_seconds", "Time an LLM request waited for admission, by priority.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+))
+LLM_SHED_TOTAL = registry.register(Counter(
+    "autoinsight_llm_shed_total", "LLM requests answered with the deterministic summary by admission control, by priority and reason.",
+))
+RESULT_STORE_WRITE_ROWS = registry.register(Histogram(
+    "autoinsight_result_store_write_rows", "Summaries written per result store transaction.",
+    buckets=(1, 4, 16, 64, 256, 1024),
+))
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block under `autoinsight_stage_seconds{stage=...}`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_usage(usage) -> None:
+    """Add a Responses API `usage` object (if any) to the token counters."""
+    if usage is None:
+        return
+    for kind in ("input", "output"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if tokens:
+            LLM_TOKENS_TOTAL.inc(tokens, type=kind)
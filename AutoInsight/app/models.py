@@ -1,5 +1,156 @@
-from pydantic import BaseModel, Field
-from typing import List
+import json
+import math
+from collections.abc import Mapping
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, create_model
+from typing import Annotated, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.vin import vin_error
+
+
+class Vehicle(Mapping):
+    """
+    Compact record for one inventory row plus its precomputed scores.
+
+    The raw row is kept as a shared tuple of column names and a tuple of plain
+    Python values (read straight from the dataset's column arrays, no pandas
+    row or NumPy scalars), and it reads like the row dict it replaces
+    (`vehicle["DOL"]`, `dict(vehicle)`). The fields used by the deterministic
+    summary are typed attributes, so they are never re-parsed per request.
+
+    Attributes:
+        vin (str): Normalized VIN (trimmed + uppercase).
+        year (Optional[int]): Model year, None if missing.
+        make (str): Uppercased make.
+        model (Any): Model as stored in the dataset.
+        price_to_market, days_on_lot, mileage, vdp_views (float): Parsed score inputs.
+        ndays, nprice, nmileage, nviews (float): Normalized contributors.
+        weighted (float): Weighted sum of the contributors.
+        risk_score (float): Deterministic risk score (1.0–10.0).
+        market (Optional[Dict[str, Any]]): Market context from comparable
+            vehicles (see `app.comparables`), None unless attached.
+    """
+
+    # Score fields, in the column order produced by `score_inventory`
+    SCORE_FIELDS = (
+        "price_to_market", "days_on_lot", "mileage", "vdp_views",
+        "ndays", "nprice", "nmileage", "nviews", "weighted", "risk_score",
+    )
+
+    __slots__ = ("fields", "values", "vin", "year", "make", "model", "market") + SCORE_FIELDS
+
+    def __init__(self, fields: Tuple[str, ...], values: Tuple[Any, ...], scores: Sequence[float]):
+        self.fields = fields
+        self.values = values
+        self.vin = str(self.get("VIN", "")).upper().strip()
+        year = self.get("Year")
+        self.year = int(year) if year and not (isinstance(year, float) and math.isnan(year)) else None
+        self.make = str(self.get("Make", "Unknown")).upper()
+        self.model = self.get("Model", "Unknown")
+        for name, value in zip(self.SCORE_FIELDS, scores):
+            setattr(self, name, float(value))
+        self.market: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Raw row as a dict (column name → value), as sent to the LLM."""
+        return dict(zip(self.fields, self.values))
+
+    def to_json(self, sort_keys: bool = False) -> str:
+        """
+        JSON of `as_row_dict(self)` (see `row_json`), the same text `json.dumps`
+        gives, encoded straight from the value tuple: the key prefixes and their
+        order are computed once per column set, no row dict is built.
+        """
+        values = self.values if self.market is None else (*self.values, self.market)
+        encoders = _SORTED_JSON_ENCODERS if sort_keys else _JSON_ENCODERS
+        try:
+            parts = [prefix + encoders[type(values[i])](values[i]) for prefix, i in _json_layout(self.fields, self.market is not None, sort_keys)]
+        except KeyError:  # not a plain scalar: let json decide
+            return json.dumps(as_row_dict(self), sort_keys=True, default=str) if sort_keys else json.dumps(as_row_dict(self))
+        return "{" + ", ".join(parts) + "}"
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self.values[self.fields.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __repr__(self) -> str:
+        return f"Vehicle({self.to_dict()!r})"
+
+
+def _json_float(value: float) -> str:
+    """A float as `json.dumps` writes it (NaN and infinities included)."""
+    if value != value:
+        return "NaN"
+    if value in (math.inf, -math.inf):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+# JSON encoders of the value types found in inventory rows (`Vehicle.to_json`), plus the market context dict
+_JSON_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _json_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+    dict: json.dumps,
+}
+_SORTED_JSON_ENCODERS = {**_JSON_ENCODERS, dict: lambda value: json.dumps(value, sort_keys=True, default=str)}
+
+
+@lru_cache(maxsize=None)
+def _json_layout(fields: Tuple[str, ...], market: bool, sort_keys: bool) -> Tuple[Tuple[str, int], ...]:
+    """("\"key\": " prefix, value index) pairs of a row's JSON object; the market context is index len(fields)."""
+    names = (*fields, "market_context") if market else fields
+    order = sorted(range(len(names)), key=names.__getitem__) if sort_keys else range(len(names))
+    return tuple((encode_basestring_ascii(names[i]) + ": ", i) for i in order)
+
+
+def as_row_dict(vehicle: Mapping) -> Dict[str, Any]:
+    """
+    Plain row dict for a `Vehicle` record or a row dict (returned as-is).
+
+    A `Vehicle` with market context attached carries it under "market_context",
+    so it reaches the LLM prompt and is part of the cache key.
+    """
+    if not isinstance(vehicle, Vehicle):
+        return vehicle
+    if vehicle.market is not None:
+        return {**vehicle.to_dict(), "market_context": vehicle.market}
+    return vehicle.to_dict()
+
+
+def row_json(vehicle: Mapping, sort_keys: bool = False) -> str:
+    """
+    JSON of a vehicle's row as sent to the LLM (`as_row_dict`).
+
+    With `sort_keys` it is the canonical form hashed into the cache key
+    (sorted keys, non-JSON values as strings).
+    """
+    if isinstance(vehicle, Vehicle):
+        return vehicle.to_json(sort_keys)
+    return json.dumps(vehicle, sort_keys=True, default=str) if sort_keys else json.dumps(vehicle)
+
+
+def _checked_vin(vin: str) -> str:
+    """Reject a VIN failing the VIN_VALIDATION checks (charset, length, check digit) before any lookup."""
+    error = vin_error(vin)
+    if error:
+        raise ValueError(error)
+    return vin
+
+
+# Requested VIN: validated (app.vin.VIN_VALIDATION) but passed on as sent
+CheckedVIN = Annotated[str, Field(min_length=5, max_length=50), AfterValidator(_checked_vin)]
 
 
 class VINRequest(BaseModel):
@@ -7,9 +158,10 @@ class VINRequest(BaseModel):
     Request model for VIN summary endpoint.
 
     Attributes:
-        vin (str): The Vehicle Identification Number provided by the user.
+        vin (str): The Vehicle Identification Number provided by the user
+            (422 if its length, characters or check digit are invalid).
     """
-    vin: str = Field(..., min_length=5, max_length=50, description="Vehicle Identification Number")
+    vin: CheckedVIN = Field(..., description="Vehicle Identification Number")
 
 
 class VINResponse(BaseModel):
@@ -21,8 +173,402 @@ class VINResponse(BaseModel):
         summary (str): Human-readable summary of the vehicle.
         risk_score (float): Risk score calculated for the vehicle (1.0 to 10.0).
         reasoning (List[str]): Step-by-step reasoning or key points behind the summary.
+        source (Optional[str]): Which path produced the summary: "llm", "cache",
+            "store" (result store), "fallback", "timeout" (LLM missed its deadline)
+            or "circuit_open" (LLM skipped by the circuit breaker).
     """
     vin: str
     summary: str
     risk_score: float = Field(..., ge=1.0, le=10.0, description="Risk score between 1.0 and 10.0")
     reasoning: List[str]
+    source: Optional[str] = Field(None, description="Which path produced the summary")
+
+
+class StoredResult(VINResponse):
+    """
+    A computed summary as recorded in the result store (one per VIN and data version).
+
+    Attributes:
+        data_version (str): Content hash of the inventory row the summary was computed from.
+        model (Optional[str]): LLM model for LLM summaries (None for deterministic ones).
+        latency_ms (float): Time it took to produce the summary.
+        computed_at (float): Unix time the summary was computed.
+    """
+    data_version: str
+    model: Optional[str] = None
+    latency_ms: float
+    computed_at: float
+
+
+class StoredResultsResponse(BaseModel):
+    """
+    Response model for the result store queries.
+
+    Attributes:
+        count (int): Number of results returned.
+        results (List[StoredResult]): Most recently computed first.
+    """
+    count: int
+    results: List[StoredResult]
+
+
+# VINResponse fields written by the LLM (vin and source are filled in by the server)
+LLM_OUTPUT_FIELDS = ("summary", "risk_score", "reasoning")
+
+# The part of VINResponse the LLM must return in structured output mode. Derived
+# from VINResponse so the schema sent to the model and the API model never drift.
+LLMSummary = create_model(
+    "LLMSummary",
+    __config__=ConfigDict(extra="forbid"),
+    **{name: (VINResponse.model_fields[name].annotation, VINResponse.model_fields[name]) for name in LLM_OUTPUT_FIELDS},
+)
+
+
+def llm_output_format() -> Dict[str, Any]:
+    """
+    Responses API `text.format` constraining the LLM output to the LLMSummary schema.
+
+    Returns:
+        Dict: A strict "json_schema" format (every field required, no extra keys).
+    """
+    return {
+        "type": "json_schema",
+        "name": "vin_summary",
+        "schema": LLMSummary.model_json_schema(),
+        "strict": True,
+    }
+
+
+# Maximum number of VINs accepted by a single batch request
+MAX_BATCH_SIZE = 1000
+
+
+class VINBatchRequest(BaseModel):
+    """
+    Request model for the batch VIN summary endpoint.
+
+    Attributes:
+        vins (List[str]): VINs to summarize (1 to MAX_BATCH_SIZE entries).
+        stream (bool): Stream results as NDJSON as soon as each VIN finishes.
+    """
+    vins: List[Annotated[str, Field(min_length=5, max_length=50)]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE, description="Vehicle Identification Numbers"
+    )
+    stream: bool = Field(False, description="Return an NDJSON stream instead of a single JSON body")
+
+
+class VINBatchItem(BaseModel):
+    """
+    Per-VIN result of a batch request.
+
+    Attributes:
+        vin (str): The VIN as sent in the request.
+        status (str): "ok" if the VIN was found, "not_found" if it is valid but
+            not in the dataset, "invalid" if it failed validation (not looked up).
+        error (Optional[str]): Why the VIN is invalid.
+        source (Optional[str]): Which path produced the summary (see VINResponse).
+        result (Optional[VINResponse]): The summary, if the VIN was found.
+    """
+    vin: str
+    status: str
+    error: Optional[str] = None
+    source: Optional[str] = None
+    result: Optional[VINResponse] = None
+
+
+class VINBatchResponse(BaseModel):
+    """
+    Response model for the batch VIN summary endpoint.
+
+    Attributes:
+        results (List[VINBatchItem]): One item per requested VIN, in request order.
+    """
+    results: List[VINBatchItem]
+
+
+class MetricStats(BaseModel):
+    """
+    Mean and percentiles of one metric over a set of vehicles (None if the set is empty).
+
+    Attributes:
+        mean (Optional[float]): Arithmetic mean.
+        p50 (Optional[float]): Median.
+        p90 (Optional[float]): 90th percentile.
+    """
+    mean: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+
+
+class RiskBucket(BaseModel):
+    """
+    One bucket of the risk-score histogram.
+
+    Attributes:
+        lower (float): Lower bound (inclusive).
+        upper (float): Upper bound (exclusive, except for the last bucket).
+        count (int): Vehicles in the bucket.
+    """
+    lower: float
+    upper: float
+    count: int
+
+
+class PortfolioDistributionResponse(BaseModel):
+    """
+    Response model for the portfolio risk distribution endpoint.
+
+    Attributes:
+        version (int): Inventory snapshot version the figures were computed on.
+        count (int): Vehicles matching the filters.
+        buckets (List[RiskBucket]): Risk-score histogram.
+        stats (Dict[str, MetricStats]): risk_score, days_on_lot and price_to_market statistics.
+    """
+    version: int
+    count: int
+    buckets: List[RiskBucket]
+    stats: Dict[str, MetricStats]
+
+
+class RiskyVehicle(BaseModel):
+    """
+    One vehicle of the top-risk list.
+
+    Attributes:
+        vin (str): Vehicle Identification Number.
+        year (Optional[int]): Model year.
+        make (Optional[str]): Make.
+        model (Optional[str]): Model.
+        risk_score (float): Deterministic risk score (1.0 to 10.0).
+        days_on_lot (float): Days on lot.
+        price_to_market (float): Price to market percentage.
+    """
+    vin: str
+    year: Optional[int] = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+    risk_score: float
+    days_on_lot: float
+    price_to_market: float
+
+
+class PortfolioTopRiskResponse(BaseModel):
+    """
+    Response model for the portfolio top-risk endpoint.
+
+    Attributes:
+        version (int): Inventory snapshot version the list was computed on.
+        count (int): Vehicles matching the filters.
+        vehicles (List[RiskyVehicle]): Riskiest vehicles first.
+    """
+    version: int
+    count: int
+    vehicles: List[RiskyVehicle]
+
+
+class PortfolioGroup(BaseModel):
+    """
+    Aggregates for one make / model / year group (only the grouped-by dimensions are set).
+
+    Attributes:
+        make (Optional[str]): Make of the group.
+        model (Optional[str]): Model of the group.
+        year (Optional[int]): Model year of the group.
+        count (int): Vehicles in the group.
+        stats (Dict[str, MetricStats]): risk_score, days_on_lot and price_to_market statistics.
+    """
+    make: Optional[str] = None
+    model: Optional[str] = None
+    year: Optional[int] = None
+    count: int
+    stats: Dict[str, MetricStats]
+
+
+class PortfolioGroupsResponse(BaseModel):
+    """
+    Response model for the portfolio groups endpoint.
+
+    Attributes:
+        version (int): Inventory snapshot version the figures were computed on.
+        by (List[str]): Dimensions grouped by.
+        groups (List[PortfolioGroup]): Largest groups first.
+    """
+    version: int
+    by: List[str]
+    groups: List[PortfolioGroup]
+
+
+class ComparablesRequest(BaseModel):
+    """
+    Request model for the comparables endpoint.
+
+    Attributes:
+        vin (str): The Vehicle Identification Number provided by the user.
+        k (int): Number of comparables to return.
+    """
+    vin: CheckedVIN = Field(..., description="Vehicle Identification Number")
+    k: int = Field(10, ge=1, le=100, description="Number of comparables to return")
+
+
+class ComparableVehicle(BaseModel):
+    """
+    One comparable vehicle (same make and model) and its distance to the requested one.
+
+    Attributes:
+        vin (Optional[str]): Vehicle Identification Number.
+        year (Optional[int]): Model year.
+        make (Optional[str]): Vehicle make.
+        model (Optional[str]): Vehicle model.
+        mileage (float): Odometer reading.
+        price (Optional[float]): Current price.
+        days_on_lot (float): Days on lot.
+        price_to_market (float): Price to market percentage.
+        risk_score (float): Deterministic risk score.
+        distance (float): Distance over z-scored year, mileage and price (0 = identical).
+    """
+    vin: Optional[str] = None
+    year: Optional[int] = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+    mileage: float
+    price: Optional[float] = None
+    days_on_lot: float
+    price_to_market: float
+    risk_score: float
+    distance: float
+
+
+class MarketContext(BaseModel):
+    """
+    How the comparables of a vehicle are doing.
+
+    Attributes:
+        comparables (int): Number of comparables the medians are taken over.
+        median_days_on_lot (float): Median days on lot.
+        median_price_to_market (float): Median price to market percentage.
+        median_risk_score (float): Median deterministic risk score.
+    """
+    comparables: int
+    median_days_on_lot: float
+    median_price_to_market: float
+    median_risk_score: float
+
+
+class ComparablesResponse(BaseModel):
+    """
+    Response model for the comparables endpoint.
+
+    Attributes:
+        vin (str): The VIN that was looked up.
+        version (int): Inventory snapshot version the comparables were found in.
+        market_context (Optional[MarketContext]): Medians over the comparables (None if there are none).
+        comparables (List[ComparableVehicle]): Closest first.
+    """
+    vin: str
+    version: int
+    market_context: Optional[MarketContext] = None
+    comparables: List[ComparableVehicle]
+
+
+class VINMatch(BaseModel):
+    """
+    One VIN matching a search prefix.
+
+    Attributes:
+        vin (str): Vehicle Identification Number.
+        year (Optional[int]): Model year.
+        make (Optional[str]): Vehicle make.
+        model (Optional[str]): Vehicle model.
+    """
+    vin: str
+    year: Optional[int] = None
+    make: Optional[str] = None
+    model: Optional[str] = None
+
+
+class VINSearchResponse(BaseModel):
+    """
+    Response model for the VIN prefix search endpoint.
+
+    Attributes:
+        prefix (str): The normalized prefix that was searched.
+        total (int): Number of VINs starting with the prefix.
+        matches (List[VINMatch]): The first `k` of them, in VIN order.
+    """
+    prefix: str
+    total: int
+    matches: List[VINMatch]
+
+
+class SweepRange(BaseModel):
+    """
+    Evenly spaced values of one what-if axis.
+
+    Attributes:
+        start (float): First value.
+        stop (float): Last value (included).
+        steps (int): Number of values.
+    """
+    start: float
+    stop: float
+    steps: int = Field(..., ge=1, le=200, description="Number of values (both ends included)")
+
+
+class WhatIfRequest(BaseModel):
+    """
+    Request model for the what-if sweep endpoint: one VIN, or the vehicles matching the filters.
+
+    Attributes:
+        vin (Optional[str]): Vehicle to sweep (the filters are ignored when set).
+        make (List[str]): Makes to include (case-insensitive).
+        model (List[str]): Models to include (case-insensitive).
+        year_min (Optional[int]): Oldest model year to include.
+        year_max (Optional[int]): Newest model year to include.
+        price_change_pct (SweepRange): Price changes in percent (-10 = price cut by 10%).
+        extra_days (SweepRange): Additional days on lot.
+    """
+    vin: Optional[CheckedVIN] = Field(None, description="Vehicle Identification Number")
+    make: List[str] = Field(default_factory=list, description="Makes to include")
+    model: List[str] = Field(default_factory=list, description="Models to include")
+    year_min: Optional[int] = Field(None, description="Oldest model year to include")
+    year_max: Optional[int] = Field(None, description="Newest model year to include")
+    price_change_pct: SweepRange = SweepRange(start=-20.0, stop=0.0, steps=21)
+    extra_days: SweepRange = SweepRange(start=0.0, stop=90.0, steps=10)
+
+
+class BreakEvenPoint(BaseModel):
+    """
+    Price cut that offsets a number of extra days on lot.
+
+    Attributes:
+        extra_days (float): Additional days on lot.
+        price_cut_pct (Optional[float]): Median price cut (in %, 0 if none is needed) keeping
+            the risk score at or below its current level (None if no vehicle can get there).
+        unreachable (int): Vehicles no price cut brings back to their current risk score.
+    """
+    extra_days: float
+    price_cut_pct: Optional[float] = None
+    unreachable: int
+
+
+class WhatIfResponse(BaseModel):
+    """
+    Response model for the what-if sweep endpoint.
+
+    Attributes:
+        version (int): Inventory snapshot version the sweep was computed on.
+        vehicles (int): Vehicles swept.
+        baseline_risk (Optional[float]): Mean current risk score (None if no vehicle matched).
+        price_change_pct (List[float]): Price change axis.
+        extra_days (List[float]): Extra days axis.
+        risk (List[List[float]]): Mean risk score per [price change][extra days].
+        break_even (List[BreakEvenPoint]): Break-even price cut per extra days value.
+    """
+    version: int
+    vehicles: int
+    baseline_risk: Optional[float] = None
+    price_change_pct: List[float]
+    extra_days: List[float]
+    risk: List[List[float]]
+    break_even: List[BreakEvenPoint]
+
@@ -13,9 +13,22 @@ SYSTEM_PROMPT = (
     "Sort reasoning from the strongest risk factor to the weakest."
 )
 
-# --- USER PROMPT ---
-USER_PROMPT_TEMPLATE = (
-    "Vehicle data (JSON):\n{vehicle_json}\n\n"
+# --- BATCH SYSTEM PROMPT (several vehicles per call) ---
+BATCH_SYSTEM_PROMPT = (
+    "You are an expert automotive risk analyst. "
+    "Always respond in a valid JSON array only, with one object per vehicle, each with keys: "
+    "\"vin\" (the vehicle's VIN, copied exactly), "
+    "\"summary\" (short paragraph about the vehicle), "
+    "\"risk_score\" (float 1.0–10.0, where 1.0 = low risk  and 10.0 = high risk), "
+    "\"reasoning\" (bullet points explaining how each attribute affects risk, "
+    "with approximate contribution percentages). "
+    "Base each assessment only on that vehicle's data. "
+    "Do not add external facts or text outside the JSON array. "
+    "Sort reasoning from the strongest risk factor to the weakest."
+)
+
+# --- SCORING GUIDELINES (shared by the single and batch prompts) ---
+SCORING_GUIDELINES = (
     "Scoring guidelines:\n"
     "- Days on Lot (DOL): Longer time on lot increases risk.\n"
     "- Current Price & Price to Market %: Overpriced vehicles increase risk, competitively priced vehicles reduce risk.\n"
@@ -27,7 +40,13 @@ USER_PROMPT_TEMPLATE = (
     "- Sales Opportunities (lifetime leads): More leads reduce risk; none or few leads increase risk. "
     "Normalize relative to vehicle age as well.\n"
     "- Make/Model: Only for description; do not affect risk score directly.\n\n"
-    "Rules:\n"
+)
+
+# --- USER PROMPT ---
+USER_PROMPT_TEMPLATE = (
+    "Vehicle data (JSON):\n{vehicle_json}\n\n"
+    + SCORING_GUIDELINES
+    + "Rules:\n"
     "- Always output valid JSON with keys: summary, risk_score, reasoning.\n"
     "- summary: short professional paragraph describing the vehicle. Its selling and purchasing risk including its marketing position.\n"
     "- risk_score: float 1.0–10.0.\n"
@@ -35,5 +54,19 @@ USER_PROMPT_TEMPLATE = (
     "- No markdown, no formulas, no extra text."
 )
 
+# --- BATCH USER PROMPT (several vehicles per call) ---
+BATCH_USER_PROMPT_TEMPLATE = (
+    "Vehicles data (JSON array, one object per vehicle):\n{vehicles_json}\n\n"
+    + SCORING_GUIDELINES
+    + "Rules:\n"
+    "- Assess each vehicle independently.\n"
+    "- Always output a valid JSON array with exactly one object per vehicle, "
+    "each with keys: vin (copied from the vehicle's VIN field), summary, risk_score, reasoning.\n"
+    "- summary: short professional paragraph describing the vehicle. Its selling and purchasing risk including its marketing position.\n"
+    "- risk_score: float 1.0–10.0.\n"
+    "- reasoning: bullet points, sorted from highest to lowest impact.\n"
+    "- No markdown, no formulas, no extra text."
+)
+
 
 
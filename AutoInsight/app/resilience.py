@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict
+
+# --- ENVIRONMENT ---
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "15"))  # Latency budget per LLM call
+LLM_BACKGROUND_COMPLETE = os.getenv("LLM_BACKGROUND_COMPLETE", "true").lower() in ("1", "true", "yes")
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))  # Consecutive failures before opening
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))  # Open time before a probe
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for the LLM upstream.
+
+    States:
+      - "closed": calls go through; consecutive failures (errors or deadline
+        misses) are counted, and reaching `failure_threshold` opens the circuit.
+      - "open": calls are skipped (served by the deterministic fallback) until
+        `reset_seconds` have passed.
+      - "half_open": a single probe call is let through; success closes the
+        circuit, failure opens it again.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        reset_seconds: float = LLM_BREAKER_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {"failures": 0, "successes": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        """Current state ("closed", "open" or "half_open")."""
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Return True if an LLM call may be attempted now."""
+        with self._lock:
+            if self._state == "open" and self.clock() - self._opened_at >= self.reset_seconds:
+                self._state = "half_open"
+                self._probe_in_flight = False
+
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a call that answered within its deadline."""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._state = "closed"
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a call that failed or missed its deadline."""
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = self.clock()
+
+    def stats(self) -> Dict[str, Any]:
+        """State plus success/failure/rejection counters."""
+        with self._lock:
+            return {
+                **self._stats,
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_seconds": self.reset_seconds,
+            }
+
+
+# Process-wide breaker used by app.llm
+llm_breaker = CircuitBreaker()
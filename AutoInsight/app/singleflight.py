@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    In-process request coalescing ("single flight").
+
+    The first caller for a key runs the work; callers that arrive with the same
+    key while it is still running wait for that result instead of starting
+    their own. Once the work finishes the key is released, so later callers
+    start fresh (and normally hit the LLM cache instead).
+
+    The sync (`do`) and async (`ado`) paths keep separate in-flight tables,
+    since a thread can't await an event-loop task and vice versa.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        self.coalesced = 0  # callers that reused another caller's in-flight work
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run `fn()` for `key` once across concurrent threads and return its result."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `fn()` for `key` once across concurrent coroutines and return its result."""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shield the shared task: one caller disconnecting must not cancel it for the others
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed (both paths)."""
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
@@ -0,0 +1,323 @@
+"""
+Persistent store of computed summaries, with their history and indexed queries.
+
+Every freshly computed summary (LLM or deterministic) is recorded as one row
+per VIN and data version, the data version being the content hash of the
+inventory row it was computed from. So the store keeps one row per distinct
+state of a vehicle, and a reload that changes a row starts a new one next to
+the old ones instead of overwriting them. Recomputing the same data version
+replaces its row, but an LLM summary is only ever replaced by another LLM
+summary: a later fallback or timeout (e.g. after a prompt or model change,
+when the LLM call failed) does not erase it.
+
+- Writes never happen on the request path: `record` only queues the row, and
+  a writer thread commits queued rows in batches (RESULT_STORE_BATCH_SIZE rows
+  or RESULT_STORE_FLUSH_MS after the first one, whichever comes first).
+- The database runs in WAL mode, so readers (one connection per thread) are
+  not blocked by the writer.
+- Repeated lookups of a vehicle whose LLM summary is stored for the exact same
+  inputs (row data, prompts and model, i.e. the same cache key) are served
+  from the store, with source "store".
+- VIN, risk_score and computed_at are indexed, so "risk above 7 computed
+  today" is a range scan rather than a recomputation.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import app.llm as llm
+from app.cache import cache_key
+from app.dataset import Dataset
+from app.log import logger
+from app.metrics import RESULT_STORE_WRITE_ROWS
+from app.models import StoredResult
+from app.utils import normalize_vin
+
+# --- ENVIRONMENT ---
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "")  # SQLite file of the result store ("" = disabled)
+RESULT_STORE_BATCH_SIZE = int(os.getenv("RESULT_STORE_BATCH_SIZE", "256"))  # Max rows per write transaction
+RESULT_STORE_FLUSH_MS = float(os.getenv("RESULT_STORE_FLUSH_MS", "200"))  # Max delay before queued rows are written
+
+# Columns of the results table: the StoredResult fields plus the cache key the
+# summary was computed under (an LLM summary is only served again for the same key)
+COLUMNS = (*StoredResult.model_fields, "cache_key")
+
+# Sources that are not computations (served from the LLM cache or the store itself)
+NOT_COMPUTED = ("cache", "store")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    "vin TEXT NOT NULL, data_version TEXT NOT NULL, summary TEXT NOT NULL, risk_score REAL NOT NULL, "
+    "reasoning TEXT NOT NULL, source TEXT, model TEXT, latency_ms REAL NOT NULL, computed_at REAL NOT NULL, "
+    "cache_key TEXT, PRIMARY KEY (vin, data_version))",
+    # The primary key doubles as the VIN index
+    "CREATE INDEX IF NOT EXISTS results_risk_score ON results (risk_score)",
+    "CREATE INDEX IF NOT EXISTS results_computed_at ON results (computed_at)",
+)
+
+# A recomputation of the same data version replaces the stored row, except that
+# an LLM summary is never replaced by a deterministic one (fallback, timeout, ...)
+_UPSERT = (
+    f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT (vin, data_version) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in COLUMNS if column not in ("vin", "data_version"))
+    + " WHERE results.source IS NOT 'llm' OR excluded.source = 'llm'"
+)
+
+
+def data_version(dataset: Dataset, pos: int) -> str:
+    """Content hash of row `pos`, as the hex string stored in `data_version`."""
+    return f"{int(dataset.hashes[pos]):016x}"
+
+
+def _to_result(row: sqlite3.Row) -> Dict[str, Any]:
+    """Table row → StoredResult fields (reasoning decoded, cache key dropped)."""
+    result = {name: row[name] for name in StoredResult.model_fields}
+    result["reasoning"] = json.loads(result["reasoning"])
+    return result
+
+
+class ResultStore:
+    """
+    SQLite store of computed summaries (see module docstring).
+
+    Reads are thread-safe; `record` may be called from any thread or from the
+    event loop (it never blocks on the database).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = RESULT_STORE_BATCH_SIZE,
+        flush_seconds: float = RESULT_STORE_FLUSH_MS / 1000.0,
+    ):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        db = self._connect()
+        db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            db.execute(statement)
+        db.commit()
+
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="result-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store and remember it for `close`."""
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA synchronous=NORMAL")
+        with self._connections_lock:
+            self._connections.append(db)
+        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        """Connection of the calling thread (WAL readers don't wait for the writer)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def record(
+        self, vin: str, version: str, key: Optional[str], result: Mapping[str, Any], latency_seconds: float
+    ) -> None:
+        """
+        Queue a computed summary for the writer thread.
+
+        Args:
+            vin: VIN of the vehicle (normalized before storing).
+            version: Data version of the row the summary was computed from.
+            key: Cache key the summary was computed under.
+            result: The summary (VINResponse fields).
+            latency_seconds: Time it took to produce the summary.
+        """
+        if self._closed:
+            return
+        source = result.get("source")
+        row = StoredResult(
+            vin=normalize_vin(vin),
+            summary=result["summary"],
+            risk_score=result["risk_score"],
+            reasoning=result.get("reasoning") or [],
+            source=source,
+            data_version=version,
+            model=llm.OPENAI_MODEL if source == "llm" else None,
+            latency_ms=round(latency_seconds * 1000.0, 3),
+            computed_at=time.time(),
+        ).model_dump()
+        row["reasoning"] = json.dumps(row["reasoning"])
+        row["cache_key"] = key
+        self._queue.put(tuple(row[column] for column in COLUMNS))
+
+    def _write_loop(self) -> None:
+        """Commit queued rows in batches until `close` (runs on the writer thread)."""
+        db = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            rows, waiters = [], []
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    deadline = 0.0  # someone is waiting: write what we have now
+                elif item is not None:
+                    rows.append(item)
+                if item is None or len(rows) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if rows:
+                try:
+                    with db:
+                        db.executemany(_UPSERT, rows)
+                    RESULT_STORE_WRITE_ROWS.observe(len(rows))
+                except sqlite3.Error as e:
+                    logger.warning("Result store: could not write %d rows: %s", len(rows), e)
+            for waiter in waiters:
+                waiter.set()
+            if item is None:
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every summary queued so far is written. Returns False on timeout."""
+        if self._closed:
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def close(self) -> None:
+        """Write what is queued, stop the writer thread and close every connection."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+
+    def get(self, vin: str, version: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored LLM summary of a vehicle, if it was computed from the same
+        data version and under the same cache key.
+
+        Returns:
+            Optional[Dict]: VINResponse fields with source "store", or None.
+        """
+        row = self._reader().execute(
+            "SELECT summary, risk_score, reasoning FROM results "
+            "WHERE vin = ? AND data_version = ? AND cache_key = ? AND source = 'llm'",
+            (normalize_vin(vin), version, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "vin": vin,
+            "summary": row["summary"],
+            "risk_score": row["risk_score"],
+            "reasoning": json.loads(row["reasoning"]),
+            "source": "store",
+        }
+
+    def history(self, vin: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Every stored data version of a VIN, most recently computed first."""
+        rows = self._reader().execute(
+            f"SELECT {', '.join(StoredResult.model_fields)} FROM results WHERE vin = ? "
+            "ORDER BY computed_at DESC LIMIT ?",
+            (normalize_vin(vin), limit),
+        ).fetchall()
+        return [_to_result(row) for row in rows]
+
+    def query(
+        self,
+        min_risk: Optional[float] = None,
+        max_risk: Optional[float] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        source: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Stored summaries in a risk score and / or computation time range.
+
+        Args:
+            min_risk: Lowest risk score (inclusive).
+            max_risk: Highest risk score (inclusive).
+            since: Earliest computation time, Unix seconds (inclusive).
+            until: Latest computation time, Unix seconds (exclusive).
+            source: Only summaries produced by this path ("llm", "fallback", ...).
+            limit: Maximum number of results.
+
+        Returns:
+            List[Dict]: StoredResult fields, most recently computed first.
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("risk_score >= ?", min_risk),
+            ("risk_score <= ?", max_risk),
+            ("computed_at >= ?", since),
+            ("computed_at < ?", until),
+            ("source = ?", source),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._reader().execute(
+            f"SELECT {', '.join(StoredResult.model_fields)} FROM results {where}ORDER BY computed_at DESC LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [_to_result(row) for row in rows]
+
+
+# Process-wide store used by the API (None when RESULT_STORE_PATH is not set)
+result_store: Optional[ResultStore] = ResultStore(RESULT_STORE_PATH) if RESULT_STORE_PATH else None
+
+
+def _keys(dataset: Dataset, pos: int, vehicle: Mapping[str, Any]) -> Tuple[str, str, str]:
+    """(VIN, data version, cache key) a summary of row `pos` is stored under."""
+    return vehicle.get("VIN") or "", data_version(dataset, pos), cache_key(vehicle, llm.OPENAI_MODEL)
+
+
+def stored_result(dataset: Dataset, pos: int, vehicle: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """The LLM summary of row `pos` from the result store (source "store"), or None."""
+    if result_store is None:
+        return None
+    return result_store.get(*_keys(dataset, pos, vehicle))
+
+
+def stored_results(
+    dataset: Dataset, positions: List[int], vehicles: List[Mapping[str, Any]]
+) -> List[Optional[Dict[str, Any]]]:
+    """`stored_result` for several rows at once (one threadpool hop for a whole batch)."""
+    return [stored_result(dataset, pos, vehicle) for pos, vehicle in zip(positions, vehicles)]
+
+
+def record_result(
+    dataset: Dataset, pos: int, vehicle: Mapping[str, Any], result: Mapping[str, Any], latency_seconds: float
+) -> None:
+    """Queue a freshly computed summary of row `pos` for the result store (cache and store hits are skipped)."""
+    if result_store is None or result.get("source") in NOT_COMPUTED:
+        return
+    result_store.record(*_keys(dataset, pos, vehicle), result, latency_seconds)
@@ -0,0 +1,120 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for the top-level JSON object streamed by the LLM.
+
+    Text is fed in arbitrary chunks (e.g. token deltas). Each top-level
+    key/value pair is returned as soon as its value is complete, so
+    "summary" is available before "reasoning" has started streaming.
+    Anything before the first "{" (such as a markdown fence) is ignored.
+
+    Example:
+        parser = IncrementalJSONParser()
+        parser.feed('{"summary": "Low ri')   # → []
+        parser.feed('sk vehicle.", "risk')   # → [("summary", "Low risk vehicle.")]
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._phase = "start"  # start → key → colon → value_start → value → after → done
+        self._token_start = 0
+        self._key = ""
+        self.fields: Dict[str, Any] = {}
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level object has been closed."""
+        return self._phase == "done"
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk (str): Next piece of the LLM output.
+
+        Returns:
+            List[Tuple[str, Any]]: (key, value) pairs completed by this chunk.
+        """
+        self._buf += chunk
+        completed: List[Tuple[str, Any]] = []
+
+        while self._pos < len(self._buf) and self._phase != "done":
+            i, c = self._pos, self._buf[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._phase == "key":
+                        self._key = json.loads(self._buf[self._token_start:i + 1])
+                        self._phase = "colon"
+                    elif self._phase == "value" and self._depth == 1:
+                        self._complete(self._buf[self._token_start:i + 1], completed)
+                continue
+
+            if self._phase == "start":
+                if c == "{":
+                    self._depth, self._phase = 1, "key"
+            elif self._phase == "key":
+                if c == '"':
+                    self._in_string, self._token_start = True, i
+                elif c == "}":
+                    self._phase = "done"
+            elif self._phase == "colon":
+                if c == ":":
+                    self._phase = "value_start"
+            elif self._phase == "value_start":
+                if not c.isspace():
+                    self._phase, self._token_start = "value", i
+                    self._pos = i  # re-read this character as part of the value
+            elif self._phase == "value":
+                if c == '"':
+                    self._in_string = True
+                elif c in "[{":
+                    self._depth += 1
+                elif c in "]}":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        self._complete(self._buf[self._token_start:i + 1], completed)
+                    elif self._depth == 0:
+                        # "}" closing the top-level object right after a scalar value
+                        self._complete(self._buf[self._token_start:i], completed)
+                        self._phase = "done"
+                elif c == "," and self._depth == 1:
+                    self._complete(self._buf[self._token_start:i], completed)
+                    self._phase = "key"
+            elif self._phase == "after":
+                if c == ",":
+                    self._phase = "key"
+                elif c == "}":
+                    self._phase = "done"
+
+        return completed
+
+    def _complete(self, fragment: str, completed: List[Tuple[str, Any]]) -> None:
+        """Decode a finished value and record it (malformed values are skipped)."""
+        if self._phase == "value":
+            self._phase = "after"
+        try:
+            value = json.loads(fragment)
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        completed.append((self._key, value))
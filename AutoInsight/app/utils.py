@@ -1,7 +1,35 @@
-import pandas as pd
+from __future__ import annotations
+
+import hashlib
+import math
+import numbers
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
 import re
 import os
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, Mapping, Union
+
+if TYPE_CHECKING:  # pandas is imported on first use (it dominates import time)
+    import pandas as pd
+
+from app.log import logger
+from app.models import Vehicle
+from app.vin import normalize_vin  # noqa: F401 (re-exported: lookups normalize through app.utils)
+
+
+# Columns converted to numeric dtypes when the inventory is loaded
+NUMERIC_COLUMNS = [
+    "Current price",
+    "Current price to market %",
+    "DOL",
+    "Mileage",
+    "Total VDPs (lifetime)",
+    "Total sales opportunities (lifetime)",
+]
+
+# Bump when the typed snapshot layout changes, to invalidate old snapshots
+SNAPSHOT_FORMAT = "1"
 
 
 def load_csv(path: str) -> pd.DataFrame:
@@ -17,11 +45,187 @@ def load_csv(path: str) -> pd.DataFrame:
     Raises:
         FileNotFoundError: If the file does not exist at the given path.
     """
+    import pandas as pd
+
     if not os.path.exists(path):
         raise FileNotFoundError(f"CSV file not found at {path}")
     return pd.read_csv(path)
 
 
+def type_inventory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the formatted numeric columns ("$30,895 ", "100%", "23,709") to floats.
+
+    Args:
+        df (pd.DataFrame): Raw dataset as read from the CSV.
+
+    Returns:
+        pd.DataFrame: Copy of the dataset with numeric dtypes.
+    """
+    typed = df.copy()
+    for column in NUMERIC_COLUMNS:
+        if column in typed:
+            typed[column] = parse_number_series(typed[column])
+    return typed
+
+
+def snapshot_path(csv_path: str) -> str:
+    """Return the path of the typed Arrow snapshot stored next to a CSV file."""
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def _file_sha256(path: str) -> str:
+    """Hash a file in chunks, so large inventories are not read into memory at once."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def csv_fingerprint(csv_stat: os.stat_result, csv_path: str) -> Dict[str, str]:
+    """Arrow schema metadata identifying the CSV a derived file was built from."""
+    return {
+        "csv_mtime_ns": str(csv_stat.st_mtime_ns),
+        "csv_size": str(csv_stat.st_size),
+        "csv_sha256": _file_sha256(csv_path),
+    }
+
+
+def matches_csv(meta: Mapping[bytes, bytes], csv_stat: os.stat_result, csv_path: str) -> bool:
+    """
+    Check a `csv_fingerprint` (as read back from Arrow schema metadata) against the CSV.
+
+    The fingerprint is trusted when the CSV mtime and size are unchanged; if
+    only the mtime moved (e.g. the file was touched or re-copied) the content
+    hash decides.
+    """
+    unchanged = (
+        meta.get(b"csv_mtime_ns") == str(csv_stat.st_mtime_ns).encode()
+        and meta.get(b"csv_size") == str(csv_stat.st_size).encode()
+    )
+    return unchanged or meta.get(b"csv_sha256") == _file_sha256(csv_path).encode()
+
+
+def _read_snapshot(path: str, csv_stat: os.stat_result, csv_path: str) -> Optional[pa.Table]:
+    """Memory-map a typed snapshot if it still matches the CSV (zero-copy: the table's buffers are the mapped file)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        meta = reader.schema.metadata or {}
+        if meta.get(b"format") != SNAPSHOT_FORMAT.encode() or not matches_csv(meta, csv_stat, csv_path):
+            return None
+        return reader.read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def _write_snapshot(df: pd.DataFrame, path: str, csv_stat: os.stat_result, csv_path: str) -> None:
+    """Write the typed dataset as an Arrow IPC file (atomically, via a temp file)."""
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata({
+        "format": SNAPSHOT_FORMAT,
+        **csv_fingerprint(csv_stat, csv_path),
+    })
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        # Read-only data directories are fine: we just re-parse next time
+        logger.warning("Could not write typed snapshot %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_typed(path: str, use_snapshot: bool) -> Union[pa.Table, pd.DataFrame]:
+    """The mapped typed snapshot if it matches the CSV, else the CSV parsed and typed (snapshot rewritten)."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"CSV file not found at {path}")
+    if not use_snapshot:
+        return type_inventory(load_csv(path))
+
+    csv_stat = os.stat(path)
+    cached_path = snapshot_path(path)
+    table = _read_snapshot(cached_path, csv_stat, path)
+    if table is not None:
+        return table
+    df = type_inventory(load_csv(path))
+    _write_snapshot(df, cached_path, csv_stat, path)
+    return df
+
+
+def load_inventory(path: str, use_snapshot: bool = True) -> pd.DataFrame:
+    """
+    Load the CSV dataset with numeric columns already typed.
+
+    Parsing is done once: the typed result is cached as an Arrow IPC snapshot
+    next to the CSV (keyed on the CSV mtime, size and SHA-256), and later
+    loads memory-map that snapshot instead of re-parsing the CSV. Converting
+    the snapshot to pandas copies it: callers that can work on Arrow should
+    use `load_inventory_table`.
+
+    Args:
+        path (str): Path to the CSV file.
+        use_snapshot (bool): Read/write the typed snapshot (default True).
+
+    Returns:
+        pd.DataFrame: Typed dataset.
+
+    Raises:
+        FileNotFoundError: If the file does not exist at the given path.
+    """
+    typed = _load_typed(path, use_snapshot)
+    return typed.to_pandas() if isinstance(typed, pa.Table) else typed
+
+
+def load_inventory_table(path: str, use_snapshot: bool = True) -> pa.Table:
+    """
+    Like `load_inventory`, as an Arrow table.
+
+    When the typed snapshot is current, the table is the memory-mapped
+    snapshot itself (no copy, pages shared through the OS page cache).
+
+    Args:
+        path (str): Path to the CSV file.
+        use_snapshot (bool): Read/write the typed snapshot (default True).
+
+    Returns:
+        pa.Table: Typed dataset.
+
+    Raises:
+        FileNotFoundError: If the file does not exist at the given path.
+    """
+    typed = _load_typed(path, use_snapshot)
+    return typed if isinstance(typed, pa.Table) else pa.Table.from_pandas(typed, preserve_index=False)
+
+
+def build_vin_index(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Build a hash index from normalized VIN to row position.
+
+    The index is built once so that lookups cost O(1) instead of scanning
+    the whole VIN column on every request. If the same VIN appears more
+    than once, the first occurrence wins (matching the old ``row.iloc[0]``
+    behaviour); later duplicates are ignored.
+
+    Args:
+        df (pd.DataFrame): Loaded dataset with a "VIN" column.
+
+    Returns:
+        Dict[str, int]: Mapping of normalized VIN → positional row index.
+    """
+    present = df["VIN"].notna().to_numpy()
+    keys = df["VIN"][present].astype(str).str.strip().str.upper()
+    positions = np.flatnonzero(present)
+
+    # Keep only the first occurrence of each normalized VIN
+    first = ~keys.duplicated(keep="first").to_numpy()
+    return dict(zip(keys.to_numpy()[first].tolist(), positions[first].tolist()))
+
+
 def parse_number(value: Any) -> Optional[float]:
     """
     Convert mixed-format strings into floats.
@@ -37,7 +241,7 @@ def parse_number(value: Any) -> Optional[float]:
     Returns:
         Optional[float]: Parsed float value, or None if parsing fails.
     """
-    if pd.isna(value):
+    if value is None or (isinstance(value, numbers.Real) and math.isnan(value)):
         return None
     if isinstance(value, (int, float)):
         return float(value)
@@ -57,12 +261,141 @@ def parse_number(value: Any) -> Optional[float]:
         return None
 
 
-def deterministic_summary(row: Dict[str, Any]) -> Dict[str, Any]:
+# Raw CSV columns feeding the deterministic risk score
+SCORE_COLUMNS = {
+    "price_to_market": "Current price to market %",
+    "days_on_lot": "DOL",
+    "mileage": "Mileage",
+    "vdp_views": "Total VDPs (lifetime)",
+}
+
+# Weights for each normalized contributor (days, price, mileage, views)
+W_DAYS, W_PRICE, W_MILEAGE, W_VIEWS = 0.45, 0.30, 0.15, 0.10
+
+
+def parse_number_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized counterpart of `parse_number` for a whole column.
+
+    Numeric values pass straight through; strings are cleaned of $, commas
+    and % before the first number is extracted, exactly like `parse_number`.
+
+    Args:
+        series (pd.Series): Column of mixed-format values.
+
+    Returns:
+        pd.Series: Float column, NaN where parsing fails.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(float)
+
+    is_str = series.map(type).eq(str)
+    parsed = pd.to_numeric(series.where(~is_str), errors="coerce").astype(float)
+
+    strings = series[is_str].str.strip().str.replace(r"[\$,%]", "", regex=True)
+    extracted = strings.str.extract(r"(-?\d+\.?\d*)", expand=False).astype(float)
+    parsed[is_str] = extracted
+    return parsed
+
+
+def risk_components(price_to_market, days_on_lot, mileage, vdp_views) -> Dict[str, Any]:
+    """
+    Apply the weighted risk formula to scalars or NumPy arrays.
+
+    Both `deterministic_summary` and `score_inventory` go through this
+    function, so per-row and whole-inventory scores are identical.
+
+    Args:
+        price_to_market: Price to market percentage (100 = market price).
+        days_on_lot: Days the vehicle has been on the lot.
+        mileage: Odometer reading.
+        vdp_views: Lifetime vehicle detail page views.
+
+    Returns:
+        Dict[str, Any]: Normalized contributors (ndays, nprice, nmileage,
+        nviews), the weighted sum and the 1.0–10.0 risk score.
+    """
+    # Normalize contributors (0..1)
+    ndays = np.minimum(days_on_lot / 120.0, 1.0)
+    nprice = np.minimum(np.maximum(price_to_market - 100.0, -50.0) / 50.0, 1.0)  # relative to 100%
+    nmileage = np.minimum(mileage / 200000.0, 1.0)
+    nviews = 1.0 - np.minimum(vdp_views / 2000.0, 1.0)  # more views → lower risk
+
+    # Weighted risk calculation
+    weighted = (
+        W_DAYS * ndays + W_PRICE * nprice + W_MILEAGE * nmileage + W_VIEWS * nviews
+    )
+    risk_score = np.maximum(1.0, np.minimum(10.0, weighted * 10))  # Scale to 1–10
+
+    return {
+        "ndays": ndays,
+        "nprice": nprice,
+        "nmileage": nmileage,
+        "nviews": nviews,
+        "weighted": weighted,
+        "risk_score": risk_score,
+    }
+
+
+def score_inventory(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every vehicle in the dataset at once using NumPy column operations.
+
+    Args:
+        df (pd.DataFrame): Loaded dataset.
+
+    Returns:
+        pd.DataFrame: One row per vehicle (same index as `df`) with the parsed
+        reasoning inputs (price_to_market, days_on_lot, mileage, vdp_views),
+        the normalized contributors, the weighted sum and the risk score.
+    """
+    import pandas as pd
+
+    inputs = {
+        name: parse_number_series(df[column]).fillna(0.0).to_numpy()
+        if column in df
+        else np.zeros(len(df))
+        for name, column in SCORE_COLUMNS.items()
+    }
+    scores = pd.DataFrame(inputs, index=df.index)
+    for name, values in risk_components(**inputs).items():
+        scores[name] = values
+    return scores
+
+
+def vehicle_from_row(row: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None) -> Vehicle:
+    """
+    Build a `Vehicle` record from a row dict.
+
+    Args:
+        row (Mapping[str, Any]): Row of vehicle data.
+        scores (Optional[Mapping[str, Any]]): Precomputed row from
+            `score_inventory`. When omitted, the numeric fields are parsed and
+            scored here.
+
+    Returns:
+        Vehicle: Typed record for the row.
+    """
+    if scores is None:
+        inputs = {
+            name: float(parse_number(row.get(column)) or 0.0)
+            for name, column in SCORE_COLUMNS.items()
+        }
+        scores = {**inputs, **risk_components(**inputs)}
+    return Vehicle(tuple(row.keys()), tuple(row.values()), [scores[name] for name in Vehicle.SCORE_FIELDS])
+
+
+def deterministic_summary(row: Mapping[str, Any], scores: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
     """
     Generate a fallback VIN summary and risk score without LLM.
 
     Args:
-        row (Dict[str, Any]): Row of vehicle data from dataset.
+        row (Mapping[str, Any]): `Vehicle` record, or row of vehicle data from dataset.
+        scores (Optional[Mapping[str, Any]]): Precomputed row from
+            `score_inventory` for a plain row. When given (or when `row` is a
+            `Vehicle`), the numeric fields are not re-parsed.
 
     Returns:
         Dict[str, Any]: Summary dictionary containing:
@@ -71,34 +404,19 @@ def deterministic_summary(row: Dict[str, Any]) -> Dict[str, Any]:
             - risk_score (float): Risk rating scaled 1.0–10.0
             - reasoning (list[str]): Explanation of weighted factors
     """
-    # Vehicle basics
-    vin = str(row.get("VIN", "")).upper().strip()
-    year = (
-        int(row.get("Year"))
-        if row.get("Year") and not pd.isna(row.get("Year"))
-        else None
-    )
-    make = str(row.get("Make", "Unknown")).upper()
-    model = row.get("Model", "Unknown")
-
-    # Parse numeric fields
-    price_to_market = parse_number(row.get("Current price to market %")) or 0.0
-    days_on_lot = parse_number(row.get("DOL")) or 0
-    mileage = parse_number(row.get("Mileage")) or 0
-    vdp_views = parse_number(row.get("Total VDPs (lifetime)")) or 0
+    vehicle = row if isinstance(row, Vehicle) else vehicle_from_row(row, scores)
 
-    # Normalize contributors (0..1)
-    ndays = min(days_on_lot / 120.0, 1.0)
-    nprice = min(max(price_to_market - 100.0, -50.0) / 50.0, 1.0)  # relative to 100%
-    nmileage = min(mileage / 200000.0, 1.0)
-    nviews = 1.0 - min(vdp_views / 2000.0, 1.0)  # more views → lower risk
+    # Vehicle basics
+    vin, year, make, model = vehicle.vin, vehicle.year, vehicle.make, vehicle.model
 
-    # Weighted risk calculation
-    w_days, w_price, w_mileage, w_views = 0.45, 0.30, 0.15, 0.10
-    weighted = (
-        w_days * ndays + w_price * nprice + w_mileage * nmileage + w_views * nviews
-    )
-    risk_score = max(1.0, min(10.0, weighted * 10))  # Scale to 1–10
+    price_to_market = vehicle.price_to_market
+    days_on_lot = vehicle.days_on_lot
+    mileage = vehicle.mileage
+    vdp_views = vehicle.vdp_views
+    ndays, nprice = vehicle.ndays, vehicle.nprice
+    nmileage, nviews = vehicle.nmileage, vehicle.nviews
+    weighted = vehicle.weighted
+    risk_score = vehicle.risk_score
 
     # Pricing description (relative to 100% = market)
     diff = price_to_market - 100
@@ -117,13 +435,22 @@ def deterministic_summary(row: Dict[str, Any]) -> Dict[str, Any]:
 
     # Step-by-step reasoning
     reasoning = [
-        f"days_on_lot={int(days_on_lot)} (norm {ndays:.2f}, w={w_days})",
-        f"price_to_market={price_to_market:.2f}% (norm {nprice:.2f}, w={w_price})",
-        f"mileage={int(mileage):,} (norm {nmileage:.2f}, w={w_mileage})",
-        f"vdp_views={int(vdp_views)} (inv-norm {nviews:.2f}, w={w_views})",
+        f"days_on_lot={int(days_on_lot)} (norm {ndays:.2f}, w={W_DAYS})",
+        f"price_to_market={price_to_market:.2f}% (norm {nprice:.2f}, w={W_PRICE})",
+        f"mileage={int(mileage):,} (norm {nmileage:.2f}, w={W_MILEAGE})",
+        f"vdp_views={int(vdp_views)} (inv-norm {nviews:.2f}, w={W_VIEWS})",
         f"Weighted={weighted:.3f} → risk {risk_score:.2f}/10"
     ]
 
+    # Market context from comparable vehicles, when attached (see app.comparables)
+    market = vehicle.market
+    if market:
+        reasoning.append(
+            f"comparables={market['comparables']} similar {make} {model}: "
+            f"median days_on_lot={market['median_days_on_lot']:.0f} (this one {int(days_on_lot)}), "
+            f"median price_to_market={market['median_price_to_market']:.1f}% (this one {price_to_market:.1f}%)"
+        )
+
     return {
         "vin": vin,
         "summary": summary,
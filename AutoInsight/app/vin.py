@@ -0,0 +1,100 @@
+import os
+from typing import Any, Optional
+
+# --- ENVIRONMENT ---
+# How strictly requested VINs are checked before any lookup:
+#   "strict"  - 17 characters, VIN alphabet and ISO 3779 check digit (North American VINs)
+#   "charset" - 17 characters and VIN alphabet only (VINs without a check digit)
+#   "off"     - no check (any 5-50 character string is looked up)
+VIN_VALIDATION = os.getenv("VIN_VALIDATION", "strict").lower()
+
+# Length of a VIN (ISO 3779)
+VIN_LENGTH = 17
+
+# Characters a VIN may contain (I, O and Q are excluded, to avoid confusion with 1 and 0)
+VIN_ALPHABET = frozenset("0123456789ABCDEFGHJKLMNPRSTUVWXYZ")
+
+# Check digit: transliteration of each character and weight of each position
+_VALUES = {
+    **{str(digit): digit for digit in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7,
+    "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def normalize_vin(vin: Any) -> str:
+    """
+    Normalize a VIN for lookups (trim whitespace + convert to uppercase).
+
+    Args:
+        vin (Any): Raw VIN value from a request or the dataset.
+
+    Returns:
+        str: Normalized VIN string.
+    """
+    return str(vin).strip().upper()
+
+
+def check_digit(vin: str) -> str:
+    """
+    ISO 3779 check digit (position 9) of a normalized 17-character VIN.
+
+    Returns:
+        str: "0"-"9" or "X".
+    """
+    remainder = sum(_VALUES[char] * weight for char, weight in zip(vin, _WEIGHTS)) % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def invalid_characters(text: str) -> str:
+    """Characters of a normalized VIN (or VIN prefix) outside the VIN alphabet, sorted."""
+    return "".join(sorted(set(text) - VIN_ALPHABET))
+
+
+def prefix_error(prefix: str, mode: Optional[str] = None) -> Optional[str]:
+    """
+    Why a normalized VIN prefix cannot match any valid VIN (None if it can).
+
+    Args:
+        prefix (str): Normalized VIN prefix.
+        mode (Optional[str]): "strict", "charset" or "off" (default: VIN_VALIDATION).
+    """
+    if (mode or VIN_VALIDATION) == "off":
+        return None
+    if len(prefix) > VIN_LENGTH:
+        return f"VIN prefix longer than {VIN_LENGTH} characters"
+    bad = invalid_characters(prefix)
+    if bad:
+        return f"VIN prefix contains invalid characters: {bad}"
+    return None
+
+
+def vin_error(vin: Any, mode: Optional[str] = None) -> Optional[str]:
+    """
+    Why a VIN is invalid, checked without any lookup.
+
+    Args:
+        vin (Any): Raw VIN (normalized here).
+        mode (Optional[str]): "strict", "charset" or "off" (default: VIN_VALIDATION).
+
+    Returns:
+        Optional[str]: Error message, or None if the VIN is valid.
+    """
+    mode = mode or VIN_VALIDATION
+    if mode == "off":
+        return None
+    vin = normalize_vin(vin)
+    if len(vin) != VIN_LENGTH:
+        return f"VIN must be {VIN_LENGTH} characters long (got {len(vin)})"
+    bad = invalid_characters(vin)
+    if bad:
+        return f"VIN contains invalid characters: {bad} (only digits and letters other than I, O and Q)"
+    if mode == "strict":
+        expected = check_digit(vin)
+        if vin[8] != expected:
+            return f"VIN check digit mismatch: position 9 is {vin[8]}, expected {expected}"
+    return None
@@ -0,0 +1,211 @@
+"""
+Warm job: precompute LLM summaries for every VIN in the inventory.
+
+Summaries are written to the result store (RESULT_STORE_PATH), so
+interactive `/vin-summary` calls are served from it, and they outlive the
+bounded in-memory LLM cache. Rows whose summary is already stored for the same
+data version, prompts and model are skipped, so a re-run only recomputes rows
+whose data (or the prompt / model) changed since the last run. Without a
+result store the LLM cache is used instead, which must then be on disk
+(LLM_CACHE_PATH). Progress is checkpointed to a JSON file once the rows before
+it are written, so an interrupted run resumes where it stopped.
+
+Usage (from the AutoInsight directory; the CLI defaults to results.sqlite):
+    RESULT_STORE_PATH=results.sqlite python -m app.warm --concurrency 4 --rate 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+import app.llm as llm
+import app.store as store
+from app.cache import cache_key
+from app.comparables import with_market_context
+from app.dataset import INVENTORY_CSV, Dataset, Inventory
+from app.log import logger
+from app.models import Vehicle
+
+# --- ENVIRONMENT ---
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "4"))  # Parallel LLM calls
+WARM_RATE_PER_SECOND = float(os.getenv("WARM_RATE_PER_SECOND", "2"))  # LLM calls started per second (0 = unlimited)
+WARM_CHECKPOINT_PATH = os.getenv("WARM_CHECKPOINT_PATH", "warm_checkpoint.json")
+WARM_CHECKPOINT_EVERY = int(os.getenv("WARM_CHECKPOINT_EVERY", "100"))  # Rows between checkpoints
+
+
+class RateLimiter:
+    """Spaces calls to at most `rate` starts per second (0 = unlimited)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class WarmJob:
+    """
+    Walks the inventory in row order and fills the result store (or, without
+    one, the LLM cache).
+
+    Rows already stored are skipped. Rows whose LLM call failed (fallback,
+    timeout, open circuit) are not stored as LLM summaries, so the next run
+    retries them.
+    """
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        checkpoint_path: str = WARM_CHECKPOINT_PATH,
+        concurrency: int = WARM_CONCURRENCY,
+        rate: float = WARM_RATE_PER_SECOND,
+        checkpoint_every: int = WARM_CHECKPOINT_EVERY,
+    ):
+        self.dataset = dataset
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.stats: Dict[str, Any] = {
+            "running": False, "total": len(dataset), "position": 0,
+            "computed": 0, "skipped": 0, "failed": 0,
+        }
+
+    def _load_checkpoint(self) -> int:
+        """Row position to resume from (0 if there is no matching, unfinished checkpoint)."""
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if (
+            checkpoint.get("source") != self.dataset.source
+            or checkpoint.get("rows") != len(self.dataset)
+            or checkpoint.get("model") != llm.OPENAI_MODEL
+            or checkpoint.get("completed")
+        ):
+            return 0
+        return min(int(checkpoint.get("position", 0)), len(self.dataset))
+
+    def _save_checkpoint(self, position: int) -> None:
+        """Atomically record progress up to `position`."""
+        checkpoint = {
+            "source": self.dataset.source,
+            "rows": len(self.dataset),
+            "model": llm.OPENAI_MODEL,
+            "position": position,
+            "completed": position >= len(self.dataset),
+            "updated_at": time.time(),
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _warmed(self, positions: List[int], vehicles: List[Vehicle]) -> List[bool]:
+        """Which rows already have an LLM summary for their current inputs (SQLite reads: call off the event loop)."""
+        if store.result_store is not None:
+            return [stored is not None for stored in store.stored_results(self.dataset, positions, vehicles)]
+        return [llm.llm_cache.contains(cache_key(vehicle, llm.OPENAI_MODEL)) for vehicle in vehicles]
+
+    async def _warm_row(
+        self, pos: int, vehicle: Mapping[str, Any], semaphore: asyncio.Semaphore, limiter: RateLimiter
+    ) -> None:
+        async with semaphore:
+            await limiter.wait()
+            start = time.perf_counter()
+            result = await llm.agenerate_vin_summary(vehicle, priority="batch")
+        if result.get("source") not in ("llm", "cache"):
+            self.stats["failed"] += 1
+            return
+
+        # A cache hit is still an LLM summary the store doesn't have yet
+        store.record_result(self.dataset, pos, vehicle, {**result, "source": "llm"}, time.perf_counter() - start)
+        self.stats["computed"] += 1
+
+    async def _warm_window(self, start: int, end: int, semaphore: asyncio.Semaphore, limiter: RateLimiter) -> None:
+        """Warm rows [start, end) and wait until their summaries are written."""
+        positions = list(range(start, end))
+        vehicles = [with_market_context(self.dataset, pos, self.dataset.vehicle(pos)) for pos in positions]
+        warmed = await run_in_threadpool(self._warmed, positions, vehicles)
+        self.stats["skipped"] += sum(warmed)
+        await asyncio.gather(*(
+            self._warm_row(pos, vehicle, semaphore, limiter)
+            for pos, vehicle, done in zip(positions, vehicles, warmed) if not done
+        ))
+        if store.result_store is not None:
+            await run_in_threadpool(store.result_store.flush)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Warm every row from the checkpointed position to the end of the inventory.
+
+        Returns:
+            Dict: counts of computed, skipped (already cached) and failed rows.
+        """
+        if not llm.OPENAI_API_KEY:
+            logger.warning("Warm job skipped: OPENAI_API_KEY is not set")
+            return self.stats
+        if store.result_store is None and not llm.llm_cache.disk_enabled:
+            logger.warning("Warm job skipped: set RESULT_STORE_PATH (or LLM_CACHE_PATH) so warmed summaries are kept")
+            return self.stats
+
+        start = self._load_checkpoint()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate)
+        self.stats.update(running=True, position=start)
+        logger.info("Warm job started at row %d of %d", start, len(self.dataset))
+
+        try:
+            for window_start in range(start, len(self.dataset), self.checkpoint_every):
+                window_end = min(window_start + self.checkpoint_every, len(self.dataset))
+                await self._warm_window(window_start, window_end, semaphore, limiter)
+                self._save_checkpoint(window_end)
+                self.stats["position"] = window_end
+        finally:
+            self.stats["running"] = False
+
+        logger.info(
+            "Warm job finished: %d computed, %d skipped, %d failed",
+            self.stats["computed"], self.stats["skipped"], self.stats["failed"],
+        )
+        return self.stats
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute LLM summaries for the whole inventory")
+    parser.add_argument("--csv", default=INVENTORY_CSV)
+    parser.add_argument("--checkpoint", default=WARM_CHECKPOINT_PATH)
+    parser.add_argument("--concurrency", type=int, default=WARM_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=WARM_RATE_PER_SECOND, help="LLM calls per second (0 = unlimited)")
+    parser.add_argument("--checkpoint-every", type=int, default=WARM_CHECKPOINT_EVERY)
+    parser.add_argument("--store", default=store.RESULT_STORE_PATH or "results.sqlite", help="Result store SQLite file")
+    args = parser.parse_args(argv)
+
+    if store.result_store is None:
+        store.result_store = store.ResultStore(args.store)
+
+    job = WarmJob(
+        Inventory(args.csv).current,
+        checkpoint_path=args.checkpoint, concurrency=args.concurrency,
+        rate=args.rate, checkpoint_every=args.checkpoint_every,
+    )
+    print(json.dumps(asyncio.run(job.run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+What-if sweeps: how the deterministic risk score moves when the price is cut
+(or raised) and the vehicle sits on the lot for more days.
+
+The sweep reuses `risk_components` on broadcast arrays: vehicles along the
+first axis, price changes along the second and extra days along the third, so
+a whole vehicles × prices × days grid is one NumPy evaluation of the same
+formula that scores the inventory (vehicles are processed in blocks to bound
+memory). Break-even points invert that formula per vehicle: the price cut that
+keeps the risk at its current level after N more days.
+"""
+import os
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from app.dataset import Dataset
+from app.utils import W_DAYS, W_MILEAGE, W_PRICE, W_VIEWS, risk_components
+
+# --- ENVIRONMENT ---
+WHATIF_MAX_VEHICLES = int(os.getenv("WHATIF_MAX_VEHICLES", "100000"))  # Vehicles accepted by one sweep
+
+# Grid cells evaluated per block (vehicles per block = this / grid size)
+BLOCK_CELLS = 4_000_000
+
+# Score columns the sweep starts from
+INPUT_COLUMNS = ("price_to_market", "days_on_lot", "mileage", "vdp_views", "nmileage", "nviews", "weighted", "risk_score")
+
+# Weighted sums where the 1.0–10.0 score saturates
+MIN_WEIGHTED, MAX_WEIGHTED = 0.1, 1.0
+
+
+def sweep_axis(start: float, stop: float, steps: int) -> np.ndarray:
+    """`steps` evenly spaced values from `start` to `stop` (both included)."""
+    return np.linspace(start, stop, max(1, steps))
+
+
+def _round(values: np.ndarray) -> list:
+    return np.round(values, 4).tolist()
+
+
+def sweep(
+    dataset: Dataset, positions: Sequence[int], price_change_pct: np.ndarray, extra_days: np.ndarray
+) -> Dict[str, Any]:
+    """
+    Risk grid and break-even points for a set of vehicles.
+
+    Args:
+        dataset: Inventory snapshot.
+        positions: Rows to sweep.
+        price_change_pct: Price changes in percent (-10 = price cut by 10%).
+        extra_days: Additional days on lot.
+
+    Returns:
+        Dict: vehicles, baseline_risk (mean current risk score), the sweep
+        axes, risk (mean risk score per [price change][extra days]) and
+        break_even: per extra days, the median price cut (in %, 0 if none is
+        needed) that keeps the risk at or below its current level, and the
+        number of vehicles no price cut can bring back.
+
+    Raises:
+        ValueError: If more than WHATIF_MAX_VEHICLES vehicles are selected.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) > WHATIF_MAX_VEHICLES:
+        raise ValueError(f"{len(positions)} vehicles selected, a sweep accepts at most {WHATIF_MAX_VEHICLES}")
+
+    price_change_pct = np.asarray(price_change_pct, dtype=float)
+    extra_days = np.asarray(extra_days, dtype=float)
+    columns = {name: dataset.score_table.column(name).to_numpy()[positions] for name in INPUT_COLUMNS}
+    n = len(positions)
+
+    result: Dict[str, Any] = {
+        "vehicles": n,
+        "baseline_risk": round(float(columns["risk_score"].mean()), 4) if n else None,
+        "price_change_pct": _round(price_change_pct),
+        "extra_days": _round(extra_days),
+    }
+
+    # Risk grid: the scoring formula broadcast over (vehicle, price change, extra days)
+    price_factor = (1.0 + price_change_pct / 100.0)[None, :, None]
+    risk_sum = np.zeros((len(price_change_pct), len(extra_days)))
+    block = max(1, BLOCK_CELLS // risk_sum.size)
+    for start in range(0, n, block):
+        chunk = {name: values[start:start + block, None, None] for name, values in columns.items()}
+        risk_sum += risk_components(
+            price_to_market=chunk["price_to_market"] * price_factor,
+            days_on_lot=chunk["days_on_lot"] + extra_days[None, None, :],
+            mileage=chunk["mileage"],
+            vdp_views=chunk["vdp_views"],
+        )["risk_score"].sum(axis=0)
+    result["risk"] = [_round(row) for row in risk_sum / n] if n else []
+
+    # Break-even: the price term has to absorb the extra days term
+    ptm = columns["price_to_market"][:, None]
+    ndays = np.minimum((columns["days_on_lot"][:, None] + extra_days[None, :]) / 120.0, 1.0)
+    rest = W_MILEAGE * columns["nmileage"] + W_VIEWS * columns["nviews"]
+    # Any weighted sum keeps a score already at 10; below MIN_WEIGHTED the score stays at 1
+    target = np.where(columns["weighted"] >= MAX_WEIGHTED, np.inf, np.maximum(columns["weighted"], MIN_WEIGHTED))
+    needed = (target[:, None] - rest[:, None] - W_DAYS * ndays) / W_PRICE  # nprice that keeps the risk
+    nprice = np.clip((ptm - 100.0) / 50.0, -1.0, 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cut = np.where(needed >= nprice, 0.0, (1.0 - (100.0 + 50.0 * needed) / ptm) * 100.0)
+    reachable = (needed >= nprice) | ((needed >= -1.0) & (ptm > 0))
+    cut = np.where(reachable, cut, np.nan)
+
+    break_even = []
+    for j, days in enumerate(extra_days.tolist()):
+        cuts = cut[:, j]
+        cuts = cuts[~np.isnan(cuts)]
+        break_even.append({
+            "extra_days": round(days, 4),
+            "price_cut_pct": round(float(np.median(cuts)), 4) if len(cuts) else None,
+            "unreachable": int(n - len(cuts)),
+        })
+    result["break_even"] = break_even
+    return result
+
@@ -0,0 +1,142 @@
+"""
+Local stand-in for the OpenAI Responses API, used by the benchmarks.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any
+OPENAI_API_KEY. Every call sleeps for a configurable latency (plus uniform
+jitter) and answers with a valid VIN summary JSON, or with an HTTP 500 for a
+configurable fraction of calls. GET /stats returns the number of calls served.
+
+Run standalone:
+    python -m benchmarks.fake_llm_server --port 9100 --latency-ms 800 --jitter-ms 200 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Simulated model behaviour
+LATENCY_SECONDS = 0.8  # Mean latency per call
+JITTER_SECONDS = 0.0  # Latency varies uniformly within ±jitter
+ERROR_RATE = 0.0  # Fraction of calls answered with HTTP 500
+
+
+def build_app() -> FastAPI:
+    """Create the fake Responses API application."""
+    fake = FastAPI(title="Fake LLM Server")
+    fake.state.calls = 0
+    fake.state.errors = 0
+
+    @fake.get("/stats")
+    async def stats():
+        return {"calls": fake.state.calls, "errors": fake.state.errors}
+
+    @fake.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        fake.state.calls += 1
+        await asyncio.sleep(max(0.0, LATENCY_SECONDS + random.uniform(-JITTER_SECONDS, JITTER_SECONDS)))
+
+        if random.random() < ERROR_RATE:
+            fake.state.errors += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "fake upstream error", "type": "server_error"}},
+            )
+
+        text = json.dumps({
+            "summary": "Benchmark vehicle summary.",
+            "risk_score": 4.2,
+            "reasoning": ["Days on lot: moderate", "Price near market", "Low mileage"],
+        })
+        if body.get("stream"):
+            return StreamingResponse(stream_text(text), media_type="text/event-stream")
+
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "status": "completed",
+            "output": [{
+                "id": f"msg_{uuid.uuid4().hex}",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": 400,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 120,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 520,
+            },
+        }
+
+    return fake
+
+
+async def stream_text(text: str):
+    """Stream `text` as Responses API output_text delta events, a few characters at a time."""
+    for seq, i in enumerate(range(0, len(text), 8)):
+        event = {
+            "type": "response.output_text.delta",
+            "item_id": "msg_fake",
+            "output_index": 0,
+            "content_index": 0,
+            "delta": text[i:i + 8],
+            "sequence_number": seq,
+        }
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        await asyncio.sleep(0.01)
+    done = {"type": "response.completed", "sequence_number": len(text), "response": {"id": "resp_fake", "output": []}}
+    yield f"event: {done['type']}\ndata: {json.dumps(done)}\n\n"
+
+
+def start_subprocess(port: int, latency_ms: float, jitter_ms: float = 0.0, error_rate: float = 0.0) -> subprocess.Popen:
+    """
+    Start the fake server on 127.0.0.1:`port` in a separate process and wait
+    until it accepts connections. Running it out of process keeps its CPU use
+    from competing with the code being measured.
+    """
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_llm_server", "--port", str(port),
+            "--latency-ms", str(latency_ms), "--jitter-ms", str(jitter_ms), "--error-rate", str(error_rate),
+        ]
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"fake LLM server did not start on port {port}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API server")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_SECONDS * 1000)
+    parser.add_argument("--jitter-ms", type=float, default=JITTER_SECONDS * 1000)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    args = parser.parse_args()
+
+    LATENCY_SECONDS = args.latency_ms / 1000.0
+    JITTER_SECONDS = args.jitter_ms / 1000.0
+    ERROR_RATE = args.error_rate
+    uvicorn.run(build_app(), host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,91 @@
+"""
+Synthetic inventories in the `data/sample_data.csv` schema.
+
+VINs are random 17-character strings over the VIN alphabet (no I, O or Q)
+with a valid ISO 3779 check digit; numeric columns are formatted like the
+real feed ("$30,895 ", "97%", "23,709").
+
+Usage (from the AutoInsight directory):
+    python -m benchmarks.generate_inventory --rows 100000 --out benchmarks/.data/inventory_100k.csv
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# VIN alphabet and ISO 3779 transliteration values / position weights
+VIN_CHARS = np.array(list("0123456789ABCDEFGHJKLMNPRSTUVWXYZ"))
+VIN_VALUES = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9,
+                       1, 2, 3, 4, 5, 6, 7, 8, 1, 2, 3, 4, 5, 7, 9, 2, 3, 4, 5, 6, 7, 8, 9])
+VIN_WEIGHTS = np.array([8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2])
+
+MAKES_MODELS = {
+    "TOYOTA": ["CAMRY", "COROLLA", "RAV4", "TACOMA 2WD", "TUNDRA 4WD", "HIGHLANDER"],
+    "HONDA": ["CIVIC", "ACCORD", "CR-V", "HR-V", "PILOT"],
+    "FORD": ["F-150", "ESCAPE", "EXPLORER", "MUSTANG"],
+    "CHEVROLET": ["SILVERADO 1500", "EQUINOX", "MALIBU", "TAHOE"],
+    "JEEP": ["WRANGLER", "GRAND CHEROKEE", "COMPASS"],
+    "HYUNDAI": ["ELANTRA", "TUCSON", "PALISADE", "SANTA FE"],
+}
+
+# Common sizes used by the benchmark runner
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def random_vins(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate `n` random VINs with valid check digits (vectorized)."""
+    codes = rng.integers(0, len(VIN_CHARS), size=(n, 17))
+    check = (VIN_VALUES[codes] * VIN_WEIGHTS).sum(axis=1) % 11
+    chars = VIN_CHARS[codes]
+    chars[:, 8] = np.where(check == 10, "X", check.astype(str))
+    return np.ascontiguousarray(chars).view("<U17").ravel()
+
+
+def generate(n: int, seed: int = 0) -> pd.DataFrame:
+    """Build a synthetic inventory of `n` vehicles."""
+    rng = np.random.default_rng(seed)
+    pairs = [(make, model) for make, models in MAKES_MODELS.items() for model in models]
+    choice = rng.integers(0, len(pairs), size=n)
+
+    year = rng.integers(2015, 2027, size=n)
+    age = 2026 - year
+    mileage = np.where(age == 0, rng.integers(0, 50, size=n), rng.integers(3_000, 16_000, size=n) * age)
+    price = rng.integers(15_000, 80_000, size=n) * (1 - age * 0.04)
+    to_market = rng.normal(99, 5, size=n).round().astype(int)
+    dol = rng.gamma(2.0, 30.0, size=n).astype(int)
+    vdps = (dol * rng.uniform(0.5, 3.0, size=n)).astype(int)
+    leads = (vdps * rng.uniform(0, 0.05, size=n)).astype(int)
+
+    return pd.DataFrame({
+        "VIN": random_vins(n, rng),
+        "Year": year,
+        "Make": [pairs[i][0] for i in choice],
+        "Model": [pairs[i][1] for i in choice],
+        "Current price": [f"${p:,.0f} " for p in price],
+        "Current price to market %": [f"{p}%" for p in to_market],
+        "DOL": dol,
+        "Mileage": [f"{m:,}" for m in mileage],
+        "Total VDPs (lifetime)": [f"{v:,}" for v in vdps],
+        "Total sales opportunities (lifetime)": leads,
+    })
+
+
+def ensure_inventory(rows: int, directory: str, seed: int = 0) -> str:
+    """Return the path of a cached synthetic inventory with `rows` rows, generating it if needed."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"inventory_{rows}.csv")
+    if not os.path.exists(path):
+        generate(rows, seed).to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic inventory CSV")
+    parser.add_argument("--rows", type=int, default=SIZES["1k"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    generate(args.rows, args.seed).to_csv(args.out, index=False)
+    print(f"Wrote {args.rows:,} rows to {args.out}")
@@ -0,0 +1,112 @@
+"""
+Load test: sync (threadpool) vs async (AsyncOpenAI) LLM request path.
+
+Starts the fake LLM server locally, then pushes the same number of VIN
+summaries through:
+  - sync:  a blocking `OpenAI` call (same prompt and parsing) on the anyio
+           worker threadpool, which is how FastAPI runs a sync `def`
+           endpoint (40 threads by default)
+  - async: `agenerate_vin_summary` awaited on the event loop, which is how
+           the async `/vin-summary` endpoint runs
+
+The LLM cache is disabled, so both modes send every request upstream (the
+modes use the same vehicles, so the async run would otherwise be cache hits).
+Admission control is sized to the concurrency, so the async run measures the
+request path rather than shedding.
+
+Usage (from the AutoInsight directory):
+    python -m benchmarks.load_test --requests 300 --concurrency 150 --latency-ms 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import anyio
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sync vs async LLM path load test")
+    parser.add_argument("--requests", type=int, default=300, help="Total summaries per mode")
+    parser.add_argument("--concurrency", type=int, default=150, help="In-flight requests")
+    parser.add_argument("--latency-ms", type=float, default=2000, help="Fake LLM latency")
+    parser.add_argument("--port", type=int, default=9100, help="Fake LLM server port")
+    return parser.parse_args()
+
+
+def summarize_blocking(client, vehicle) -> dict:
+    """One blocking LLM round trip for `vehicle`, parsed like the app does."""
+    from app.llm import OPENAI_MODEL, build_llm_input, parse_llm_output
+
+    resp = client.responses.create(model=OPENAI_MODEL, input=build_llm_input(vehicle))
+    return parse_llm_output((resp.output_text or "").strip(), vehicle)
+
+
+async def run_sync(vehicles, concurrency: int) -> float:
+    """Drive blocking LLM calls through the anyio threadpool, like a sync FastAPI endpoint."""
+    from openai import OpenAI
+
+    client = OpenAI()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(vehicle):
+        async with semaphore:
+            return await anyio.to_thread.run_sync(summarize_blocking, client, vehicle)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(v) for v in vehicles))
+    elapsed = time.perf_counter() - start
+    assert all(r["source"] == "llm" for r in results), "fake server calls failed"
+    return elapsed
+
+
+async def run_async(vehicles, concurrency: int) -> float:
+    """Drive the async path directly on the event loop, like the async endpoint."""
+    from app.llm import agenerate_vin_summary
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(vehicle):
+        async with semaphore:
+            return await agenerate_vin_summary(vehicle)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(v) for v in vehicles))
+    elapsed = time.perf_counter() - start
+    assert all(r["source"] == "llm" for r in results), "fake server calls failed"
+    return elapsed
+
+
+def main() -> None:
+    args = parse_args()
+
+    from benchmarks.fake_llm_server import start_subprocess
+    server = start_subprocess(args.port, args.latency_ms)
+
+    # The OpenAI clients and admission control read these when app.llm is imported
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("LLM_MAX_INFLIGHT", str(args.concurrency))
+    sys.path.insert(0, os.getcwd())
+
+    import app.llm as llm
+    from app.cache import LLMCache
+    from app.utils import load_inventory
+
+    llm.llm_cache = LLMCache(max_entries=0)
+    df = load_inventory(os.path.join("data", "sample_data.csv"))
+    rows = df.to_dict(orient="records")
+    vehicles = [rows[i % len(rows)] for i in range(args.requests)]
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, fake LLM latency {args.latency_ms:.0f} ms")
+    try:
+        for name, runner in (("sync (threadpool)", run_sync), ("async (AsyncOpenAI)", run_async)):
+            elapsed = asyncio.run(runner(vehicles, args.concurrency))
+            print(f"  {name:<20} {elapsed:7.2f} s  {args.requests / elapsed:8.1f} req/s")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
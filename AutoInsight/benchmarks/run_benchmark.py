@@ -0,0 +1,304 @@
+"""
+Reproducible load / latency benchmark for `app.main:app`.
+
+For each inventory size the runner:
+  1. generates (or reuses) a synthetic inventory CSV in the sample_data schema
+  2. starts the fake LLM server and the API under uvicorn, pointed at both
+  3. drives /vin-summary, /vin-summary/batch and /vin-summary/stream at a
+     fixed concurrency and records p50/p95/p99 latency, throughput and errors
+  4. records the time until the API accepts connections and until /ready
+     answers 200, and the API process RSS (current and peak)
+
+It also records how long importing `app.main` takes.
+
+Results are written as JSON to benchmarks/results/, so runs can be compared.
+
+Usage (from the AutoInsight directory):
+    python -m benchmarks.run_benchmark --sizes 1k 100k --requests 500 --concurrency 32
+    python -m benchmarks.run_benchmark --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_llm_server import start_subprocess
+from benchmarks.generate_inventory import SIZES, ensure_inventory
+
+DATA_DIR = os.path.join("benchmarks", ".data")
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AutoInsight load / latency benchmark")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k"], help=f"Inventory sizes ({', '.join(SIZES)} or a row count)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="In-flight requests per scenario")
+    parser.add_argument("--batch-size", type=int, default=50, help="VINs per /vin-summary/batch request")
+    parser.add_argument("--scenarios", nargs="+", default=["vin-summary", "batch", "stream"])
+    parser.add_argument("--latency-ms", type=float, default=300, help="Fake LLM mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Fake LLM latency jitter (±)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake LLM error rate")
+    parser.add_argument("--cache-size", type=int, default=0, help="LLM_CACHE_SIZE for the API (0 = every call reaches the LLM)")
+    parser.add_argument("--fast-startup", action="store_true", help="Start the API with FAST_STARTUP (load the inventory after binding)")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--llm-port", type=int, default=9100)
+    parser.add_argument("--out", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two result files and exit")
+    return parser.parse_args()
+
+
+def rss_mb(pid: int) -> Dict[str, float]:
+    """Current (VmRSS) and peak (VmHWM) resident memory of a process, in MB (Linux only)."""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key = "rss_mb" if line.startswith("VmRSS") else "peak_rss_mb"
+                    usage[key] = int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return usage
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    """Latency percentiles (ms), throughput and error count for one scenario."""
+    ms = np.array(latencies) * 1000.0 if latencies else np.array([np.nan])
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(float(np.mean(ms)), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(np.max(ms)), 2),
+    }
+
+
+async def drive(n: int, concurrency: int, request: Callable[[int], Awaitable[Optional[float]]]) -> Dict[str, Any]:
+    """
+    Run `request(i)` for i in range(n) with at most `concurrency` in flight.
+
+    `request` returns its own latency in seconds (or None to use the full call
+    time); any exception counts as an error.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    extra: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                first = await request(i)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            if first is not None:
+                extra.append(first)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    result = summarize(latencies, errors, time.perf_counter() - start)
+    if extra:
+        result["time_to_first_field_p50_ms"] = round(float(np.percentile(extra, 50)) * 1000.0, 2)
+        result["time_to_first_field_p95_ms"] = round(float(np.percentile(extra, 95)) * 1000.0, 2)
+    return result
+
+
+async def run_scenarios(base_url: str, vins: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive every requested scenario against a running API."""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results: Dict[str, Any] = {}
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        async def vin_summary(i: int) -> None:
+            response = await client.post("/vin-summary", json={"vin": vins[i % len(vins)]})
+            response.raise_for_status()
+
+        async def batch(i: int) -> None:
+            start = (i * args.batch_size) % len(vins)
+            chunk = (vins * 2)[start:start + args.batch_size]
+            response = await client.post("/vin-summary/batch", json={"vins": chunk})
+            response.raise_for_status()
+
+        async def stream(i: int) -> float:
+            start = time.perf_counter()
+            first_field = None
+            async with client.stream("POST", "/vin-summary/stream", json={"vin": vins[i % len(vins)]}) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if first_field is None and line.startswith("event: field"):
+                        first_field = time.perf_counter() - start
+            return first_field if first_field is not None else time.perf_counter() - start
+
+        scenarios = {"vin-summary": (vin_summary, args.requests), "batch": (batch, max(1, args.requests // args.batch_size)), "stream": (stream, args.requests)}
+        for name in args.scenarios:
+            request, n = scenarios[name]
+            results[name] = await drive(n, args.concurrency, request)
+            print(f"    {name:<12} {results[name]['throughput_rps']:>8.1f} req/s  "
+                  f"p50 {results[name]['p50_ms']:>8.1f} ms  p95 {results[name]['p95_ms']:>8.1f} ms  "
+                  f"p99 {results[name]['p99_ms']:>8.1f} ms  errors {results[name]['errors']}")
+
+        cache = (await client.get("/cache/stats")).json()
+    results["cache"] = {k: cache.get(k) for k in ("hits", "misses", "hit_rate")}
+    return results
+
+
+def start_app(csv_path: str, args: argparse.Namespace) -> subprocess.Popen:
+    """Start the API under uvicorn, pointed at the inventory and the fake LLM server."""
+    env = {
+        **os.environ,
+        "INVENTORY_CSV": csv_path,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "LLM_CACHE_SIZE": str(args.cache_size),
+        "LLM_MAX_CONCURRENCY": str(args.concurrency),
+        "FAST_STARTUP": "true" if args.fast_startup else "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(args.app_port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def import_seconds() -> float:
+    """Time to import `app.main` in a fresh interpreter (median of 3)."""
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    times = [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout) for _ in range(3)]
+    return float(np.median(times))
+
+
+def wait_until_up(url: str, proc: subprocess.Popen, timeout: float = 600.0) -> None:
+    """Poll `url` until it answers 200 (or the process dies / times out)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("API process exited during startup")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"API did not come up at {url}")
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the benchmark for every requested size and return the results document."""
+    imported = import_seconds()
+    print(f"  import app.main {imported:.2f} s")
+    llm_server = start_subprocess(args.llm_port, args.latency_ms, args.jitter_ms, args.error_rate)
+    runs = []
+    try:
+        for size in args.sizes:
+            rows = SIZES.get(size.lower()) or int(size)
+            csv_path = ensure_inventory(rows, DATA_DIR)
+            vins = pd.read_csv(csv_path, usecols=["VIN"])["VIN"].sample(
+                n=min(rows, args.requests * 2), random_state=0
+            ).tolist()
+            print(f"  {rows:,} rows ({csv_path})")
+
+            start = time.perf_counter()
+            app_proc = start_app(csv_path, args)
+            try:
+                base_url = f"http://127.0.0.1:{args.app_port}"
+                wait_until_up(f"{base_url}/", app_proc)
+                listening = time.perf_counter() - start
+                wait_until_up(f"{base_url}/ready", app_proc)
+                startup = time.perf_counter() - start
+                after_start = rss_mb(app_proc.pid)
+                print(f"    listening {listening:.2f} s, ready {startup:.2f} s, RSS {after_start.get('rss_mb', 0):.0f} MB")
+
+                scenarios = asyncio.run(run_scenarios(base_url, vins, args))
+                runs.append({
+                    "size": size,
+                    "rows": rows,
+                    "listening_seconds": round(listening, 3),
+                    "startup_seconds": round(startup, 3),
+                    "rss_after_start_mb": round(after_start.get("rss_mb", 0.0), 1),
+                    **{k: round(v, 1) for k, v in rss_mb(app_proc.pid).items()},
+                    "scenarios": scenarios,
+                })
+            finally:
+                app_proc.terminate()
+                app_proc.wait()
+    finally:
+        llm_server.terminate()
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "import_seconds": round(imported, 3),
+            "args": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        },
+        "runs": runs,
+    }
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    """Print per-size, per-scenario metric changes between two result files."""
+    with open(baseline_path) as f:
+        document = json.load(f)
+        baseline, baseline_meta = {r["size"]: r for r in document["runs"]}, document["meta"]
+    with open(candidate_path) as f:
+        document = json.load(f)
+        candidate, candidate_meta = {r["size"]: r for r in document["runs"]}, document["meta"]
+
+    metrics = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+    old_import, new_import = baseline_meta.get("import_seconds"), candidate_meta.get("import_seconds")
+    if old_import is not None and new_import is not None:
+        print(f"import app.main {old_import:.2f} → {new_import:.2f} s")
+    for size in baseline.keys() & candidate.keys():
+        old, new = baseline[size], candidate[size]
+        if "listening_seconds" in old and "listening_seconds" in new:
+            print(f"{size}: listening {old['listening_seconds']:.2f} → {new['listening_seconds']:.2f} s")
+        print(f"{size}: startup {old['startup_seconds']:.2f} → {new['startup_seconds']:.2f} s, "
+              f"peak RSS {old.get('peak_rss_mb', 0):.0f} → {new.get('peak_rss_mb', 0):.0f} MB")
+        for name in old["scenarios"].keys() & new["scenarios"].keys():
+            if name == "cache":
+                continue
+            changes = []
+            for metric in metrics:
+                a, b = old["scenarios"][name][metric], new["scenarios"][name][metric]
+                change = (b - a) / a * 100.0 if a else 0.0
+                changes.append(f"{metric} {a:.1f} → {b:.1f} ({change:+.1f}%)")
+            print(f"  {name:<12} " + ", ".join(changes))
+
+
+def main() -> None:
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
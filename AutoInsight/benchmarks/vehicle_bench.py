@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: per-request row handling, pandas row dicts vs `Vehicle` records.
+
+For random row positions, times each stage a `/vin-summary` request runs
+before the LLM call:
+  - pandas: `df.iloc[pos].to_dict()` + the score row, `deterministic_summary`
+            on the dict, `build_llm_input` and `cache_key`
+  - vehicle: `Dataset.vehicle(pos)` (read straight from the column arrays),
+             then the same consumers on the record
+
+Usage (from the AutoInsight directory):
+    python -m benchmarks.vehicle_bench --rows 100000 --samples 20000
+"""
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.cache import cache_key
+from app.dataset import Dataset
+from app.llm import build_llm_input
+from app.utils import deterministic_summary, load_inventory, score_inventory
+from benchmarks.generate_inventory import ensure_inventory
+
+DATA_DIR = "benchmarks/.data"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="pandas row dict vs Vehicle record micro-benchmark")
+    parser.add_argument("--rows", type=int, default=100_000, help="Synthetic inventory size")
+    parser.add_argument("--samples", type=int, default=20_000, help="Rows looked up per stage")
+    return parser.parse_args()
+
+
+def time_per_call(fn: Callable[[int], object], positions: List[int]) -> float:
+    """Mean microseconds per call of `fn` over `positions`."""
+    start = time.perf_counter()
+    for pos in positions:
+        fn(pos)
+    return (time.perf_counter() - start) / len(positions) * 1e6
+
+
+def main() -> None:
+    args = parse_args()
+    df = load_inventory(ensure_inventory(args.rows, DATA_DIR))
+    scores = score_inventory(df)
+    dataset = Dataset.from_frame(df, "benchmark", scores=scores)
+    positions = np.random.default_rng(0).integers(0, len(df), args.samples).tolist()
+
+    rows = {pos: (df.iloc[pos].to_dict(), scores.iloc[pos]) for pos in set(positions)}
+    vehicles = {pos: dataset.vehicle(pos) for pos in set(positions)}
+
+    stages: Dict[str, Dict[str, Callable[[int], object]]] = {
+        "row access": {
+            "pandas": lambda pos: (df.iloc[pos].to_dict(), scores.iloc[pos]),
+            "vehicle": dataset.vehicle,
+        },
+        "deterministic_summary": {
+            "pandas": lambda pos: deterministic_summary(*rows[pos]),
+            "vehicle": lambda pos: deterministic_summary(vehicles[pos]),
+        },
+        "build_llm_input": {
+            "pandas": lambda pos: build_llm_input(rows[pos][0]),
+            "vehicle": lambda pos: build_llm_input(vehicles[pos]),
+        },
+        "cache_key": {
+            "pandas": lambda pos: cache_key(rows[pos][0], "model"),
+            "vehicle": lambda pos: cache_key(vehicles[pos], "model"),
+        },
+    }
+
+    print(f"{args.rows:,} rows, {args.samples:,} lookups (µs per call)")
+    print(f"  {'stage':<24}{'pandas':>10}{'vehicle':>10}{'speedup':>10}")
+    totals = {"pandas": 0.0, "vehicle": 0.0}
+    for stage, paths in stages.items():
+        results = {name: time_per_call(fn, positions) for name, fn in paths.items()}
+        for name, value in results.items():
+            totals[name] += value
+        print(f"  {stage:<24}{results['pandas']:>10.1f}{results['vehicle']:>10.1f}{results['pandas'] / results['vehicle']:>9.1f}x")
+    print(f"  {'total':<24}{totals['pandas']:>10.1f}{totals['vehicle']:>10.1f}{totals['pandas'] / totals['vehicle']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
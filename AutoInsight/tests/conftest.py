@@ -0,0 +1,37 @@
+import json
+import os
+import types
+import pytest
+import app.store as store
+from app.dataset import Dataset
+from app.store import ResultStore
+from app.utils import load_inventory
+
+CSV_PATH = os.path.join("data", "sample_data.csv")
+LLM_TEXT = json.dumps({"summary": "LLM summary.", "risk_score": 8.0, "reasoning": ["a"]})
+
+
+class CountingAsyncResponses:
+    """Async `client.responses` stand-in that counts calls and returns LLM_TEXT."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return types.SimpleNamespace(output_text=LLM_TEXT)
+
+
+@pytest.fixture
+def result_store(tmp_path, monkeypatch):
+    """A fresh result store in a temporary file, used by the API and the warm job."""
+    result_store = ResultStore(str(tmp_path / "results.sqlite"), flush_seconds=0.01)
+    monkeypatch.setattr(store, "result_store", result_store)
+    yield result_store
+    result_store.close()
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """The sample inventory as a Dataset, built once for the whole run."""
+    return Dataset.from_frame(load_inventory(CSV_PATH), CSV_PATH)
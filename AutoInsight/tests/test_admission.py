@@ -0,0 +1,127 @@
+import asyncio
+import json
+import types
+import app.llm as llm
+from app.admission import AdmissionController
+from app.cache import LLMCache
+from app.metrics import LLM_SHED_TOTAL
+from app.resilience import CircuitBreaker
+
+LLM_TEXT = json.dumps({"summary": "Admitted summary.", "risk_score": 4.0, "reasoning": ["a"]})
+VEHICLE = {"VIN": "ADMIT0001", "Year": 2020, "Make": "Honda", "Model": "Civic", "Mileage": 50000.0, "DOL": 40.0}
+
+# Generous budgets, so only the queue bound sheds
+NO_BUDGET_LIMIT = {"interactive": 1e9, "batch": 1e9}
+
+
+class SlowAsyncResponses:
+    """Async `client.responses` stand-in: slow enough for requests to overlap, counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        return types.SimpleNamespace(output_text=LLM_TEXT)
+
+
+# Test priority order, the queue bound and preemption
+def test_priority_queue_and_shedding():
+    """
+        Test AdmissionController with one slot and a queue of two.
+
+        Expects:
+        - Interactive waiters are admitted ahead of earlier batch waiters
+        - A batch request arriving at a full queue is shed ("queue_full")
+        - An interactive request arriving at a full queue takes the place of the newest batch waiter
+        """
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, queue_size=2, budgets=NO_BUDGET_LIMIT)
+        assert await admission.acquire("batch")
+
+        order = []
+
+        async def waiter(name, priority):
+            admitted = await admission.acquire(priority)
+            order.append((name, admitted))
+            if admitted:
+                admission.release()
+
+        batch_1 = asyncio.create_task(waiter("batch-1", "batch"))
+        batch_2 = asyncio.create_task(waiter("batch-2", "batch"))
+        await asyncio.sleep(0)
+        assert admission.depth() == {"interactive": 0, "batch": 2}
+
+        assert not await admission.acquire("batch")
+        interactive = asyncio.create_task(waiter("interactive", "interactive"))
+        await asyncio.sleep(0)
+        assert admission.depth() == {"interactive": 1, "batch": 1}
+
+        admission.release()
+        await asyncio.gather(batch_1, batch_2, interactive)
+        return order, admission.stats()
+
+    before = LLM_SHED_TOTAL.value(priority="batch", reason="preempted")
+    order, stats = asyncio.run(scenario())
+    assert order == [("batch-2", False), ("interactive", True), ("batch-1", True)]
+    assert stats["shed"] == 2 and stats["in_flight"] == 0
+    assert LLM_SHED_TOTAL.value(priority="batch", reason="preempted") == before + 1
+
+
+# Test the token bucket
+def test_rate_limit_spaces_admissions():
+    """
+        Test AdmissionController with a rate of 20/s and a burst of 1.
+
+        Expects:
+        - The first request is admitted at once, the next ones about 50 ms apart
+        """
+    async def scenario():
+        admission = AdmissionController(max_inflight=10, rate=20.0, burst=1.0, budgets=NO_BUDGET_LIMIT)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        times = []
+
+        async def admit():
+            assert await admission.acquire()
+            times.append(loop.time() - start)
+
+        await asyncio.gather(*(admit() for _ in range(3)))
+        return times
+
+    times = asyncio.run(scenario())
+    assert times[0] < 0.02
+    assert 0.08 <= times[2] < 0.3
+
+
+# Test shedding through the LLM path
+def test_over_budget_requests_get_deterministic_summary(monkeypatch):
+    """
+        Test concurrent LLM summaries with one slot and a zero interactive wait budget.
+
+        Expects:
+        - The first vehicle gets the LLM summary
+        - The others are answered straight away with the deterministic summary (source "shed")
+        - Batch requests (larger budget) wait for the slot instead
+        """
+    responses = SlowAsyncResponses()
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    monkeypatch.setattr(llm, "inflight", llm.SingleFlight())
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker())
+    monkeypatch.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+    monkeypatch.setattr(llm, "llm_admission", AdmissionController(max_inflight=1, budgets={"interactive": 0.0, "batch": 10.0}))
+
+    async def scenario(priority):
+        vehicles = [{**VEHICLE, "VIN": f"ADMIT000{i}", "DOL": float(i)} for i in range(3)]
+        return await asyncio.gather(*(llm.agenerate_vin_summary(vehicle, priority=priority) for vehicle in vehicles))
+
+    sources = [result["source"] for result in asyncio.run(scenario("interactive"))]
+    assert sources == ["llm", "shed", "shed"]
+    assert responses.calls == 1
+
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    sources = [result["source"] for result in asyncio.run(scenario("batch"))]
+    assert sources == ["llm", "llm", "llm"]
+    assert responses.calls == 4
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.analytics import Portfolio, PortfolioFilters
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def frame(dataset):
+    return pd.concat([dataset.table.to_pandas(), dataset.score_table.to_pandas()], axis=1)
+
+
+# Test grouped aggregates against pandas
+def test_groups_match_pandas(dataset, frame):
+    """
+        Test Portfolio.groups by make and year with a year filter.
+
+        Expects:
+        - Same groups, counts, means and percentiles as a pandas groupby
+        - Largest groups first
+        """
+    result = Portfolio(dataset).groups(("make", "year"), PortfolioFilters.of(year_min=2025))
+    subset = frame[frame["Year"] >= 2025]
+    expected = subset.groupby(["Make", "Year"])
+
+    assert len(result["groups"]) == expected.ngroups
+    counts = [group["count"] for group in result["groups"]]
+    assert counts == sorted(counts, reverse=True)
+    for group in result["groups"]:
+        rows = expected.get_group((group["make"], group["year"]))
+        assert group["count"] == len(rows)
+        for metric in ("risk_score", "days_on_lot", "price_to_market"):
+            stats = group["stats"][metric]
+            assert stats["mean"] == pytest.approx(rows[metric].mean(), abs=1e-4)
+            assert stats["p50"] == pytest.approx(np.percentile(rows[metric], 50), abs=1e-4)
+            assert stats["p90"] == pytest.approx(np.percentile(rows[metric], 90), abs=1e-4)
+
+
+# Test the risk histogram and top-N list
+def test_distribution_and_top_risk(dataset, frame):
+    """
+        Test Portfolio.distribution and Portfolio.top_risk with a make filter.
+
+        Expects:
+        - Histogram buckets equal to np.histogram over the 1-10 range
+        - Top vehicles sorted by descending risk, matching the filtered maximum
+        - An unmatched filter yields empty results instead of an error
+        """
+    filters = PortfolioFilters.of(make=[" toyota "])
+    subset = frame[frame["Make"] == "TOYOTA"]
+    analytics = Portfolio(dataset)
+
+    distribution = analytics.distribution(filters, bins=9)
+    expected, _ = np.histogram(subset["risk_score"], bins=9, range=(1.0, 10.0))
+    assert [bucket["count"] for bucket in distribution["buckets"]] == expected.tolist()
+    assert distribution["count"] == len(subset)
+
+    top = analytics.top_risk(filters, limit=5)
+    risks = [vehicle["risk_score"] for vehicle in top["vehicles"]]
+    assert risks == sorted(risks, reverse=True)
+    assert risks[0] == pytest.approx(subset["risk_score"].max(), abs=1e-4)
+    assert all(vehicle["make"] == "TOYOTA" for vehicle in top["vehicles"])
+
+    empty = analytics.distribution(PortfolioFilters.of(make=["NO SUCH MAKE"]))
+    assert empty["count"] == 0
+    assert empty["stats"]["risk_score"]["mean"] is None
+
+
+# Test result caching per snapshot
+def test_results_are_cached_per_snapshot(dataset):
+    """
+        Test that repeated queries are served from the snapshot's result cache.
+
+        Expects:
+        - Equivalent filters (case, order, whitespace) hit the same entry
+        - The cached result is returned as is
+        """
+    analytics = Portfolio(dataset)
+    first = analytics.groups(("make",), PortfolioFilters.of(make=["honda", "Toyota"]))
+    second = analytics.groups(("make",), PortfolioFilters.of(make=["TOYOTA ", "HONDA"]))
+    assert second is first
+    assert (analytics.hits, analytics.misses) == (1, 1)
+
+
+# Test the portfolio endpoints
+def test_portfolio_endpoints():
+    """
+        Test the /portfolio endpoints with query filters.
+
+        Expects:
+        - HTTP 200 with the current snapshot version for valid queries
+        - Only the grouped-by dimensions in each group
+        - HTTP 422 for an unknown group-by dimension
+        """
+    response = client.get("/portfolio/groups", params={"by": "make", "year_min": 2025, "limit": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["groups"]) == 3
+    assert set(body["groups"][0]) == {"make", "count", "stats"}
+
+    response = client.get("/portfolio/risk-distribution", params={"make": ["HONDA", "TOYOTA"]})
+    assert response.status_code == 200
+    assert sum(bucket["count"] for bucket in response.json()["buckets"]) == response.json()["count"]
+
+    response = client.get("/portfolio/top-risk", params={"limit": 3})
+    assert response.status_code == 200
+    assert len(response.json()["vehicles"]) == 3
+
+    assert client.get("/portfolio/groups", params={"by": "color"}).status_code == 422
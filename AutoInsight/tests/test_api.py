@@ -1,7 +1,13 @@
+import asyncio
+import json
 import random
+import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
+import app.main as main
+from app.dataset import Inventory
 from app.main import app, df
+from app.utils import build_vin_index, deterministic_summary, score_inventory
 
 client = TestClient(app)
 
@@ -12,6 +18,10 @@ if len(df) < 5:
 # Pick 5 random VINs
 sample_vins = random.sample(list(df["VIN"]), 5)
 
+# Well-formed VIN (valid check digit) that is not in the CSV
+UNKNOWN_VIN = "5J6RS5H52RL006998"
+assert UNKNOWN_VIN not in set(df["VIN"].str.upper())
+
 
 # Test root endpoint
 def test_root():
@@ -69,10 +79,269 @@ def test_vin_summary_invalid():
         Test the /vin-summary endpoint with an invalid VIN.
 
         Expects:
-        - HTTP 404 Not Found
-        - JSON response with detail "VIN not found in dataset"
+        - HTTP 422 Unprocessable Entity (rejected before any lookup)
+        - Error message naming the failed check (length, then check digit)
         """
     invalid_vin = "INVALIDVIN12345"
     response = client.post("/vin-summary", json={"vin": invalid_vin})
+    assert response.status_code == 422
+    assert "17 characters" in response.json()["detail"][0]["msg"]
+
+    wrong_check_digit = UNKNOWN_VIN[:8] + "4" + UNKNOWN_VIN[9:]
+    response = client.post("/vin-summary", json={"vin": wrong_check_digit})
+    assert response.status_code == 422
+    assert "check digit" in response.json()["detail"][0]["msg"]
+
+
+# Test /vin-summary endpoint with a well-formed VIN missing from the dataset
+def test_vin_summary_unknown():
+    """
+        Test the /vin-summary endpoint with a valid VIN that is not in the dataset.
+
+        Expects:
+        - HTTP 404 Not Found
+        - JSON response with detail "VIN not found in dataset"
+        """
+    response = client.post("/vin-summary", json={"vin": UNKNOWN_VIN})
     assert response.status_code == 404
     assert response.json()["detail"] == "VIN not found in dataset"
+
+
+# Test /vin-summary endpoint with a lowercase / padded VIN
+def test_vin_summary_normalizes_input():
+    """
+        Test that VIN lookups go through the normalized VIN index.
+
+        Expects:
+        - HTTP 200 for a lowercase VIN surrounded by whitespace
+        - Response VIN matches the dataset VIN
+        """
+    vin = df["VIN"].iloc[0]
+    response = client.post("/vin-summary", json={"vin": f"  {vin.lower()}  "})
+    assert response.status_code == 200
+    assert response.json()["vin"].upper() == vin.upper()
+
+
+# Test duplicate VIN handling in the index
+def test_build_vin_index_first_duplicate_wins():
+    """
+        Test that build_vin_index maps duplicate VINs to their first row.
+
+        Expects:
+        - Keys are normalized (trimmed + uppercase)
+        - The first occurrence of a duplicated VIN wins
+        """
+    frame = pd.DataFrame({"VIN": ["abc123", " ABC123 ", "XYZ789", None]})
+    index = build_vin_index(frame)
+    assert index == {"ABC123": 0, "XYZ789": 2}
+
+
+# Test vectorized scoring against the per-row scorer
+def test_score_inventory_matches_deterministic_summary():
+    """
+        Test that score_inventory gives the same numbers as deterministic_summary.
+
+        Expects:
+        - Identical risk scores for every vehicle in the CSV
+        - Identical summaries when the precomputed score row is reused
+        """
+    scores = score_inventory(df)
+    for pos in range(len(df)):
+        row = df.iloc[pos].to_dict()
+        expected = deterministic_summary(row)
+        assert scores["risk_score"].iloc[pos] == expected["risk_score"]
+        assert deterministic_summary(row, scores.iloc[pos]) == expected
+
+
+# Test /vin-summary/batch endpoint with found and missing VINs
+def test_vin_summary_batch():
+    """
+        Test the /vin-summary/batch endpoint with a mix of VINs.
+
+        Expects:
+        - HTTP 200 OK
+        - One result per requested VIN, in request order
+        - "ok" status with a summary for dataset VINs
+        - "not_found" status without a summary for unknown VINs
+        - "invalid" status with the validation error for malformed VINs
+        """
+    vins = sample_vins[:3] + [UNKNOWN_VIN, "INVALIDVIN12345", sample_vins[0].lower()]
+    response = client.post("/vin-summary/batch", json={"vins": vins})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [r["vin"] for r in results] == vins
+    assert [r["status"] for r in results] == ["ok", "ok", "ok", "not_found", "invalid", "ok"]
+    assert "17 characters" in results[4]["error"]
+    for r in results:
+        if r["status"] == "ok":
+            assert r["result"]["vin"].upper() == r["vin"].upper()
+            assert r["source"] in ("llm", "cache", "fallback")
+        else:
+            assert r["result"] is None
+
+
+# Test /vin-summary/batch endpoint in NDJSON streaming mode
+def test_vin_summary_batch_stream():
+    """
+        Test the /vin-summary/batch endpoint with stream=true.
+
+        Expects:
+        - NDJSON content type
+        - One JSON line per requested VIN
+        """
+    vins = sample_vins[:2] + [UNKNOWN_VIN, "INVALIDVIN12345"]
+    response = client.post("/vin-summary/batch", json={"vins": vins, "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert sorted(item["vin"] for item in lines) == sorted(vins)
+    statuses = {item["vin"]: item["status"] for item in lines}
+    assert statuses[UNKNOWN_VIN] == "not_found"
+    assert statuses["INVALIDVIN12345"] == "invalid"
+
+
+# Test /vin-summary/stream endpoint (server-sent events)
+def test_vin_summary_stream():
+    """
+        Test the /vin-summary/stream SSE endpoint.
+
+        Expects:
+        - text/event-stream content type
+        - "field" events for summary, risk_score and reasoning
+        - A final "result" event with the full summary for the VIN
+        """
+    vin = sample_vins[0]
+    response = client.post("/vin-summary/stream", json={"vin": vin})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    fields = [data["key"] for event, data in events if event == "field"]
+    assert {"summary", "risk_score", "reasoning"} <= set(fields)
+    assert events[-1][0] == "result"
+    assert events[-1][1]["vin"].upper() == vin.upper()
+
+
+# Test /vin-summary/stream endpoint with an invalid VIN
+def test_vin_summary_stream_invalid():
+    """
+        Test the /vin-summary/stream endpoint with an unknown VIN.
+
+        Expects:
+        - HTTP 404 before any event is streamed
+        """
+    response = client.post("/vin-summary/stream", json={"vin": UNKNOWN_VIN})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "VIN not found in dataset"
+
+
+# Test /vin-search endpoint (typeahead)
+def test_vin_search():
+    """
+        Test the /vin-search prefix search endpoint.
+
+        Expects:
+        - Every match starts with the normalized prefix, in VIN order, with its year/make/model
+        - total counts every match, matches holds at most k
+        - HTTP 422 for a prefix with characters a VIN cannot contain
+        """
+    vin = sample_vins[0].upper()
+    response = client.get("/vin-search", params={"prefix": vin[:2].lower(), "k": 3})
+    assert response.status_code == 200
+    data = response.json()
+
+    expected = sorted(v for v in df["VIN"].str.upper() if v.startswith(vin[:2]))
+    assert data["prefix"] == vin[:2]
+    assert data["total"] == len(expected)
+    assert [m["vin"] for m in data["matches"]] == expected[:3]
+    assert all(m["make"] and m["model"] for m in data["matches"])
+
+    assert client.get("/vin-search", params={"prefix": vin}).json()["total"] == 1
+    assert client.get("/vin-search", params={"prefix": UNKNOWN_VIN}).json()["total"] == 0
+    assert client.get("/vin-search", params={"prefix": "1HGQ"}).status_code == 422
+
+
+# Test /ready while the inventory is still loading, then once it is loaded
+def test_ready_gates_requests_until_loaded(monkeypatch):
+    """
+        Test the /ready endpoint and request gating during a FAST_STARTUP load.
+
+        Expects:
+        - While loading: / answers 200, /ready and data endpoints answer 503 (with Retry-After)
+        - Once loaded: /ready answers 200 with the snapshot version and row count
+        """
+    inventory = Inventory(main.CSV_PATH)
+    monkeypatch.setattr(main, "inventory", inventory)
+    monkeypatch.setitem(main.startup, "loading", True)
+
+    assert client.get("/").status_code == 200
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+    response = client.post("/vin-summary", json={"vin": sample_vins[0]})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    inventory.load()
+    monkeypatch.setitem(main.startup, "loading", False)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert response.json()["rows"] == len(df)
+    assert client.post("/vin-summary", json={"vin": sample_vins[0]}).status_code == 200
+
+
+# Test that the warm job runs next to the server instead of holding up startup
+def test_warm_job_does_not_block_startup(monkeypatch):
+    """
+        Test eager startup with WARM_ON_STARTUP and a warm job that never finishes.
+
+        Expects:
+        - The app starts and /ready answers 200 while the warm job is still running
+        - The warm job is cancelled on shutdown
+        """
+    state = {"started": False, "cancelled": False}
+
+    class EndlessWarmJob:
+        async def run(self):
+            state["started"] = True
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+    monkeypatch.setattr(main, "WARM_ON_STARTUP", True)
+    monkeypatch.setattr(main, "_warm_job", lambda: EndlessWarmJob())
+    monkeypatch.setattr(main, "INVENTORY_WATCH", False)
+    with TestClient(app) as started:
+        assert started.get("/ready").status_code == 200
+        assert state["started"]
+    assert state["cancelled"]
+
+
+# Test /metrics endpoint
+def test_metrics():
+    """
+        Test the Prometheus /metrics endpoint after a summary request.
+
+        Expects:
+        - Prometheus text content type
+        - Stage latency histogram for the VIN lookup
+        - Served-summary counter by source
+        """
+    client.post("/vin-summary", json={"vin": sample_vins[0]})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert "# TYPE autoinsight_stage_seconds histogram" in body
+    assert 'autoinsight_stage_seconds_count{stage="lookup"}' in body
+    assert "autoinsight_summaries_total{source=" in body
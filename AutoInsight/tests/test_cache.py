@@ -0,0 +1,166 @@
+import json
+import asyncio
+import threading
+import types
+import app.llm as llm
+from app.cache import LLMCache, cache_key
+
+VEHICLE = {"VIN": "3CZRZ2H50TM705238", "Year": 2026, "Make": "HONDA", "Model": "HR-V", "DOL": 110.0}
+LLM_TEXT = json.dumps({"summary": "Cached summary.", "risk_score": 4.0, "reasoning": ["a", "b"]})
+
+
+class FakeResponses:
+    """Stand-in for `async_client.responses` that counts upstream calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return types.SimpleNamespace(output_text=LLM_TEXT)
+
+
+class Clock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# Test that the key covers the vehicle data and the model
+def test_cache_key_changes_with_inputs():
+    """
+        Test cache_key content addressing.
+
+        Expects:
+        - Same key for the same vehicle (regardless of dict order) and model
+        - Different key when the vehicle data or model changes
+        """
+    key = cache_key(VEHICLE, "gpt-5-mini")
+    assert key == cache_key(dict(reversed(list(VEHICLE.items()))), "gpt-5-mini")
+    assert key != cache_key({**VEHICLE, "DOL": 111.0}, "gpt-5-mini")
+    assert key != cache_key(VEHICLE, "gpt-5-nano")
+
+
+# Test LRU eviction and TTL expiry in the memory tier
+def test_memory_tier_lru_and_ttl():
+    """
+        Test the in-memory LRU and TTL.
+
+        Expects:
+        - Least recently used entry is evicted when full
+        - Entries expire after the TTL
+        - Hit/miss/eviction/expiration counters reflect the above
+        """
+    clock = Clock()
+    cache = LLMCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.set("a", {"vin": "A"})
+    cache.set("b", {"vin": "B"})
+    assert cache.get("a") == {"vin": "A"}  # "b" is now least recently used
+    cache.set("c", {"vin": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("c") == {"vin": "C"}
+
+    clock.now += 61
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+# Test that the SQLite tier survives a restart
+def test_disk_tier_persists(tmp_path):
+    """
+        Test the optional SQLite disk tier.
+
+        Expects:
+        - A new cache instance on the same file serves earlier results
+        - The hit is counted as a disk hit
+        """
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = LLMCache(disk_path=path)
+    cache.set("key", {"vin": "A", "summary": "s"})
+    cache.close()  # writes are committed by the writer thread
+
+    restarted = LLMCache(disk_path=path)
+    assert restarted.get("key") == {"vin": "A", "summary": "s"}
+    assert restarted.stats()["disk_hits"] == 1
+
+
+# Test that async lookups only read SQLite off the event loop
+def test_async_lookup_reads_disk_in_threadpool(tmp_path, monkeypatch):
+    """
+        Test acached_summary against a disk-only entry.
+
+        Expects:
+        - get(disk=False) misses without counting a miss
+        - acached_summary reads the entry on a worker thread, tagged "cache"
+        """
+    path = str(tmp_path / "llm_cache.sqlite")
+    cache = LLMCache(disk_path=path)
+    cache.set("key", {"vin": "A", "summary": "s"})
+    cache.flush()
+    restarted = LLMCache(disk_path=path)
+    monkeypatch.setattr(llm, "llm_cache", restarted)
+
+    assert restarted.get("key", disk=False) is None
+    assert restarted.stats()["misses"] == 0
+
+    threads = []
+    get = restarted.get
+    monkeypatch.setattr(restarted, "get", lambda *args, **kwargs: threads.append(threading.get_ident()) or get(*args, **kwargs))
+    assert asyncio.run(llm.acached_summary("key")) == {"vin": "A", "summary": "s", "source": "cache"}
+    assert threads[-1] != threading.get_ident()
+
+
+# Test that agenerate_vin_summary only calls the LLM once per unchanged vehicle
+def test_generate_vin_summary_uses_cache(monkeypatch):
+    """
+        Test the cache integration in agenerate_vin_summary.
+
+        Expects:
+        - First call goes to the LLM (source "llm")
+        - Second call is served from the cache (source "cache")
+        - Exactly one upstream call
+        """
+    responses = FakeResponses()
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+
+    first = asyncio.run(llm.agenerate_vin_summary(dict(VEHICLE)))
+    second = asyncio.run(llm.agenerate_vin_summary(dict(VEHICLE)))
+
+    assert first["source"] == "llm"
+    assert second["source"] == "cache"
+    assert second["summary"] == first["summary"]
+    assert responses.calls == 1
+
+
+# Test invalidation by VIN
+def test_invalidate_vins_drops_both_tiers(tmp_path):
+    """
+        Test that invalidate_vins removes only the given VINs' entries.
+
+        Expects:
+        - Entries for the VIN are gone from memory and disk
+        - Entries for other VINs are kept
+        """
+    cache = LLMCache(disk_path=str(tmp_path / "cache.sqlite"))
+    other = {**VEHICLE, "VIN": "1C4RJHBG5SC345409"}
+    cache.set(cache_key(VEHICLE, "m"), {"vin": VEHICLE["VIN"], "summary": "a"})
+    cache.set(cache_key(other, "m"), {"vin": other["VIN"], "summary": "b"})
+
+    assert cache.invalidate_vins([VEHICLE["VIN"]]) == 1
+    assert cache.get(cache_key(VEHICLE, "m")) is None
+    assert cache.get(cache_key(other, "m"))["summary"] == "b"
+
+    reopened = LLMCache(disk_path=str(tmp_path / "cache.sqlite"))
+    assert reopened.get(cache_key(VEHICLE, "m")) is None
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import app.comparables as comparables
+from app.cache import cache_key
+from app.comparables import ComparablesIndex
+from app.main import app, inventory
+from app.utils import deterministic_summary
+
+client = TestClient(app)
+
+
+def brute_force(index, pos, k):
+    """Distances to the k nearest same make/model rows, by scanning every row."""
+    features = index.features[index.slot]
+    same = np.flatnonzero(index.group == index.group[pos])
+    same = same[same != pos]
+    return np.sort(np.sqrt(((features[same] - features[pos]) ** 2).sum(axis=1)))[:k]
+
+
+# Test the index against a brute-force scan
+def test_nearest_matches_brute_force(dataset):
+    """
+        Test ComparablesIndex.nearest for every row of the sample inventory.
+
+        Expects:
+        - The same k smallest distances as a full scan of the make/model group
+        - Comparables share the make and model and exclude the vehicle itself
+        """
+    index = ComparablesIndex(dataset)
+    for pos in range(len(dataset)):
+        positions, distances = index.nearest(pos, 5)
+        np.testing.assert_allclose(distances, brute_force(index, pos, 5))
+        assert pos not in positions
+        vehicle = dataset.vehicle(pos)
+        for other in positions.tolist():
+            assert dataset.vehicle(other).make.upper() == vehicle.make.upper()
+            assert dataset.vehicle(other).model.upper() == vehicle.model.upper()
+
+
+# Test the comparables endpoint
+def test_comparables_endpoint():
+    """
+        Test POST /comparables for a known and an unknown VIN.
+
+        Expects:
+        - k comparables, closest first, with medians matching the market context
+        - 404 for a VIN that is not in the inventory
+        """
+    dataset = inventory.current
+    vin = dataset.vehicle(0).vin
+    response = client.post("/comparables", json={"vin": vin.lower(), "k": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["version"] == dataset.version
+    distances = [comparable["distance"] for comparable in body["comparables"]]
+    assert 0 < len(distances) <= 3
+    assert distances == sorted(distances)
+    assert body["market_context"]["comparables"] == len(distances)
+    assert body["market_context"]["median_risk_score"] == pytest.approx(
+        np.median([comparable["risk_score"] for comparable in body["comparables"]]), abs=0.01
+    )
+
+    response = client.post("/comparables", json={"vin": "5J6RS5H52RL006998"})
+    assert response.status_code == 404
+
+
+# Test market context in summaries
+def test_market_context_in_summary(dataset, monkeypatch):
+    """
+        Test with_market_context with COMPARABLES_IN_SUMMARY off and on.
+
+        Expects:
+        - Off: no market context, summary and cache key unchanged
+        - On: a comparables line in the reasoning, the same risk score and a new cache key
+        """
+    plain = dataset.vehicle(0)
+    assert comparables.with_market_context(dataset, 0, dataset.vehicle(0)).market is None
+
+    monkeypatch.setattr(comparables, "COMPARABLES_IN_SUMMARY", True)
+    vehicle = comparables.with_market_context(dataset, 0, dataset.vehicle(0))
+    assert vehicle.market["comparables"] > 0
+
+    with_context, without = deterministic_summary(vehicle), deterministic_summary(plain)
+    assert with_context["risk_score"] == without["risk_score"]
+    assert any(line.startswith("comparables=") for line in with_context["reasoning"])
+    assert not any(line.startswith("comparables=") for line in without["reasoning"])
+    assert cache_key(vehicle, "m") != cache_key(plain, "m")
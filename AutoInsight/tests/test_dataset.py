@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from app.cache import LLMCache
+from app.dataset import Dataset, Inventory
+from app.utils import load_csv, load_inventory, score_inventory
+from tests.conftest import CSV_PATH
+
+# Rows in the test inventory
+N_ROWS = 50
+
+
+# Test that a reload only rescores and invalidates what changed
+def test_reload_diffs_by_vin_and_row_hash(tmp_path):
+    """
+        Test Inventory.reload against an edited copy of the sample data.
+
+        Expects:
+        - One added, one changed and one removed VIN
+        - Only the added and changed rows are rescored
+        - Only the changed / removed VINs' cached results are invalidated
+        - Reloaded scores match a full rescore
+        - A reader holding the old snapshot still sees the old data
+        - Subscribers get the new snapshot before it becomes current
+        """
+    path = tmp_path / "inventory.csv"
+    rows = load_csv(CSV_PATH)
+    rows.head(N_ROWS).to_csv(path, index=False)
+
+    cache = LLMCache()
+    inventory = Inventory(str(path), cache=cache)
+    old = inventory.current
+    for vin in rows["VIN"].head(3):
+        cache.set(f"key-{vin}", {"vin": vin, "summary": "cached"})
+
+    edited = rows.head(N_ROWS).copy()
+    edited.loc[1, "DOL"] = 999
+    edited = pd.concat([edited.drop(index=2), rows.iloc[[N_ROWS]]])
+    edited.to_csv(path, index=False)
+
+    seen = []
+    inventory.subscribe(lambda dataset: seen.append((dataset, inventory.current)))
+    report = inventory.reload()
+    assert (report["added"], report["changed"], report["removed"]) == (1, 1, 1)
+    assert report["rescored"] == 2
+    assert report["invalidated"] == 2
+    assert cache.get(f"key-{rows['VIN'][0]}") is not None
+
+    new = inventory.current
+    assert new.version == old.version + 1
+    assert seen == [(new, old)]
+    expected = score_inventory(load_inventory(str(path)))
+    pd.testing.assert_frame_equal(new.score_table.to_pandas(), expected, check_dtype=False)
+    assert new.lookup(rows["VIN"][2]) is None
+    assert new.vehicle(new.lookup(rows["VIN"][1]))["DOL"] == 999
+
+    assert old.lookup(rows["VIN"][2]) is not None
+    assert old.vehicle(old.lookup(rows["VIN"][1]))["DOL"] != 999
+
+
+# Test that a reload only patches the rows and VINs that changed
+def test_reload_patches_the_previous_snapshot(tmp_path):
+    """
+        Test Dataset.patch through Inventory.reload.
+
+        Expects:
+        - In-place edits keep the previous VIN index object
+        - Added / removed / reordered VINs give the same index as a full build
+        - Rows and scores match a snapshot built from scratch, in file order
+        """
+    path = tmp_path / "inventory.csv"
+    rows = load_csv(CSV_PATH)
+    rows.head(N_ROWS).to_csv(path, index=False)
+    inventory = Inventory(str(path), cache=LLMCache())
+    old = inventory.current
+
+    edited = rows.head(N_ROWS).copy()
+    edited.loc[3, "DOL"] = 999
+    edited.to_csv(path, index=False)
+    inventory.reload()
+    assert inventory.current.vin_index is old.vin_index
+
+    edited = pd.concat([rows.iloc[[N_ROWS + 1, N_ROWS]], edited.drop(index=[0, 5]).iloc[::-1]])
+    edited.to_csv(path, index=False)
+    inventory.reload()
+    new, full = inventory.current, Dataset.load(str(path))
+    assert new.vin_index.keys.tolist() == full.vin_index.keys.tolist()
+    assert new.vin_index.positions.tolist() == full.vin_index.positions.tolist()
+    assert new.table.to_pandas().equals(full.table.to_pandas())
+    pd.testing.assert_frame_equal(new.score_table.to_pandas(), full.score_table.to_pandas(), check_dtype=False)
+
+
+# Test that worker processes share one published generation
+def test_workers_map_the_published_generation(tmp_path):
+    """
+        Test that a second Inventory on the same file maps the published
+        generation, and picks up another worker's reload without rebuilding.
+
+        Expects:
+        - Both inventories serve the same generation, backed by a memory map
+        - After one reloads, the other's reload maps the new generation
+        """
+    path = tmp_path / "inventory.csv"
+    rows = load_csv(CSV_PATH)
+    rows.head(N_ROWS).to_csv(path, index=False)
+
+    first = Inventory(str(path))
+    second = Inventory(str(path))
+    assert first.current.version == second.current.version == 1
+    assert isinstance(second.current.vin_index.keys, np.memmap)
+    vin = rows["VIN"][5]
+    assert second.current.vehicle(second.current.lookup(vin.lower())) == first.current.vehicle(first.current.lookup(vin))
+
+    rows.head(N_ROWS + 1).to_csv(path, index=False)
+    report = first.reload()
+    assert report["added"] == 1
+    assert second.reload() == {k: v for k, v in report.items() if k not in ("invalidated", "seconds")}
+    assert second.current.version == 2
+    assert second.current.lookup(rows["VIN"][N_ROWS]) == N_ROWS
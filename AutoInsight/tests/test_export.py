@@ -0,0 +1,95 @@
+import io
+import json
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+import app.llm as llm
+from app.cache import LLMCache, cache_key
+from app.dataset import Dataset
+from app.export import export_inventory
+from app.main import app
+from app.utils import load_inventory
+from tests.conftest import CSV_PATH
+
+# Rows in the test inventory, and rows per export chunk
+N_ROWS = 45
+CHUNK_ROWS = 10
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    """Small snapshot, exported against an empty LLM cache."""
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    return Dataset.from_frame(load_inventory(CSV_PATH).head(N_ROWS).copy(), CSV_PATH)
+
+
+# Test that every format streams all rows in chunks
+def test_export_formats_stream_in_chunks(dataset):
+    """
+        Test NDJSON, CSV and Parquet exports of the same snapshot.
+
+        Expects:
+        - One encoded chunk per CHUNK_ROWS rows (plus the CSV header / Parquet footer)
+        - Every row in each format, with identical VINs and risk scores
+        - One Parquet row group per chunk
+        """
+    chunks = {fmt: list(export_inventory(dataset, fmt, CHUNK_ROWS)) for fmt in ("ndjson", "csv", "parquet")}
+    n_chunks = -(-N_ROWS // CHUNK_ROWS)
+    assert len(chunks["ndjson"]) == len(chunks["csv"]) == n_chunks
+
+    records = [json.loads(line) for line in b"".join(chunks["ndjson"]).splitlines()]
+    table = pd.read_csv(io.BytesIO(b"".join(chunks["csv"])))
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks["parquet"])))
+
+    assert len(records) == len(table) == parquet.metadata.num_rows == N_ROWS
+    assert parquet.num_row_groups == n_chunks
+    frame = parquet.read().to_pandas()
+    assert [r["vin"] for r in records] == table["vin"].tolist() == frame["vin"].tolist()
+    assert [r["risk_score"] for r in records] == pytest.approx(frame["risk_score"].tolist())
+    assert json.loads(table["reasoning"][0]) == records[0]["reasoning"] == list(frame["reasoning"][0])
+    assert {r["source"] for r in records} == {"fallback"}
+
+
+# Test that cached LLM summaries are preferred
+def test_export_uses_cached_llm_summary(dataset):
+    """
+        Test that a vehicle with a cached LLM result is exported with it.
+
+        Expects:
+        - source "cache" and the cached summary for that vehicle only
+        - llm_cache=False exports the deterministic summary instead
+        - Exporting does not change the cache counters
+        """
+    vehicle = dataset.vehicle(3)
+    llm.llm_cache.set(cache_key(vehicle, llm.OPENAI_MODEL), {"summary": "LLM says hi.", "risk_score": 7.5, "reasoning": ["x"]})
+    stats = llm.llm_cache.stats()
+
+    records = [json.loads(line) for line in b"".join(export_inventory(dataset, "ndjson", CHUNK_ROWS)).splitlines()]
+    assert records[3]["source"] == "cache"
+    assert (records[3]["summary"], records[3]["risk_score"]) == ("LLM says hi.", 7.5)
+    assert sum(r["source"] == "cache" for r in records) == 1
+    assert llm.llm_cache.stats() == stats
+
+    records = [json.loads(line) for line in b"".join(export_inventory(dataset, "ndjson", use_llm_cache=False)).splitlines()]
+    assert records[3]["source"] == "fallback"
+
+
+# Test the export endpoint
+def test_export_endpoint():
+    """
+        Test the /export endpoint.
+
+        Expects:
+        - HTTP 200 with a CSV attachment covering the whole inventory
+        - HTTP 422 for an unknown format
+        """
+    response = client.get("/export", params={"format": "csv", "llm_cache": False})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    assert len(pd.read_csv(io.BytesIO(response.content))) == len(load_inventory(CSV_PATH))
+
+    assert client.get("/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,281 @@
+import asyncio
+import json
+import time
+import types
+import pytest
+import app.llm as llm
+from app.cache import LLMCache
+from app.resilience import CircuitBreaker
+
+VEHICLE = {"VIN": "3CZRZ2H50TM705238", "Year": 2026, "Make": "HONDA", "Model": "HR-V", "DOL": 110.0}
+LLM_TEXT = json.dumps({"summary": "Coalesced summary.", "risk_score": 4.0, "reasoning": ["a", "b"]})
+
+# Number of identical concurrent requests per test
+N_REQUESTS = 10
+
+
+class SlowAsyncResponses:
+    """Async `client.responses` stand-in: slow enough for requests to overlap, counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.3)
+        return types.SimpleNamespace(output_text=LLM_TEXT)
+
+
+@pytest.fixture
+def llm_enabled(monkeypatch):
+    """Enable the LLM path with an empty cache, a fresh in-flight table and a closed breaker."""
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    monkeypatch.setattr(llm, "inflight", llm.SingleFlight())
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker())
+    return monkeypatch
+
+
+# Test request coalescing on the async path
+def test_concurrent_identical_requests_make_one_call_async(llm_enabled):
+    """
+        Test that N concurrent identical async requests share one LLM call.
+
+        Expects:
+        - Exactly one upstream call
+        - Every caller gets the LLM result (source "llm")
+        """
+    responses = SlowAsyncResponses()
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+
+    async def run():
+        return await asyncio.gather(
+            *(llm.agenerate_vin_summary(dict(VEHICLE)) for _ in range(N_REQUESTS))
+        )
+
+    results = asyncio.run(run())
+
+    assert responses.calls == 1
+    assert all(r["source"] == "llm" for r in results)
+    assert llm.inflight.coalesced == N_REQUESTS - 1
+
+
+# Test that different vehicles are not coalesced
+def test_different_vehicles_are_not_coalesced(llm_enabled):
+    """
+        Test that coalescing is keyed on the vehicle data.
+
+        Expects:
+        - One upstream call per distinct vehicle
+        """
+    responses = SlowAsyncResponses()
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+
+    async def run():
+        return await asyncio.gather(
+            llm.agenerate_vin_summary(dict(VEHICLE)),
+            llm.agenerate_vin_summary({**VEHICLE, "DOL": 111.0}),
+        )
+
+    asyncio.run(run())
+    assert responses.calls == 2
+
+
+class FailingAsyncResponses:
+    """Async `client.responses` stand-in that always raises, counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("upstream unavailable")
+
+
+# Test the per-request deadline with background completion
+def test_deadline_returns_fallback_and_fills_cache(llm_enabled):
+    """
+        Test that a slow LLM call is answered by the deterministic fallback.
+
+        Expects:
+        - source "timeout" well before the LLM answers
+        - The call keeps running and fills the cache (next call: source "cache")
+        """
+    responses = SlowAsyncResponses()
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+    llm_enabled.setattr(llm, "LLM_DEADLINE_SECONDS", 0.05)
+    llm_enabled.setattr(llm, "LLM_BACKGROUND_COMPLETE", True)
+
+    async def run():
+        start = time.perf_counter()
+        first = await llm.agenerate_vin_summary(dict(VEHICLE))
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.4)  # let the background call finish
+        return first, elapsed, await llm.agenerate_vin_summary(dict(VEHICLE))
+
+    first, elapsed, second = asyncio.run(run())
+    assert first["source"] == "timeout"
+    assert elapsed < 0.25
+    assert second["source"] == "cache"
+    assert responses.calls == 1
+
+
+# Test that the circuit breaker opens and probes for recovery
+def test_circuit_breaker_skips_llm_after_failures(llm_enabled):
+    """
+        Test the circuit breaker around the LLM call.
+
+        Expects:
+        - "fallback" for the first failures, then "circuit_open" without an upstream call
+        - After the reset time, one probe call goes through and closes the circuit on success
+        """
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    failing = FailingAsyncResponses()
+    llm_enabled.setattr(llm, "llm_breaker", breaker)
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=failing))
+
+    sources = [asyncio.run(llm.agenerate_vin_summary({**VEHICLE, "DOL": float(i)}))["source"] for i in range(3)]
+    assert sources == ["fallback", "fallback", "circuit_open"]
+    assert failing.calls == 2
+    assert breaker.state == "open"
+
+    now[0] += 10
+    recovered = SlowAsyncResponses()
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=recovered))
+    assert asyncio.run(llm.agenerate_vin_summary(dict(VEHICLE)))["source"] == "llm"
+    assert breaker.state == "closed"
+
+
+class StreamingAsyncResponses:
+    """Async `client.responses` stand-in that streams LLM_TEXT in small deltas."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        assert kwargs.get("stream") is True
+
+        async def events():
+            for i in range(0, len(LLM_TEXT), 7):
+                yield types.SimpleNamespace(type="response.output_text.delta", delta=LLM_TEXT[i:i + 7])
+
+        return events()
+
+
+# Test incremental parsing of a streamed LLM response
+def test_stream_emits_summary_before_reasoning(llm_enabled):
+    """
+        Test astream_vin_summary with a token-by-token response.
+
+        Expects:
+        - "summary" field event before the reasoning text has been streamed
+        - A final "result" event with source "llm", which is then cached
+        """
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=StreamingAsyncResponses()))
+
+    async def collect():
+        return [event async for event in llm.astream_vin_summary(dict(VEHICLE))]
+
+    events = asyncio.run(collect())
+    kinds = [kind for kind, _ in events]
+    summary_at = events.index(("field", ("summary", "Coalesced summary.")))
+    streamed_before = "".join(payload for kind, payload in events[:summary_at] if kind == "delta")
+
+    assert "reasoning" not in streamed_before
+    assert kinds[-1] == "result"
+    assert events[-1][1]["source"] == "llm"
+    assert asyncio.run(llm.agenerate_vin_summary(dict(VEHICLE)))["source"] == "cache"
+
+
+class BatchAsyncResponses:
+    """Async `client.responses` stand-in answering a multi-vehicle prompt, except for `skip_vin`."""
+
+    def __init__(self, skip_vin=None):
+        self.calls = 0
+        self.skip_vin = skip_vin
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs["input"][-1]["content"]
+        vehicles = json.loads(prompt[prompt.index("["): prompt.rindex("]") + 1])
+        answer = [
+            {"vin": v["VIN"], "summary": f"Batch summary {v['VIN']}.", "risk_score": 5.0, "reasoning": ["a"]}
+            for v in vehicles if v["VIN"] != self.skip_vin
+        ]
+        return types.SimpleNamespace(output_text=json.dumps(answer))
+
+
+# Test micro-batching of concurrent requests for different vehicles
+def test_concurrent_vehicles_share_one_batched_call(llm_enabled):
+    """
+        Test that concurrent requests for different vehicles are sent as one batched LLM call.
+
+        Expects:
+        - Exactly one upstream call for N vehicles
+        - Each caller gets its own vehicle's summary (source "llm")
+        - A vehicle missing from the answer falls back to deterministic scoring
+        """
+    vins = [f"3CZRZ2H50TM7052{i:02d}" for i in range(N_REQUESTS)]
+    responses = BatchAsyncResponses(skip_vin=vins[-1])
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+    llm_enabled.setattr(llm, "llm_batcher", llm.MicroBatcher(llm._acall_llm_batch, N_REQUESTS, 0.05))
+
+    async def run():
+        return await asyncio.gather(
+            *(llm.agenerate_vin_summary({**VEHICLE, "VIN": vin}) for vin in vins)
+        )
+
+    results = asyncio.run(run())
+
+    assert responses.calls == 1
+    assert llm.llm_batcher.batches == 1
+    for vin, result in zip(vins[:-1], results):
+        assert result["source"] == "llm"
+        assert result["summary"] == f"Batch summary {vin}."
+    assert results[-1]["source"] == "fallback"
+    assert results[-1]["vin"] == vins[-1]
+
+
+class StructuredAsyncResponses:
+    """Async `client.responses` stand-in that records the requested output format and returns `text`."""
+
+    def __init__(self, text):
+        self.text = text
+        self.formats = []
+
+    async def create(self, **kwargs):
+        self.formats.append(kwargs.get("text", {}).get("format"))
+        return types.SimpleNamespace(output_text=self.text)
+
+
+# Test the structured output mode
+def test_structured_output_mode(llm_enabled):
+    """
+        Test LLM_STRUCTURED_OUTPUT: schema sent upstream, one-pass pydantic validation.
+
+        Expects:
+        - The request carries a strict json_schema format with the VINResponse summary fields
+        - A schema-conforming answer is served with source "llm"
+        - An out-of-range answer falls back and counts as a structured parse failure
+        """
+    llm_enabled.setattr(llm, "LLM_STRUCTURED_OUTPUT", True)
+    responses = StructuredAsyncResponses(LLM_TEXT)
+    llm_enabled.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+
+    result = asyncio.run(llm.agenerate_vin_summary(dict(VEHICLE)))
+    output_format = responses.formats[0]
+    assert output_format["type"] == "json_schema" and output_format["strict"] is True
+    assert set(output_format["schema"]["required"]) == {"summary", "risk_score", "reasoning"}
+    assert result["source"] == "llm"
+    assert result["vin"] == VEHICLE["VIN"]
+    assert result["reasoning"] == ["a", "b"]
+
+    failures = llm.PARSE_FAILURES_TOTAL.value(mode="structured")
+    parses = llm.LLM_PARSE_SECONDS.count(mode="structured")
+    responses.text = json.dumps({"summary": "Too risky.", "risk_score": 42, "reasoning": ["a"]})
+    result = asyncio.run(llm.agenerate_vin_summary({**VEHICLE, "DOL": 1.0}))
+    assert result["source"] == "fallback"
+    assert llm.PARSE_FAILURES_TOTAL.value(mode="structured") == failures + 1
+    assert llm.LLM_PARSE_SECONDS.count(mode="structured") == parses + 1
@@ -0,0 +1,30 @@
+import socket
+import subprocess
+import sys
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Test that the sync vs async load test still runs end to end
+def test_load_test_smoke():
+    """
+        Run benchmarks.load_test at a small size against the fake LLM server.
+
+        Expects:
+        - Exit code 0 (every request in both modes reached the fake server)
+        - A throughput line for each mode
+        """
+    completed = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.load_test",
+            "--requests", "20", "--concurrency", "10", "--latency-ms", "50", "--port", str(free_port()),
+        ],
+        capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    assert "sync (threadpool)" in completed.stdout
+    assert "async (AsyncOpenAI)" in completed.stdout
@@ -0,0 +1,44 @@
+from app.metrics import Counter, Histogram, Registry
+
+
+# Test histogram rendering
+def test_histogram_render():
+    """
+        Test the Prometheus text rendering of a labelled histogram.
+
+        Expects:
+        - Cumulative bucket counts, +Inf bucket, sum and count per label set
+        """
+    registry = Registry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage latency.", buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="lookup")
+    histogram.observe(0.5, stage="lookup")
+    histogram.observe(5.0, stage="lookup")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE stage_seconds histogram" in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="lookup",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{stage="lookup"} 3' in lines
+    assert 'stage_seconds_sum{stage="lookup"} 5.550000' in lines
+
+
+# Test counter labels
+def test_counter_labels():
+    """
+        Test a counter with labels.
+
+        Expects:
+        - Separate series per label value
+        - Quotes in label values are escaped
+        """
+    counter = Counter("summaries_total", "Summaries.")
+    counter.inc(source="llm")
+    counter.inc(2, source="fallback")
+    counter.inc(source='we"ird')
+
+    assert counter.value(source="fallback") == 2
+    lines = counter.render()
+    assert 'summaries_total{source="llm"} 1' in lines
+    assert 'summaries_total{source="we\\"ird"} 1' in lines
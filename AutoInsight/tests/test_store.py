@@ -0,0 +1,117 @@
+import json
+import time
+import types
+from fastapi.testclient import TestClient
+import app.llm as llm
+import app.store as store
+from app.cache import LLMCache
+from app.main import app, inventory
+from app.resilience import CircuitBreaker
+from tests.conftest import LLM_TEXT, CountingAsyncResponses
+
+client = TestClient(app)
+
+
+def summary(risk_score, source="fallback"):
+    return {"summary": "s", "risk_score": risk_score, "reasoning": ["r"], "source": source}
+
+
+# Test recording, history and range queries
+def test_record_history_and_query(result_store):
+    """
+        Test ResultStore writes and reads without the API.
+
+        Expects:
+        - One row per VIN and data version (a recomputation replaces it)
+        - History lists every data version of a VIN, newest first
+        - Risk / time range queries return the matching rows and use the indexes
+        """
+    result_store.record("vin00001", "v1", "k1", summary(3.0), 0.01)
+    result_store.record("VIN00001", "v1", "k1", summary(4.0), 0.01)
+    result_store.record("VIN00001", "v2", "k2", summary(8.5, "llm"), 0.5)
+    result_store.record("VIN00002", "v1", "k3", summary(7.5), 0.01)
+    assert result_store.flush(timeout=5)
+
+    history = result_store.history("vin00001")
+    assert [row["data_version"] for row in history] == ["v2", "v1"]
+    assert history[1]["risk_score"] == 4.0
+    assert history[0]["model"] == llm.OPENAI_MODEL and history[1]["model"] is None
+
+    risky = result_store.query(min_risk=7.0, since=time.time() - 60)
+    assert sorted((row["vin"], row["data_version"]) for row in risky) == [("VIN00001", "v2"), ("VIN00002", "v1")]
+    assert result_store.query(min_risk=7.0, source="llm")[0]["latency_ms"] == 500.0
+    assert result_store.query(until=time.time() - 60) == []
+
+    plan = result_store._reader().execute(
+        "EXPLAIN QUERY PLAN SELECT vin FROM results WHERE risk_score >= 7 AND computed_at >= 0"
+    ).fetchall()
+    assert any("USING INDEX" in row[-1] for row in plan)
+
+
+# Test that a deterministic result never replaces a stored LLM summary
+def test_fallback_does_not_replace_llm_summary(result_store):
+    """
+        Test recomputations of the same data version.
+
+        Expects:
+        - A fallback / timeout recorded after an LLM summary (new cache key)
+          leaves the LLM row in place
+        - A new LLM summary replaces it
+        """
+    result_store.record("VIN00001", "v1", "k1", summary(8.5, "llm"), 0.5)
+    result_store.record("VIN00001", "v1", "k2", summary(3.0, "timeout"), 0.01)
+    result_store.record("VIN00001", "v1", "k2", summary(3.0), 0.01)
+    assert result_store.flush(timeout=5)
+    assert [(row["source"], row["risk_score"]) for row in result_store.history("VIN00001")] == [("llm", 8.5)]
+    assert result_store.get("VIN00001", "v1", "k1")["risk_score"] == 8.5
+
+    result_store.record("VIN00001", "v1", "k2", summary(6.0, "llm"), 0.5)
+    assert result_store.flush(timeout=5)
+    assert result_store.get("VIN00001", "v1", "k2")["risk_score"] == 6.0
+    assert result_store.get("VIN00001", "v1", "k1") is None
+
+
+# Test that repeated lookups are served from the store
+def test_repeated_lookup_served_from_store(result_store, monkeypatch):
+    """
+        Test /vin-summary with the LLM enabled and an empty LLM cache on the second call.
+
+        Expects:
+        - First call computes the summary with the LLM and records it
+        - Second call is served from the store without an LLM call
+        - /results finds it by risk and time, /results/{vin} lists it
+        """
+    responses = CountingAsyncResponses()
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    monkeypatch.setattr(llm, "inflight", llm.SingleFlight())
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker())
+    monkeypatch.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+
+    vin = inventory.current.vehicle(0).vin
+    first = client.post("/vin-summary", json={"vin": vin})
+    assert first.json()["source"] == "llm"
+    assert result_store.flush(timeout=5)
+
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    second = client.post("/vin-summary", json={"vin": vin})
+    assert second.json()["source"] == "store"
+    assert second.json()["summary"] == json.loads(LLM_TEXT)["summary"]
+    assert responses.calls == 1
+
+    risky = client.get("/results", params={"min_risk": 7, "since": time.strftime("%Y-%m-%d")}).json()
+    assert [row["vin"] for row in risky["results"]] == [vin.upper()]
+    assert client.get(f"/results/{vin}").json()["count"] == 1
+
+
+# Test the query endpoints without a store
+def test_results_disabled(monkeypatch):
+    """
+        Test /results when RESULT_STORE_PATH is not set.
+
+        Expects:
+        - 503 instead of an empty result
+        """
+    monkeypatch.setattr(store, "result_store", None)
+    assert client.get("/results").status_code == 503
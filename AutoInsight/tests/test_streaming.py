@@ -0,0 +1,61 @@
+import json
+import random
+from app.streaming import IncrementalJSONParser, sse_event
+
+LLM_TEXT = (
+    '```json\n{"summary": "A \\"quoted\\" car, priced well.", "risk_score": 4.5, '
+    '"reasoning": ["Days on lot, moderate", "Price ] near market"]}\n```'
+)
+
+
+# Test the incremental parser with random chunk boundaries
+def test_incremental_parser_any_chunking():
+    """
+        Test IncrementalJSONParser with random chunk sizes.
+
+        Expects:
+        - Each top-level field decoded exactly once, in order
+        - Escapes, commas and brackets inside strings don't end a value early
+        - Markdown fences around the object are ignored
+        """
+    expected = [
+        ("summary", 'A "quoted" car, priced well.'),
+        ("risk_score", 4.5),
+        ("reasoning", ["Days on lot, moderate", "Price ] near market"]),
+    ]
+    rng = random.Random(0)
+    for _ in range(50):
+        parser, fields, i = IncrementalJSONParser(), [], 0
+        while i < len(LLM_TEXT):
+            step = rng.randint(1, 8)
+            fields += parser.feed(LLM_TEXT[i:i + step])
+            i += step
+        assert fields == expected
+        assert parser.done
+
+
+# Test that a field is emitted as soon as it is complete
+def test_incremental_parser_emits_early():
+    """
+        Test that the summary is available before later fields arrive.
+
+        Expects:
+        - Nothing while the summary string is still open
+        - The summary as soon as its closing quote arrives
+        """
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"summary": "Low ri') == []
+    assert parser.feed('sk vehicle.", "reaso') == [("summary", "Low risk vehicle.")]
+    assert not parser.done
+
+
+# Test SSE formatting
+def test_sse_event_format():
+    """
+        Test sse_event output.
+
+        Expects:
+        - "event:" and "data:" lines with a JSON payload, terminated by a blank line
+        """
+    assert sse_event("field", {"key": "summary"}) == 'event: field\ndata: {"key": "summary"}\n\n'
+    assert json.loads(sse_event("result", [1, 2]).split("data: ")[1]) == [1, 2]
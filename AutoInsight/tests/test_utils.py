@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+from app.cache import cache_key
+from app.dataset import Dataset
+from app.llm import build_llm_input
+from app.models import as_row_dict
+from app.utils import (
+    deterministic_summary,
+    load_csv,
+    load_inventory,
+    load_inventory_table,
+    normalize_vin,
+    score_inventory,
+    snapshot_path,
+)
+from tests.conftest import CSV_PATH
+
+df = load_csv(CSV_PATH)
+
+
+# Test typed loading and the Arrow snapshot cache
+def test_load_inventory_typed_snapshot(tmp_path):
+    """
+        Test that load_inventory types the numeric columns and caches them.
+
+        Steps:
+        1. Load a copy of the CSV (writes the Arrow snapshot)
+        2. Load it again (reads the snapshot) and compare
+        3. Change the CSV and check the snapshot is rebuilt
+
+        Expects:
+        - Numeric dtypes for price, price-to-market, DOL, mileage and VDPs
+        - Identical frames from the CSV and from the snapshot
+        - load_inventory_table maps the snapshot without copying it
+        """
+    csv_copy = tmp_path / "inventory.csv"
+    shutil.copy(CSV_PATH, csv_copy)
+
+    first = load_inventory(str(csv_copy))
+    assert os.path.exists(snapshot_path(str(csv_copy)))
+    assert first["Current price"].iloc[0] == 30895.0
+    assert first["Current price to market %"].iloc[0] == 100.0
+    assert pd.api.types.is_float_dtype(first["Mileage"])
+
+    second = load_inventory(str(csv_copy))
+    pd.testing.assert_frame_equal(first, second)
+
+    allocated = pa.total_allocated_bytes()
+    table = load_inventory_table(str(csv_copy))
+    assert pa.total_allocated_bytes() - allocated < table.nbytes // 10
+    pd.testing.assert_frame_equal(table.to_pandas(), first)
+
+    changed = df.head(3).copy()
+    changed.loc[0, "DOL"] = "999"
+    changed.to_csv(csv_copy, index=False)
+    reloaded = load_inventory(str(csv_copy))
+    assert len(reloaded) == 3
+    assert reloaded["DOL"].iloc[0] == 999.0
+
+
+# Test that Vehicle records behave like the row dicts they replace
+def test_vehicle_record_matches_row_dict():
+    """
+        Test Dataset.vehicle against the pandas row dict path.
+
+        Expects:
+        - Same deterministic summary for every vehicle in the CSV
+        - Same cache key and prompt as the equivalent row dict
+        - Vehicle.to_json is the json.dumps text of the row (sorted or not,
+          with market context, NaN and nulls)
+        """
+    typed = load_inventory(CSV_PATH)
+    scores = score_inventory(typed)
+    dataset = Dataset.from_frame(typed, CSV_PATH)
+    for pos in range(len(typed)):
+        vehicle = dataset.vehicle(pos)
+        row = typed.iloc[pos].to_dict()
+        assert deterministic_summary(vehicle) == deterministic_summary(row, scores.iloc[pos])
+        assert cache_key(vehicle, "model") == cache_key(dict(vehicle), "model")
+        assert dict(vehicle) == dataset.table.slice(pos, 1).to_pylist()[0]
+        assert vehicle.vin == normalize_vin(row["VIN"])
+        assert build_llm_input(vehicle) == build_llm_input(dict(vehicle))
+
+    vehicle = dataset.vehicle(0)
+    vehicle.market = {"peers": 3, "median_price": float("nan"), "notes": None}
+    vehicle.values = (*vehicle.values[:-2], None, float("inf"))
+    assert vehicle.to_json() == json.dumps(as_row_dict(vehicle))
+    assert vehicle.to_json(sort_keys=True) == json.dumps(as_row_dict(vehicle), sort_keys=True)
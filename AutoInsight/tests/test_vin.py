@@ -0,0 +1,55 @@
+import pandas as pd
+from app.dataset import VinIndex
+from app.utils import load_csv
+from app.vin import check_digit, prefix_error, vin_error
+from tests.conftest import CSV_PATH
+
+df = load_csv(CSV_PATH)
+
+
+# Test ISO 3779 check digits and the validation modes
+def test_vin_validation():
+    """
+        Test that vin_error accepts real VINs and names what is wrong with bad ones.
+
+        Expects:
+        - Every VIN in the CSV passes strict validation
+        - Check digit "X" for a remainder of 10
+        - Length, charset and check digit errors in strict mode; "charset" skips
+          the check digit and "off" skips everything
+        """
+    assert all(vin_error(vin) is None for vin in df["VIN"])
+    assert check_digit("1M8GDM9AXKP042788") == "X"
+    assert vin_error(" 1m8gdm9axkp042788 ") is None
+
+    assert "17 characters" in vin_error("1M8GDM9AXKP04278")
+    assert "invalid characters: IO" in vin_error("1M8GDM9AXKP0427IO")
+    assert "check digit" in vin_error("1M8GDM9A1KP042788")
+    assert vin_error("1M8GDM9A1KP042788", mode="charset") is None
+    assert vin_error("not a vin", mode="off") is None
+
+    assert prefix_error("1M8") is None
+    assert "invalid characters" in prefix_error("1Q")
+    assert "longer than" in prefix_error("1" * 18)
+
+
+# Test prefix search on the sorted VIN index
+def test_vin_index_search():
+    """
+        Test VinIndex.search against a linear scan.
+
+        Expects:
+        - Matches are the rows whose VIN starts with the prefix, in VIN order
+        - total counts every match while at most k positions are returned
+        - An empty prefix matches everything; an over-long one nothing
+        """
+    frame = pd.DataFrame({"VIN": ["1HGA", "1HGB", "1HFZ", "2HGA", "1HG", "1HGB"]})
+    index = VinIndex.build(frame)
+
+    total, positions = index.search("1HG", 2)
+    assert total == 3
+    assert positions.tolist() == [4, 0]
+    assert index.search("1H", 10)[1].tolist() == [2, 4, 0, 1]
+    assert index.search("3", 10)[0] == 0
+    assert index.search("", 1)[0] == 5
+    assert index.search("1HGAX", 10)[0] == 0
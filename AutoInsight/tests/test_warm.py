@@ -0,0 +1,98 @@
+import asyncio
+import json
+import types
+import pytest
+import app.llm as llm
+import app.store as store
+from app.cache import LLMCache
+from app.resilience import CircuitBreaker
+from app.dataset import Dataset
+from app.utils import load_inventory
+from app.warm import WarmJob
+from tests.conftest import CSV_PATH, CountingAsyncResponses
+
+# Rows used per test
+N_ROWS = 20
+
+
+@pytest.fixture
+def frame():
+    return load_inventory(CSV_PATH).head(N_ROWS).copy()
+
+
+@pytest.fixture
+def responses(monkeypatch, result_store):
+    """Enable the LLM path with an empty cache and result store, and a counting fake client."""
+    responses = CountingAsyncResponses()
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "llm_cache", LLMCache())
+    monkeypatch.setattr(llm, "inflight", llm.SingleFlight())
+    monkeypatch.setattr(llm, "llm_breaker", CircuitBreaker())
+    monkeypatch.setattr(llm, "async_client", types.SimpleNamespace(responses=responses))
+    return responses
+
+
+def make_job(df, checkpoint_path):
+    return WarmJob(Dataset.from_frame(df, CSV_PATH), checkpoint_path=str(checkpoint_path), rate=0, checkpoint_every=5)
+
+
+# Test that a re-run only recomputes changed rows
+def test_warm_rerun_only_recomputes_changed_rows(frame, responses, tmp_path):
+    """
+        Test that a second warm run skips cached rows and recomputes a changed one.
+
+        Expects:
+        - First run computes every row and writes it to the result store
+        - Second run makes one LLM call, for the changed row, even with the
+          LLM cache emptied in between (rows are skipped based on the store)
+        - Interactive lookups are then cache hits
+        """
+    checkpoint = tmp_path / "warm.json"
+    stats = asyncio.run(make_job(frame, checkpoint).run())
+    assert stats["computed"] == N_ROWS
+    assert responses.calls == N_ROWS
+    assert len(store.result_store.query(source="llm")) == N_ROWS
+
+    llm.llm_cache.clear()
+    frame.loc[frame.index[3], "DOL"] = frame["DOL"].iloc[3] + 1
+    stats = asyncio.run(make_job(frame, checkpoint).run())
+    assert stats["computed"] == 1
+    assert stats["skipped"] == N_ROWS - 1
+    assert responses.calls == N_ROWS + 1
+
+    summary = asyncio.run(llm.agenerate_vin_summary(Dataset.from_frame(frame, CSV_PATH).vehicle(3)))
+    assert summary["source"] == "cache"
+
+
+# Test that the job refuses to warm a cache that would not keep the results
+def test_warm_requires_persistent_tier(frame, responses, tmp_path, monkeypatch):
+    """
+        Test the warm job without a result store or LLM cache file.
+
+        Expects:
+        - No LLM calls and nothing computed (summaries would only live in the
+          bounded in-memory LRU)
+        """
+    monkeypatch.setattr(store, "result_store", None)
+    stats = asyncio.run(make_job(frame, tmp_path / "warm.json").run())
+    assert stats["computed"] == 0
+    assert responses.calls == 0
+
+
+# Test resuming from a checkpoint
+def test_warm_resumes_from_checkpoint(frame, responses, tmp_path):
+    """
+        Test that an unfinished checkpoint makes the job resume where it stopped.
+
+        Expects:
+        - Rows before the checkpointed position are not visited
+        - The checkpoint is marked completed at the end
+        """
+    checkpoint = tmp_path / "warm.json"
+    job = make_job(frame, checkpoint)
+    job._save_checkpoint(10)
+
+    stats = asyncio.run(job.run())
+    assert stats["computed"] == N_ROWS - 10
+    assert responses.calls == N_ROWS - 10
+    assert json.loads(checkpoint.read_text())["completed"] is True
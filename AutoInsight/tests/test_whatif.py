@@ -0,0 +1,86 @@
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import app.whatif as whatif
+from app.main import app, inventory
+from app.utils import deterministic_summary
+from app.whatif import sweep, sweep_axis
+
+client = TestClient(app)
+
+
+def scenario_risk(vehicle, price_change_pct, extra_days):
+    """Risk score of one scenario through `deterministic_summary`."""
+    row = vehicle.to_dict()
+    row["Current price to market %"] = vehicle.price_to_market * (1 + price_change_pct / 100)
+    row["DOL"] = vehicle.days_on_lot + extra_days
+    return deterministic_summary(row)["risk_score"]
+
+
+# Test the grid against per-scenario scoring
+def test_sweep_matches_deterministic_summary(dataset):
+    """
+        Test sweep for single vehicles against deterministic_summary per scenario.
+
+        Expects:
+        - Every grid cell equal to the per-scenario risk score
+        - Applying the break-even price cut keeps the risk at or below the current score
+        """
+    prices, days = sweep_axis(-30, 10, 5), sweep_axis(0, 120, 4)
+    for pos in range(0, len(dataset), 25):
+        vehicle = dataset.vehicle(pos)
+        result = sweep(dataset, [pos], prices, days)
+        for i, price in enumerate(prices):
+            for j, extra in enumerate(days):
+                assert result["risk"][i][j] == pytest.approx(scenario_risk(vehicle, price, extra), abs=1e-3)
+        for point in result["break_even"]:
+            if point["price_cut_pct"] is not None:
+                risk = scenario_risk(vehicle, -point["price_cut_pct"], point["extra_days"])
+                assert risk <= vehicle.risk_score + 1e-3
+
+
+# Test the endpoint in VIN and filter mode
+def test_what_if_endpoint(monkeypatch):
+    """
+        Test POST /what-if with a VIN, with filters and with too many vehicles.
+
+        Expects:
+        - A price_change_pct × extra_days grid and one break-even point per extra days value
+        - Risk never decreases with extra days or higher prices
+        - 404 for an unknown VIN, 422 above WHATIF_MAX_VEHICLES
+        """
+    vin = inventory.current.vehicle(0).vin
+    body = {"price_change_pct": {"start": -20, "stop": 0, "steps": 5}, "extra_days": {"start": 0, "stop": 60, "steps": 4}}
+    response = client.post("/what-if", json={"vin": vin, **body})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["vehicles"] == 1
+    assert np.array(result["risk"]).shape == (5, 4)
+    assert [point["extra_days"] for point in result["break_even"]] == [0, 20, 40, 60]
+    assert result["break_even"][0]["price_cut_pct"] == 0
+
+    make = inventory.current.vehicle(0).make
+    result = client.post("/what-if", json={"make": [make.lower()], **body}).json()
+    risk = np.array(result["risk"])
+    assert result["vehicles"] > 1
+    assert np.all(np.diff(risk, axis=0) >= -1e-9) and np.all(np.diff(risk, axis=1) >= -1e-9)
+
+    assert client.post("/what-if", json={"vin": "5J6RS5H52RL006998"}).status_code == 404
+    monkeypatch.setattr(whatif, "WHATIF_MAX_VEHICLES", 10)
+    assert client.post("/what-if", json={}).status_code == 422
+
+
+# Test the sweep speed
+def test_sweep_1000_vehicles_50x50_grid(dataset):
+    """
+        Test a 1000-vehicle sweep over a 50 × 50 grid.
+
+        Expects:
+        - Finishes in well under a second
+        """
+    positions = np.resize(np.arange(len(dataset)), 1000)
+    start = time.perf_counter()
+    result = sweep(dataset, positions, sweep_axis(-25, 0, 50), sweep_axis(0, 90, 50))
+    assert time.perf_counter() - start < 1.0
+    assert result["vehicles"] == 1000 and len(result["break_even"]) == 50